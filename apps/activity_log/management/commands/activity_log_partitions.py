@@ -0,0 +1,53 @@
+# apps/activity_log/management/commands/activity_log_partitions.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.activity_log.services.partitions import ActivityLogPartitionManager
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming daily ActivityLog partitions (and optionally convert the table or drop expired ones)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Convert the plain activity log table to a partitioned one (run once, in a maintenance window)'
+        )
+        parser.add_argument(
+            '--days-ahead',
+            type=int,
+            default=None,
+            help='Number of days to create partitions for ahead of today (ACTIVITY_LOG_PARTITION_PRECREATE_DAYS by default)'
+        )
+        parser.add_argument(
+            '--drop-expired',
+            action='store_true',
+            help='Drop the partitions older than ACTIVITY_LOG_RETENTION_DAYS'
+        )
+
+    def handle(self, *args, **options):
+        manager = ActivityLogPartitionManager
+        if not manager.is_supported():
+            raise CommandError('Activity log partitioning requires PostgreSQL')
+
+        if options['convert']:
+            if manager.is_partitioned():
+                self.stdout.write('Activity log table is already partitioned')
+            else:
+                copied = manager.convert(days_ahead=options['days_ahead'])
+                self.stdout.write(self.style.SUCCESS(f'Converted activity log table, copied {copied} rows'))
+        elif not manager.is_partitioned():
+            raise CommandError('Activity log table is not partitioned, run with --convert first')
+
+        created = manager.ensure_partitions(days_ahead=options['days_ahead'])
+        self.stdout.write(self.style.SUCCESS(f'Created {len(created)} partitions'))
+
+        if options['drop_expired']:
+            dropped = manager.drop_expired()
+            self.stdout.write(self.style.SUCCESS(f'Dropped {len(dropped)} expired partitions'))
+
+        default_rows = manager.default_partition_rows()
+        if default_rows:
+            self.stdout.write(self.style.WARNING(
+                f'{default_rows} rows are in the default partition, partitions were not created ahead of time'
+            ))
@@ -17,8 +17,9 @@ class ActivityLogMiddleware(MiddlewareMixin):
     Middleware for automatically logging certain activities.
     Add to MIDDLEWARE in settings.py to enable.
 
-    Note: This logs ALL requests, which can generate many logs.
-    Consider using selective logging in views instead.
+    Note: This logs ALL mutating requests, which can generate many logs.
+    Enable ACTIVITY_LOG_BUFFERED in production so the rows are written in batches
+    off the request path (see ActivityLogBuffer).
     """
 
     # Paths to exclude from automatic logging
@@ -207,3 +207,39 @@ class ActivityLog(TimeStampModel):
         from django.utils import timezone
         age = timezone.now() - self.created_at
         return age.days
+
+
+class ActivityLogHourlyStat(TimeStampModel):
+    """
+    Hourly rollup of activity logs per (user, action, level, success).
+
+    Rows with a user count that user's activities; rows without a user are the global totals
+    (including anonymous activities). Maintained by ``ActivityStatsRollup``, read by the
+    ActivityLogQuery stats.
+    """
+
+    hour = models.DateTimeField(help_text="ابتدای ساعت (UTC)")
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="activity_hourly_stats",
+        null=True,
+        blank=True,
+        help_text="کاربر (خالی برای آمار کل سیستم)"
+    )
+    action = models.CharField(max_length=50, choices=ActivityLogAction.choices)
+    level = models.CharField(max_length=20, choices=ActivityLogLevel.choices)
+    is_successful = models.BooleanField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "آمار ساعتی فعالیت"
+        verbose_name_plural = "آمار ساعتی فعالیت‌ها"
+        ordering = ["-hour"]
+        indexes = [
+            models.Index(fields=["hour"], condition=models.Q(user__isnull=True), name="activity_stat_global_hour_idx"),
+            models.Index(fields=["user", "hour"]),
+        ]
+
+    def __str__(self):
+        return f"{self.hour} - {self.user or 'global'} - {self.action} - {self.count}"
@@ -0,0 +1,188 @@
+"""
+apps/activity_log/services/buffer.py
+Buffered, batched ingestion of activity logs
+"""
+import atexit
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import Counter
+from typing import List
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from apps.activity_log.models import ActivityLog, ActivityLogLevel
+from apps.activity_log.signals import activity_logs_created
+from base_utils.base_models import assign_pids
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityLogBuffer:
+    """
+    Per-process bounded queue of unsaved ActivityLog rows, written with ``bulk_create``.
+
+    A daemon flusher thread writes a batch whenever ``ACTIVITY_LOG_BATCH_SIZE`` rows are queued
+    or ``ACTIVITY_LOG_FLUSH_INTERVAL`` seconds have passed, so logging adds no INSERT to the
+    request. Whatever is left is flushed when the process exits.
+
+    Policies per level:
+        * sampling: ``ACTIVITY_LOG_SAMPLE_RATES`` (e.g. ``{"debug": 0.1}``), unlisted levels are kept,
+        * backpressure (queue full): error/critical rows are written synchronously and never lost,
+          warning rows wait ``BLOCK_TIMEOUT_SECONDS`` for room, info/debug rows are dropped.
+
+    Note that ``created_at`` is set on insert, so it can lag the event by up to a flush interval.
+    """
+
+    SYNC_LEVELS = {ActivityLogLevel.ERROR, ActivityLogLevel.CRITICAL}
+    BLOCKING_LEVELS = {ActivityLogLevel.WARNING}
+    BLOCK_TIMEOUT_SECONDS = 0.05
+    DROP_REPORT_INTERVAL_SECONDS = 60
+
+    _lock = threading.Lock()
+    _flush_lock = threading.Lock()
+    _queue = None
+    _owner_pid = None
+    _wakeup = threading.Event()
+    _dropped = Counter()
+    _last_drop_report = 0.0
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return getattr(settings, "ACTIVITY_LOG_BUFFERED", False)
+
+    @staticmethod
+    def _batch_size() -> int:
+        return getattr(settings, "ACTIVITY_LOG_BATCH_SIZE", 500)
+
+    @staticmethod
+    def _flush_interval() -> float:
+        return getattr(settings, "ACTIVITY_LOG_FLUSH_INTERVAL", 2.0)
+
+    @staticmethod
+    def _sample_rate(level: str) -> float:
+        return getattr(settings, "ACTIVITY_LOG_SAMPLE_RATES", {}).get(level, 1.0)
+
+    @classmethod
+    def _get_queue(cls) -> queue.Queue:
+        # Started lazily and again after a fork: the parent's thread does not survive in the child
+        if cls._owner_pid != os.getpid():
+            with cls._lock:
+                if cls._owner_pid != os.getpid():
+                    cls._queue = queue.Queue(maxsize=getattr(settings, "ACTIVITY_LOG_BUFFER_MAX_SIZE", 10000))
+                    cls._dropped = Counter()
+                    cls._owner_pid = os.getpid()
+                    threading.Thread(target=cls._run, daemon=True, name="activity-log-flusher").start()
+        return cls._queue
+
+    @classmethod
+    def submit(cls, activity_log: ActivityLog) -> bool:
+        """
+        Queue an unsaved log row. Returns False if the row was sampled out or dropped.
+        """
+        level = activity_log.level
+        sample_rate = cls._sample_rate(level)
+        if sample_rate < 1 and random.random() >= sample_rate:
+            return False
+
+        # Assigned now, so the instance returned by the logger already has its public id
+        assign_pids([activity_log])
+
+        buffer = cls._get_queue()
+        try:
+            if level in cls.BLOCKING_LEVELS:
+                buffer.put(activity_log, timeout=cls.BLOCK_TIMEOUT_SECONDS)
+            else:
+                buffer.put_nowait(activity_log)
+        except queue.Full:
+            if level in cls.SYNC_LEVELS:
+                cls._write([activity_log])
+                return True
+            cls._dropped[level] += 1
+            return False
+
+        if buffer.qsize() >= cls._batch_size():
+            cls._wakeup.set()
+        return True
+
+    @classmethod
+    def flush(cls) -> int:
+        """Write everything queued so far from the calling thread, returns the number of rows"""
+        if cls._queue is None or cls._owner_pid != os.getpid():
+            return 0
+
+        written = 0
+        with cls._flush_lock:
+            while True:
+                batch = cls._drain(cls._batch_size())
+                if not batch:
+                    return written
+                cls._write(batch)
+                written += len(batch)
+
+    @classmethod
+    def _drain(cls, limit: int) -> List[ActivityLog]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(cls._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @classmethod
+    def _write(cls, batch: List[ActivityLog]):
+        try:
+            ActivityLog.objects.bulk_create(batch, batch_size=len(batch))
+        except Exception as e:
+            # One bad row (or a transient error) must not cost the whole batch
+            logger.warning(f"Failed to write {len(batch)} activity logs at once, writing them one by one: {e}")
+            batch = cls._write_rows(batch)
+            if not batch:
+                return
+        # bulk_create sends no post_save, listeners (e.g. CRM engagement) get the whole batch instead
+        activity_logs_created.send(sender=ActivityLog, logs=batch)
+
+    @staticmethod
+    def _write_rows(batch: List[ActivityLog]) -> List[ActivityLog]:
+        """Insert rows one at a time, returns the ones that were written"""
+        written = []
+        for activity_log in batch:
+            try:
+                with transaction.atomic():
+                    ActivityLog.objects.bulk_create([activity_log])
+            except Exception as e:
+                logger.error(f"Failed to write activity log ({activity_log.action}, {activity_log.level}): {e}")
+                continue
+            written.append(activity_log)
+        return written
+
+    @classmethod
+    def _report_drops(cls):
+        now = time.monotonic()
+        if not cls._dropped or now - cls._last_drop_report < cls.DROP_REPORT_INTERVAL_SECONDS:
+            return
+        dropped, cls._dropped = cls._dropped, Counter()
+        cls._last_drop_report = now
+        logger.warning(f"Activity log buffer full, dropped: {dict(dropped)}")
+
+    @classmethod
+    def _run(cls):
+        while True:
+            cls._wakeup.wait(cls._flush_interval())
+            cls._wakeup.clear()
+            try:
+                close_old_connections()
+                cls.flush()
+                cls._report_drops()
+            except Exception as e:
+                logger.error(f"Activity log flusher failed: {e}", exc_info=True)
+            finally:
+                close_old_connections()
+
+
+atexit.register(ActivityLogBuffer.flush)
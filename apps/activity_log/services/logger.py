@@ -10,6 +10,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.db.models import Model
 
 from apps.activity_log.models import ActivityLog, ActivityLogAction, ActivityLogLevel
+from apps.activity_log.services.buffer import ActivityLogBuffer
 from base_utils.services import AbstractBaseService
 
 User = get_user_model()
@@ -84,7 +85,8 @@ class ActivityLogService(AbstractBaseService):
             error_message: Error message if action failed
             
         Returns:
-            ActivityLog instance or None if creation failed
+            ActivityLog instance or None if creation failed.
+            With ACTIVITY_LOG_BUFFERED the instance is queued and saved later (see ActivityLogBuffer).
         """
         try:
             # Extract data from request if provided
@@ -107,8 +109,7 @@ class ActivityLogService(AbstractBaseService):
                 content_type = ContentType.objects.get_for_model(related_object)
                 object_id = getattr(related_object, 'pid', None) or str(related_object.pk)
             
-            # Create log entry
-            activity_log = ActivityLog.objects.create(
+            activity_log = ActivityLog(
                 user=user,
                 action=action,
                 level=level,
@@ -124,7 +125,13 @@ class ActivityLogService(AbstractBaseService):
                 is_successful=is_successful,
                 error_message=error_message
             )
-            
+
+            if ActivityLogBuffer.is_enabled():
+                # Written in a batch by the buffer flusher, the returned instance is not saved yet
+                ActivityLogBuffer.submit(activity_log)
+            else:
+                activity_log.save()
+
             return activity_log
             
         except Exception as e:
@@ -0,0 +1,231 @@
+"""
+apps/activity_log/services/partitions.py
+Daily range partitions of the activity log table (PostgreSQL)
+"""
+import logging
+import re
+from datetime import date, timedelta
+from typing import List
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from apps.activity_log.models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityLogPartitionManager:
+    """
+    Keeps ``ActivityLog`` in daily range partitions on ``created_at``.
+
+    Retention is a partition drop instead of a row-by-row delete, so it takes no row locks and
+    leaves no dead tuples behind. Queries filtering on ``created_at`` (every ActivityLogQuery
+    window and the admin list ordering) are pruned to the matching partitions.
+
+    The table is created as a plain table by the regular migrations; ``convert`` turns it into a
+    partitioned one once (see the ``activity_log_partitions`` management command). A DEFAULT
+    partition catches rows no daily partition covers, so inserts never fail if partitions were
+    not created ahead of time.
+    """
+
+    TABLE = ActivityLog._meta.db_table
+    LEGACY_TABLE = f"{TABLE}_legacy"
+    DEFAULT_PARTITION = f"{TABLE}_default"
+    PARTITION_PATTERN = re.compile(rf"^{TABLE}_p(\d{{8}})$")
+
+    @staticmethod
+    def get_retention_days() -> int:
+        return getattr(settings, "ACTIVITY_LOG_RETENTION_DAYS", 10)
+
+    @staticmethod
+    def get_precreate_days() -> int:
+        return getattr(settings, "ACTIVITY_LOG_PARTITION_PRECREATE_DAYS", 14)
+
+    @staticmethod
+    def is_supported() -> bool:
+        return connection.vendor == "postgresql"
+
+    @classmethod
+    def is_partitioned(cls) -> bool:
+        if not cls.is_supported():
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+                [cls.TABLE],
+            )
+            return cursor.fetchone() is not None
+
+    @classmethod
+    def partition_name(cls, day: date) -> str:
+        return f"{cls.TABLE}_p{day:%Y%m%d}"
+
+    @classmethod
+    def list_partitions(cls) -> List[date]:
+        """Days that have their own partition, oldest first"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)",
+                [cls.TABLE],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+
+        days = []
+        for name in names:
+            match = cls.PARTITION_PATTERN.match(name)
+            if match:
+                days.append(date(int(match[1][:4]), int(match[1][4:6]), int(match[1][6:])))
+        return sorted(days)
+
+    @classmethod
+    def _create_partition(cls, cursor, day: date):
+        name = cls.partition_name(day)
+        bounds = [day.isoformat(), (day + timedelta(days=1)).isoformat()]
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM "{cls.DEFAULT_PARTITION}" WHERE created_at >= %s AND created_at < %s)',
+            bounds,
+        )
+        if not cursor.fetchone()[0]:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{cls.TABLE}" FOR VALUES FROM (%s) TO (%s)',
+                bounds,
+            )
+            return
+
+        # Rows of that day already landed in the DEFAULT partition, which makes a plain
+        # CREATE ... PARTITION OF fail: move them to a standalone table and attach that instead
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{cls.TABLE}" INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{cls.DEFAULT_PARTITION}" WHERE created_at >= %s AND created_at < %s '
+            f'RETURNING *) INSERT INTO "{name}" SELECT * FROM moved',
+            bounds,
+        )
+        logger.info(f"Moved {cursor.rowcount} activity logs of {day} out of the default partition")
+        cursor.execute(f'ALTER TABLE "{cls.TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)', bounds)
+
+    @classmethod
+    def ensure_partitions(cls, days_ahead: int = None, start: date = None) -> List[date]:
+        """Create the daily partitions from ``start`` (today) up to ``days_ahead`` days ahead"""
+        days_ahead = cls.get_precreate_days() if days_ahead is None else days_ahead
+        start = start or timezone.now().date()
+
+        existing = set(cls.list_partitions())
+        created = []
+        with connection.cursor() as cursor:
+            for offset in range((days_ahead + 1) + (timezone.now().date() - start).days):
+                day = start + timedelta(days=offset)
+                if day in existing:
+                    continue
+                # One transaction per day: a failing day is retried on the next run and does not
+                # keep the other days (or the retention drop after this) from running
+                try:
+                    with transaction.atomic():
+                        cls._create_partition(cursor, day)
+                except DatabaseError as e:
+                    logger.error(f"Could not create the activity log partition of {day}: {e}")
+                    continue
+                created.append(day)
+
+        if created:
+            logger.info(f"Created {len(created)} activity log partitions up to {created[-1]}")
+        return created
+
+    @classmethod
+    def drop_expired(cls, retention_days: int = None) -> List[date]:
+        """Drop the partitions whose whole day is older than the retention window"""
+        retention_days = cls.get_retention_days() if retention_days is None else retention_days
+        cutoff = timezone.now().date() - timedelta(days=retention_days)
+
+        dropped = []
+        with connection.cursor() as cursor:
+            for day in cls.list_partitions():
+                if day + timedelta(days=1) > cutoff:
+                    break
+                cursor.execute(f'DROP TABLE IF EXISTS "{cls.partition_name(day)}"')
+                dropped.append(day)
+
+        if dropped:
+            logger.info(f"Dropped {len(dropped)} activity log partitions up to {dropped[-1]}")
+        return dropped
+
+    @classmethod
+    def default_partition_rows(cls) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM "{cls.DEFAULT_PARTITION}"')
+            return cursor.fetchone()[0]
+
+    @classmethod
+    @transaction.atomic
+    def convert(cls, retention_days: int = None, days_ahead: int = None) -> int:
+        """
+        Turn the plain activity log table into a partitioned one.
+
+        Rows inside the retention window are copied over, older rows are discarded with the old
+        table. Indexes and foreign keys are recreated on the partitioned table. PostgreSQL only
+        allows unique indexes that include the partition key, so the primary key becomes
+        ``(id, created_at)`` and unique indexes (``pid``) are extended with ``created_at``; pids are
+        random public ids, so uniqueness per timestamp still rules out duplicates in practice.
+        Returns the number of copied rows.
+        """
+        if cls.is_partitioned():
+            return 0
+
+        retention_days = cls.get_retention_days() if retention_days is None else retention_days
+        oldest_day = timezone.now().date() - timedelta(days=retention_days)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid) FROM pg_index i "
+                "WHERE i.indrelid = %s::regclass AND NOT i.indisprimary",
+                [cls.TABLE],
+            )
+            indexes = cursor.fetchall()
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype = 'f'",
+                [cls.TABLE],
+            )
+            foreign_keys = cursor.fetchall()
+
+            cursor.execute(f'ALTER TABLE "{cls.TABLE}" RENAME TO "{cls.LEGACY_TABLE}"')
+            cursor.execute(
+                f'CREATE TABLE "{cls.TABLE}" (LIKE "{cls.LEGACY_TABLE}" INCLUDING DEFAULTS INCLUDING IDENTITY) '
+                f"PARTITION BY RANGE (created_at)"
+            )
+            cursor.execute(f'ALTER TABLE "{cls.TABLE}" ADD PRIMARY KEY (id, created_at)')
+            cursor.execute(f'CREATE TABLE "{cls.DEFAULT_PARTITION}" PARTITION OF "{cls.TABLE}" DEFAULT')
+
+        cls.ensure_partitions(days_ahead=days_ahead, start=oldest_day)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO "{cls.TABLE}" OVERRIDING SYSTEM VALUE SELECT * FROM "{cls.LEGACY_TABLE}" '
+                f"WHERE created_at >= %s",
+                [oldest_day.isoformat()],
+            )
+            copied = cursor.rowcount
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                f'(SELECT coalesce(max(id), 0) + 1 FROM "{cls.LEGACY_TABLE}"), false)',
+                [cls.TABLE],
+            )
+            cursor.execute(f'DROP TABLE "{cls.LEGACY_TABLE}"')
+
+            # The index and constraint names are free again now that the old table is gone
+            for name, definition in indexes:
+                definition = re.sub(r" ON (\S+\.)?\S+ ", f' ON "{cls.TABLE}" ', definition, count=1)
+                if definition.startswith("CREATE UNIQUE INDEX") and "created_at" not in definition:
+                    # Closing parenthesis of the column list, before an optional WHERE clause
+                    definition = re.sub(r"\)((?: WHERE .*)?)$", r", created_at)\1", definition, count=1)
+                cursor.execute(definition)
+            for name, definition in foreign_keys:
+                cursor.execute(f'ALTER TABLE "{cls.TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+        logger.info(f"Converted {cls.TABLE} to daily partitions, copied {copied} rows")
+        return copied
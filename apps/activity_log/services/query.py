@@ -2,12 +2,14 @@
 apps/activity_log/services/query.py
 Query service for activity logs
 """
+from collections import Counter
 from datetime import timedelta
 from django.contrib.auth import get_user_model
 from django.db.models import Count, Q, Max
 from django.utils import timezone
 
 from apps.activity_log.models import ActivityLog, ActivityLogAction
+from apps.activity_log.services.rollup import ActivityStatsRollup
 from base_utils.services import AbstractBaseQuery
 
 User = get_user_model()
@@ -16,10 +18,32 @@ User = get_user_model()
 class ActivityLogQuery(AbstractBaseQuery):
     """Query service for activity logs"""
 
+    @staticmethod
+    def _build_stats(counts: list) -> dict:
+        """Totals and breakdowns from (action, level, is_successful) counts"""
+        total_activities = sum(row['count'] for row in counts)
+        successful_activities = sum(row['count'] for row in counts if row['is_successful'])
+        failed_activities = total_activities - successful_activities
+
+        action_counts, level_counts = Counter(), Counter()
+        for row in counts:
+            action_counts[row['action']] += row['count']
+            level_counts[row['level']] += row['count']
+
+        return {
+            'total_activities': total_activities,
+            'successful_activities': successful_activities,
+            'failed_activities': failed_activities,
+            'success_rate': (successful_activities / total_activities * 100) if total_activities > 0 else 0,
+            'action_breakdown': [{'action': a, 'count': c} for a, c in action_counts.most_common()],
+            'level_breakdown': [{'level': l, 'count': c} for l, c in level_counts.most_common()],
+        }
+
     @staticmethod
     def get_user_stats(user: User, days: int = 7) -> dict:
         """
         Get activity statistics for a specific user.
+        Closed hours are read from the hourly rollup, see ActivityStatsRollup.
 
         Args:
             user: User instance
@@ -30,38 +54,13 @@ class ActivityLogQuery(AbstractBaseQuery):
         """
         cutoff_date = timezone.now() - timedelta(days=days)
 
-        queryset = ActivityLog.objects.filter(
-            user=user,
-            created_at__gte=cutoff_date
-        )
-
-        total_activities = queryset.count()
-        successful_activities = queryset.filter(is_successful=True).count()
-        failed_activities = queryset.filter(is_successful=False).count()
-
-        # Action breakdown
-        action_breakdown = queryset.values('action').annotate(
-            count=Count('id')
-        ).order_by('-count')
-
-        # Level breakdown
-        level_breakdown = queryset.values('level').annotate(
-            count=Count('id')
-        ).order_by('-count')
-
-        return {
-            'total_activities': total_activities,
-            'successful_activities': successful_activities,
-            'failed_activities': failed_activities,
-            'success_rate': (successful_activities / total_activities * 100) if total_activities > 0 else 0,
-            'action_breakdown': list(action_breakdown),
-            'level_breakdown': list(level_breakdown),
-        }
+        return ActivityLogQuery._build_stats(ActivityStatsRollup.get_counts(cutoff_date, user=user))
 
     @staticmethod
     def get_system_stats(days: int = 7) -> dict:
         """
         Get system-wide activity statistics.
+        Closed hours are read from the hourly rollup, see ActivityStatsRollup.
 
         Args:
             days: Number of days to look back
@@ -71,32 +70,9 @@ class ActivityLogQuery(AbstractBaseQuery):
         """
         cutoff_date = timezone.now() - timedelta(days=days)
 
-        queryset = ActivityLog.objects.filter(created_at__gte=cutoff_date)
-
-        total_activities = queryset.count()
-        successful_activities = queryset.filter(is_successful=True).count()
-        failed_activities = queryset.filter(is_successful=False).count()
-        unique_users = queryset.values('user').distinct().count()
-
-        # Action breakdown
-        action_breakdown = queryset.values('action').annotate(
-            count=Count('id')
-        ).order_by('-count')
-
-        # Level breakdown
-        level_breakdown = queryset.values('level').annotate(
-            count=Count('id')
-        ).order_by('-count')
-
-        return {
-            'total_activities': total_activities,
-            'successful_activities': successful_activities,
-            'failed_activities': failed_activities,
-            'unique_users': unique_users,
-            'success_rate': (successful_activities / total_activities * 100) if total_activities > 0 else 0,
-            'action_breakdown': list(action_breakdown),
-            'level_breakdown': list(level_breakdown),
-        }
+        stats = ActivityLogQuery._build_stats(ActivityStatsRollup.get_counts(cutoff_date))
+        stats['unique_users'] = ActivityStatsRollup.count_unique_users(cutoff_date)
+        return stats
 
     @staticmethod
     def get_users_activity_summary(limit: int = 100) -> list:
@@ -0,0 +1,180 @@
+"""
+apps/activity_log/services/rollup.py
+Hourly activity statistics rollup
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from apps.activity_log.models import ActivityLog, ActivityLogHourlyStat
+from base_utils.base_models import bulk_create_with_pids
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityStatsRollup:
+    """
+    Maintains ``ActivityLogHourlyStat`` and answers stats windows from it.
+
+    ``rollup`` recomputes closed hours with one GROUP BY over the raw log (pruned to the
+    partitions of those hours) and replaces their rollup rows, so it is idempotent and safe to
+    re-run. The rolled-up watermark (end of the last closed hour processed) is kept in the cache.
+
+    ``get_counts`` reads the rolled-up hours of a window from the rollup table and only the rest
+    (the leading partial hour and everything after the watermark) from the raw log, in one
+    conditional-aggregate pass. Its cost depends on the window length, not on the log volume.
+    """
+
+    WATERMARK_KEY = "activity_log:stats_rollup:until"
+
+    @staticmethod
+    def floor_hour(moment: datetime) -> datetime:
+        return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+    @classmethod
+    def get_watermark(cls) -> Optional[datetime]:
+        """End of the rolled-up range, None if nothing was rolled up yet"""
+        try:
+            watermark = cache.get(cls.WATERMARK_KEY)
+        except Exception as e:
+            logger.warning(f"Could not read activity stats watermark: {e}")
+            watermark = None
+
+        if watermark is None:
+            last_hour = ActivityLogHourlyStat.objects.filter(user__isnull=True).aggregate(last=Max("hour"))["last"]
+            watermark = last_hour + timedelta(hours=1) if last_hour else None
+        return watermark
+
+    @classmethod
+    def rollup(cls, now: datetime = None) -> int:
+        """Roll up the closed hours since the watermark, returns the number of rollup rows written"""
+        now = now or timezone.now()
+        end = cls.floor_hour(now)
+
+        watermark = cls.get_watermark()
+        if watermark is None:
+            start = cls.floor_hour(now - timedelta(days=getattr(settings, "ACTIVITY_LOG_RETENTION_DAYS", 10)))
+        else:
+            # The last rolled-up hour is recomputed once more, in case a flush landed in it late
+            start = min(watermark, end) - timedelta(hours=1)
+        if start >= end:
+            return 0
+
+        rows = (
+            ActivityLog.objects.filter(created_at__gte=start, created_at__lt=end)
+            .annotate(hour=TruncHour("created_at", tzinfo=dt_timezone.utc))
+            .values("hour", "user_id", "action", "level", "is_successful")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+
+        stats, global_counts = [], defaultdict(int)
+        for row in rows:
+            key = (row["hour"], row["action"], row["level"], row["is_successful"])
+            global_counts[key] += row["count"]
+            if row["user_id"]:
+                stats.append(cls._build_stat(key, row["count"], user_id=row["user_id"]))
+        stats.extend(cls._build_stat(key, count) for key, count in global_counts.items())
+
+        with transaction.atomic():
+            ActivityLogHourlyStat.objects.filter(hour__gte=start, hour__lt=end).hard_delete()
+            bulk_create_with_pids(ActivityLogHourlyStat.objects, stats, batch_size=1000)
+
+        retention_days = getattr(settings, "ACTIVITY_LOG_STATS_RETENTION_DAYS", 90)
+        ActivityLogHourlyStat.objects.filter(hour__lt=end - timedelta(days=retention_days)).hard_delete()
+
+        try:
+            cache.set(cls.WATERMARK_KEY, end, None)
+        except Exception as e:
+            logger.warning(f"Could not store activity stats watermark: {e}")
+
+        logger.info(f"Rolled up activity stats from {start} to {end}: {len(stats)} rows")
+        return len(stats)
+
+    @staticmethod
+    def _build_stat(key, count: int, user_id: int = None) -> ActivityLogHourlyStat:
+        hour, action, level, is_successful = key
+        return ActivityLogHourlyStat(
+            hour=hour,
+            user_id=user_id,
+            action=action,
+            level=level,
+            is_successful=is_successful,
+            count=count,
+        )
+
+    @classmethod
+    def get_counts(cls, since: datetime, user=None) -> list:
+        """
+        Activity counts since ``since`` grouped by (action, level, is_successful), as a list of
+        ``{"action", "level", "is_successful", "count"}`` dicts.
+        """
+        rolled_from, raw_filter, stats_filter = cls._split_window(since, user)
+
+        counts = defaultdict(int)
+        if rolled_from is not None:
+            for row in (
+                ActivityLogHourlyStat.objects.filter(stats_filter)
+                .values("action", "level", "is_successful")
+                .annotate(total=Sum("count"))
+                .order_by()
+            ):
+                counts[(row["action"], row["level"], row["is_successful"])] += row["total"]
+
+        for row in (
+            ActivityLog.objects.filter(raw_filter)
+            .values("action", "level", "is_successful")
+            .annotate(total=Count("id"))
+            .order_by()
+        ):
+            counts[(row["action"], row["level"], row["is_successful"])] += row["total"]
+
+        return [
+            {"action": action, "level": level, "is_successful": is_successful, "count": count}
+            for (action, level, is_successful), count in counts.items()
+        ]
+
+    @classmethod
+    def count_unique_users(cls, since: datetime) -> int:
+        """Number of distinct (non anonymous) users active since ``since``"""
+        rolled_from, raw_filter, stats_filter = cls._split_window(since, None, global_rows=False)
+
+        raw_users = ActivityLog.objects.filter(raw_filter, user__isnull=False).values_list("user_id")
+        if rolled_from is None:
+            return raw_users.distinct().count()
+        rolled_users = ActivityLogHourlyStat.objects.filter(stats_filter, user__isnull=False).values_list("user_id")
+        # UNION removes the duplicates
+        return rolled_users.union(raw_users).count()
+
+    @classmethod
+    def _split_window(cls, since: datetime, user, global_rows: bool = True):
+        """
+        Split [since, now) into the rolled-up hours and the raw remainder.
+        Returns (rolled_from or None, raw log filter, rollup filter).
+        """
+        watermark = cls.get_watermark()
+        rolled_from = cls.floor_hour(since) + timedelta(hours=1) if since != cls.floor_hour(since) else since
+
+        if watermark is None or rolled_from >= watermark:
+            raw_filter = Q(created_at__gte=since)
+            rolled_from = None
+            stats_filter = Q()
+        else:
+            raw_filter = Q(created_at__gte=since, created_at__lt=rolled_from) | Q(created_at__gte=watermark)
+            stats_filter = Q(hour__gte=rolled_from, hour__lt=watermark)
+
+        if user is not None:
+            raw_filter &= Q(user=user)
+            stats_filter &= Q(user=user)
+        elif global_rows:
+            stats_filter &= Q(user__isnull=True)
+
+        return rolled_from, raw_filter, stats_filter
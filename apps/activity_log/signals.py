@@ -0,0 +1,9 @@
+"""
+apps/activity_log/signals.py
+Signals sent by the activity log app
+"""
+from django.dispatch import Signal
+
+# Sent after a buffered batch is written with bulk_create (which sends no post_save).
+# Arguments: logs (list of the ActivityLog rows written)
+activity_logs_created = Signal()
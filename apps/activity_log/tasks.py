@@ -14,23 +14,36 @@ logger = logging.getLogger(__name__)
 @shared_task(name="apps.activity_log.tasks.delete_old_activity_logs")
 def delete_old_activity_logs():
     """
-    Delete activity logs older than 10 days.
+    Delete activity logs older than the retention window (10 days by default).
     Runs daily via Celery Beat.
+
+    On a partitioned table this creates the upcoming daily partitions and drops the expired
+    ones, otherwise the old rows are deleted.
     """
     try:
         from apps.activity_log.models import ActivityLog
-        
-        # Calculate the cutoff date (10 days ago)
-        cutoff_date = timezone.now() - timedelta(days=10)
-        
-        # Get count before deletion
-        old_logs = ActivityLog.objects.filter(created_at__lt=cutoff_date)
-        count = old_logs.count()
-        
-        if count > 0:
-            # Delete old logs
-            deleted_count, _ = old_logs.delete()
-            logger.info(f"Deleted {deleted_count} activity logs older than 10 days")
+        from apps.activity_log.services.partitions import ActivityLogPartitionManager
+
+        retention_days = ActivityLogPartitionManager.get_retention_days()
+
+        if ActivityLogPartitionManager.is_partitioned():
+            ActivityLogPartitionManager.ensure_partitions()
+            dropped = ActivityLogPartitionManager.drop_expired(retention_days)
+            logger.info(f"Dropped {len(dropped)} activity log partitions older than {retention_days} days")
+            return {
+                "success": True,
+                "dropped_partitions": [day.isoformat() for day in dropped],
+                "message": f"Successfully dropped {len(dropped)} old activity log partitions"
+            }
+
+        # Calculate the cutoff date
+        cutoff_date = timezone.now() - timedelta(days=retention_days)
+
+        # global_objects is a plain manager: one DELETE, soft-deleted rows included
+        deleted_count, _ = ActivityLog.global_objects.filter(created_at__lt=cutoff_date).delete()
+
+        if deleted_count > 0:
+            logger.info(f"Deleted {deleted_count} activity logs older than {retention_days} days")
             return {
                 "success": True,
                 "deleted_count": deleted_count,
@@ -63,43 +76,24 @@ def generate_activity_report(user_pid: str = None, days: int = 7):
         days: Number of days to include in report
     """
     try:
-        from apps.activity_log.models import ActivityLog
+        from apps.activity_log.services.query import ActivityLogQuery
         from django.contrib.auth import get_user_model
-        from django.db.models import Count
         
         User = get_user_model()
-        cutoff_date = timezone.now() - timedelta(days=days)
-        
-        queryset = ActivityLog.objects.filter(created_at__gte=cutoff_date)
         
+        # Statistics come from the hourly rollup (plus the raw log for the hours not rolled up yet)
         if user_pid:
             user = User.objects.get(pid=user_pid)
-            queryset = queryset.filter(user=user)
-        
-        # Generate statistics
-        total_activities = queryset.count()
-        successful_activities = queryset.filter(is_successful=True).count()
-        failed_activities = queryset.filter(is_successful=False).count()
-        
-        # Activity breakdown by action
-        action_breakdown = queryset.values('action').annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        # Activity breakdown by level
-        level_breakdown = queryset.values('level').annotate(
-            count=Count('id')
-        ).order_by('-count')
+            stats = ActivityLogQuery.get_user_stats(user=user, days=days)
+        else:
+            stats = ActivityLogQuery.get_system_stats(days=days)
+            stats.pop("unique_users")
         
+        total_activities = stats["total_activities"]
         report = {
             "success": True,
             "period_days": days,
-            "total_activities": total_activities,
-            "successful_activities": successful_activities,
-            "failed_activities": failed_activities,
-            "success_rate": (successful_activities / total_activities * 100) if total_activities > 0 else 0,
-            "action_breakdown": list(action_breakdown),
-            "level_breakdown": list(level_breakdown),
+            **stats,
         }
         
         logger.info(f"Generated activity report: {total_activities} activities in {days} days")
@@ -113,6 +107,29 @@ def generate_activity_report(user_pid: str = None, days: int = 7):
         }
 
 
+@shared_task(name="apps.activity_log.tasks.rollup_activity_stats")
+def rollup_activity_stats():
+    """
+    Roll the closed hours of the activity log up into ActivityLogHourlyStat.
+    Runs every 10 minutes via Celery Beat.
+    """
+    try:
+        from apps.activity_log.services.rollup import ActivityStatsRollup
+
+        rows = ActivityStatsRollup.rollup()
+        return {
+            "success": True,
+            "rows": rows
+        }
+
+    except Exception as e:
+        logger.error(f"Error rolling up activity stats: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+
 @shared_task(name="apps.activity_log.tasks.cleanup_anonymous_logs")
 def cleanup_anonymous_logs(days: int = 3):
     """
@@ -127,15 +144,13 @@ def cleanup_anonymous_logs(days: int = 3):
         
         cutoff_date = timezone.now() - timedelta(days=days)
         
-        # Delete anonymous logs
-        old_anonymous_logs = ActivityLog.objects.filter(
+        # Delete anonymous logs (bounded on created_at, so only the older partitions are scanned)
+        deleted_count, _ = ActivityLog.global_objects.filter(
             user__isnull=True,
             created_at__lt=cutoff_date
-        )
-        
-        count = old_anonymous_logs.count()
-        if count > 0:
-            deleted_count, _ = old_anonymous_logs.delete()
+        ).delete()
+
+        if deleted_count > 0:
             logger.info(f"Deleted {deleted_count} anonymous activity logs older than {days} days")
             return {
                 "success": True,
@@ -0,0 +1,64 @@
+import queue
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import override_settings
+
+from apps.activity_log.models import ActivityLog, ActivityLogAction, ActivityLogLevel
+from apps.activity_log.services.buffer import ActivityLogBuffer
+from apps.activity_log.services.logger import ActivityLogService
+from base_utils.base_tests import TainoBaseServiceTestCase
+
+
+@override_settings(ACTIVITY_LOG_BUFFERED=True, ACTIVITY_LOG_FLUSH_INTERVAL=3600)
+class ActivityLogBufferTest(TainoBaseServiceTestCase):
+
+    def tearDown(self):
+        ActivityLogBuffer.flush()
+        super().tearDown()
+
+    def log(self, level=ActivityLogLevel.INFO):
+        return ActivityLogService.log(user=self.user, action=ActivityLogAction.CREATE, level=level)
+
+    def test_logs_are_written_in_one_batch_on_flush(self):
+        for _ in range(3):
+            self.log()
+        self.assertFalse(ActivityLog.objects.filter(user=self.user).exists())
+
+        with self.assertNumQueries(1):
+            written = ActivityLogBuffer.flush()
+
+        self.assertEqual(written, 3)
+        self.assertEqual(ActivityLog.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(len(set(ActivityLog.objects.values_list("pid", flat=True))), 3)
+
+    @override_settings(ACTIVITY_LOG_SAMPLE_RATES={ActivityLogLevel.DEBUG: 0})
+    def test_sampled_out_levels_are_not_queued(self):
+        self.log(level=ActivityLogLevel.DEBUG)
+        self.assertEqual(ActivityLogBuffer.flush(), 0)
+
+    def test_full_buffer_drops_info_and_writes_errors_synchronously(self):
+        ActivityLogBuffer._get_queue()
+        with mock.patch.object(ActivityLogBuffer._queue, "put_nowait", side_effect=queue.Full):
+            self.assertFalse(ActivityLogBuffer.submit(self.log_instance(ActivityLogLevel.INFO)))
+            self.assertTrue(ActivityLogBuffer.submit(self.log_instance(ActivityLogLevel.ERROR)))
+
+        self.assertEqual(list(ActivityLog.objects.values_list("level", flat=True)), [ActivityLogLevel.ERROR])
+
+    def test_failed_batch_is_written_row_by_row(self):
+        for _ in range(3):
+            self.log()
+        bulk_create = ActivityLog.objects.bulk_create
+
+        def fail_batches(objs, **kwargs):
+            if len(objs) > 1:
+                raise DatabaseError("batch failed")
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(ActivityLog.objects, "bulk_create", side_effect=fail_batches):
+            self.assertEqual(ActivityLogBuffer.flush(), 3)
+
+        self.assertEqual(ActivityLog.objects.filter(user=self.user).count(), 3)
+
+    def log_instance(self, level):
+        return ActivityLog(user=self.user, action=ActivityLogAction.CREATE, level=level)
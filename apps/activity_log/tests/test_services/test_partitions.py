@@ -0,0 +1,83 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.utils import timezone
+
+from apps.activity_log.models import ActivityLog, ActivityLogAction
+from apps.activity_log.services.partitions import ActivityLogPartitionManager
+from apps.activity_log.tasks import cleanup_anonymous_logs, delete_old_activity_logs
+from base_utils.base_tests import TainoBaseServiceTestCase
+
+
+@skipUnless(connection.vendor == "postgresql", "Partitioning requires PostgreSQL")
+class ActivityLogPartitionManagerTest(TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.now().date()
+        ActivityLogPartitionManager.convert(retention_days=3, days_ahead=2)
+
+    def test_convert_creates_daily_partitions(self):
+        self.assertTrue(ActivityLogPartitionManager.is_partitioned())
+        self.assertEqual(
+            ActivityLogPartitionManager.list_partitions(),
+            [self.today + timedelta(days=offset) for offset in range(-3, 3)],
+        )
+
+    def test_logs_are_routed_and_queried_through_the_parent(self):
+        ActivityLog.objects.create(user=self.user, action=ActivityLogAction.LOGIN)
+
+        self.assertEqual(ActivityLog.objects.filter(user=self.user, created_at__date=self.today).count(), 1)
+        self.assertEqual(ActivityLogPartitionManager.default_partition_rows(), 0)
+
+    def test_drop_expired_only_drops_whole_days_outside_retention(self):
+        dropped = ActivityLogPartitionManager.drop_expired(retention_days=2)
+
+        self.assertEqual(dropped, [self.today - timedelta(days=3)])
+        self.assertEqual(ActivityLogPartitionManager.list_partitions()[0], self.today - timedelta(days=2))
+
+    def test_rows_in_the_default_partition_are_moved_to_the_new_day(self):
+        log = ActivityLog.objects.create(user=self.user, action=ActivityLogAction.LOGIN)
+        future = timezone.now() + timedelta(days=5)
+        ActivityLog.objects.filter(pk=log.pk).update(created_at=future)
+        self.assertEqual(ActivityLogPartitionManager.default_partition_rows(), 1)
+
+        created = ActivityLogPartitionManager.ensure_partitions(days_ahead=6)
+
+        self.assertIn(future.date(), created)
+        self.assertEqual(ActivityLogPartitionManager.default_partition_rows(), 0)
+        self.assertTrue(ActivityLog.objects.filter(pk=log.pk, created_at=future).exists())
+
+
+class ActivityLogRetentionTest(TainoBaseServiceTestCase):
+    """Row deletes, as used while the table is not partitioned"""
+
+    def make_log(self, days_ago, user=None):
+        log = ActivityLog.objects.create(user=user, action=ActivityLogAction.LOGIN)
+        ActivityLog.objects.filter(pk=log.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return log
+
+    def test_old_logs_are_deleted(self):
+        old, recent = self.make_log(30, self.user), self.make_log(1, self.user)
+
+        result = delete_old_activity_logs()
+
+        self.assertEqual(result["deleted_count"], 1)
+        self.assertFalse(ActivityLog.global_objects.filter(pk=old.pk).exists())
+        self.assertTrue(ActivityLog.objects.filter(pk=recent.pk).exists())
+
+    def test_old_soft_deleted_logs_are_deleted(self):
+        old = self.make_log(30, self.user)
+        old.delete()
+
+        delete_old_activity_logs()
+
+        self.assertFalse(ActivityLog.global_objects.filter(pk=old.pk).exists())
+
+    def test_old_anonymous_logs_are_deleted(self):
+        anonymous, own = self.make_log(5), self.make_log(5, self.user)
+
+        self.assertEqual(cleanup_anonymous_logs(days=3)["deleted_count"], 1)
+        self.assertFalse(ActivityLog.global_objects.filter(pk=anonymous.pk).exists())
+        self.assertTrue(ActivityLog.objects.filter(pk=own.pk).exists())
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.activity_log.models import ActivityLog, ActivityLogAction, ActivityLogHourlyStat, ActivityLogLevel
+from apps.activity_log.services.query import ActivityLogQuery
+from apps.activity_log.services.rollup import ActivityStatsRollup
+from base_utils.base_tests import LocMemCacheTestMixin, TainoBaseServiceTestCase
+
+
+class ActivityStatsRollupTest(LocMemCacheTestMixin, TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for action, is_successful in [
+            (ActivityLogAction.LOGIN, True),
+            (ActivityLogAction.LOGIN, True),
+            (ActivityLogAction.CREATE, False),
+        ]:
+            ActivityLog.objects.create(
+                user=self.user,
+                action=action,
+                is_successful=is_successful,
+                level=ActivityLogLevel.INFO if is_successful else ActivityLogLevel.ERROR,
+            )
+        ActivityLog.objects.create(user=None, action=ActivityLogAction.LOGIN)
+
+    def assert_user_stats(self, stats):
+        self.assertEqual(stats["total_activities"], 3)
+        self.assertEqual(stats["successful_activities"], 2)
+        self.assertEqual(stats["failed_activities"], 1)
+        self.assertEqual(stats["action_breakdown"][0], {"action": ActivityLogAction.LOGIN, "count": 2})
+
+    def test_stats_before_any_rollup_come_from_the_raw_log(self):
+        self.assert_user_stats(ActivityLogQuery.get_user_stats(self.user))
+
+    def test_rollup_writes_user_and_global_rows(self):
+        ActivityStatsRollup.rollup(now=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(ActivityLogHourlyStat.objects.filter(user=self.user).count(), 2)
+        global_rows = ActivityLogHourlyStat.objects.filter(user__isnull=True)
+        self.assertEqual(sum(global_rows.values_list("count", flat=True)), 4)
+
+    def test_stats_read_rolled_up_hours_from_the_rollup(self):
+        ActivityStatsRollup.rollup(now=timezone.now() + timedelta(hours=1))
+        ActivityLog.objects.all().hard_delete()
+
+        self.assert_user_stats(ActivityLogQuery.get_user_stats(self.user))
+        system_stats = ActivityLogQuery.get_system_stats()
+        self.assertEqual(system_stats["total_activities"], 4)
+        self.assertEqual(system_stats["unique_users"], 1)
+
+    def test_rollup_is_idempotent(self):
+        later = timezone.now() + timedelta(hours=1)
+        ActivityStatsRollup.rollup(now=later)
+        ActivityStatsRollup.rollup(now=later)
+
+        self.assertEqual(ActivityLogHourlyStat.objects.filter(user__isnull=True).count(), 2)
@@ -67,6 +67,10 @@ class AIChargeRequestSerializer(TainoBaseSerializer):
 
     description = serializers.CharField(required=False, allow_blank=True, help_text="توضیحات تراکنش")
 
+    schedule_version = serializers.CharField(
+        required=False, allow_blank=True, help_text="نسخه جدول قیمتی که کلاینت با آن هزینه را محاسبه کرده است"
+    )
+
 
 class StepOptionsRequestSerializer(TainoBaseSerializer):
     """سریالایزر برای درخواست گزینه‌های استپ"""
@@ -50,6 +50,10 @@ class GeneralChatAIConfigSerializer(serializers.ModelSerializer):
         return None
 
     def get_ai_configs_count(self, obj):
+        # Use the prefetched active configs when the view provided them
+        active_ai_configs = getattr(obj, "active_ai_configs", None)
+        if active_ai_configs is not None:
+            return len(active_ai_configs)
         return obj.ai_configs.filter(is_active=True).count()
 
 
@@ -8,6 +8,7 @@ from rest_framework.decorators import action
 from drf_spectacular.utils import extend_schema
 
 from apps.ai_chat.models import AISession, AIMessage
+from base_utils.structured_pages.pagination import KeysetPagination
 from base_utils.views.mobile import TainoMobileGenericViewSet, TainoMobileCreateModelMixin, TainoMobileListModelMixin
 
 from apps.ai_chat.api.v1.serializers import AIMessageSerializer, AIMessageCreateSerializer
@@ -20,6 +21,7 @@ class AIMessageViewSet(TainoMobileListModelMixin, TainoMobileCreateModelMixin, T
     """ViewSet for AI messages"""
 
     serializer_class = AIMessageSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return AIMessage.objects.all()
@@ -1,11 +1,13 @@
 # apps/ai_chat/api/v1/views.py
+import hashlib
 import logging
 
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import status, serializers
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from drf_spectacular.utils import extend_schema, inline_serializer
+from drf_spectacular.utils import OpenApiParameter, extend_schema, inline_serializer
 from base_utils.permissions import HasTainoMobileUserPermission
 from base_utils.views.mobile import TainoMobileGenericViewSet
 
@@ -94,6 +96,16 @@ class AIPricingViewSet(TainoMobileGenericViewSet):
         serializer = AIChargeRequestSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        # کلاینت‌هایی که قیمت را محلی محاسبه کرده‌اند نسخه جدول قیمت را تایید می‌کنند
+        schedule_version = serializer.validated_data.get("schedule_version")
+        if schedule_version:
+            schedule = AIPricingCalculator.get_pricing_schedule(serializer.validated_data["ai_config_static_name"])
+            if schedule and schedule.version != schedule_version:
+                return Response(
+                    {"success": False, "error": "جدول قیمت تغییر کرده است", "schedule": schedule.to_dict()},
+                    status=status.HTTP_409_CONFLICT,
+                )
+
         # اعتبارسنجی تطابق فرانت و بک
         is_valid, error = AIPricingCalculator.validate_request(
             ai_config_static_name=serializer.validated_data["ai_config_static_name"],
@@ -262,12 +274,10 @@ class AIPricingViewSet(TainoMobileGenericViewSet):
             # اگر قیمت‌گذاری هیبریدی است، جزئیات بیشتر
             if result.get("pricing_type") == "advanced_hybrid":
                 # محاسبه درصد استفاده از کاراکترهای رایگان
-                ai_config = AIPricingCalculator.get_ai_config(ai_config_static_name)
-                if ai_config:
-                    free_char_usage_percent = min(
-                        100, (character_count / ai_config.hybrid_free_chars * 100) if ai_config.hybrid_free_chars > 0 else 0
-                    )
-                    result["free_char_usage_percent"] = round(free_char_usage_percent, 1)
+                schedule = AIPricingCalculator.get_pricing_schedule(ai_config_static_name)
+                free_chars = schedule.free_chars if schedule else 0
+                free_char_usage_percent = min(100, (character_count / free_chars * 100) if free_chars > 0 else 0)
+                result["free_char_usage_percent"] = round(free_char_usage_percent, 1)
 
             return Response(result)
 
@@ -308,32 +318,66 @@ class AIPricingViewSet(TainoMobileGenericViewSet):
                     {"success": False, "error": "ai_config_static_name الزامی است"}, status=status.HTTP_400_BAD_REQUEST
                 )
 
-            results = []
-            total_cost = 0
+            result = AIPricingCalculator.batch_preview(
+                user=request.user, ai_config_static_name=ai_config_static_name, messages=messages
+            )
 
-            for i, msg in enumerate(messages, 1):
-                message_text = msg.get("text", "")
-                max_tokens = msg.get("max_tokens")
+            if not result.get("success"):
+                return Response(result, status=status.HTTP_400_BAD_REQUEST)
 
-                char_count = AIPricingCalculator.count_characters(message_text)
+            return Response(result)
 
-                result = AIPricingCalculator.calculate_with_bypass(
-                    user=request.user,
-                    ai_config_static_name=ai_config_static_name,
-                    character_count=char_count,
-                    max_tokens_requested=max_tokens,
-                )
+        except Exception as e:
+            logger.error(f"Error in batch cost preview: {e}")
+            return Response({"success": False, "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-                result["message_index"] = i
-                result["character_count"] = char_count
+    @extend_schema(
+        parameters=[OpenApiParameter(name="ai_config_static_name", type=str, required=False)],
+        responses={
+            200: {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean"},
+                    "version": {"type": "string"},
+                    "schedules": {"type": "array", "items": {"type": "object"}},
+                },
+            }
+        },
+        description="خروجی جدول قیمت کانفیگ‌ها برای محاسبه محلی هزینه در کلاینت",
+    )
+    @action(detail=False, methods=["GET"], url_path="schedules")
+    def export_schedules(self, request):
+        """
+        خروجی جدول‌های قیمت
 
-                if result.get("success") and not result.get("is_free"):
-                    total_cost += result.get("total_cost", 0)
+        Clients price locally with these schedules (see PricingSchedule) and send the schedule
+        ``version`` with the charge request, which is rejected with 409 if the schedule changed.
+        The response carries an ETag, so polling clients get a 304 while nothing changed.
+        """
+        static_name = request.query_params.get("ai_config_static_name")
+        if static_name:
+            static_names = [static_name]
+        else:
+            from apps.ai_chat.models import ChatAIConfig
+
+            static_names = ChatAIConfig.objects.filter(is_active=True).order_by("order", "strength").values_list(
+                "static_name", flat=True
+            )
 
-                results.append(result)
+        schedules = [AIPricingCalculator.get_pricing_schedule(name) for name in static_names]
+        schedules = [schedule for schedule in schedules if schedule is not None]
+        if static_name and not schedules:
+            return Response(
+                {"success": False, "error": "پیکربندی هوش مصنوعی یافت نشد"}, status=status.HTTP_404_NOT_FOUND
+            )
 
-            return Response({"success": True, "messages": results, "total_cost": total_cost, "message_count": len(messages)})
+        version = hashlib.sha1("|".join(schedule.version for schedule in schedules).encode()).hexdigest()[:16]
+        etag = quote_etag(version)
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and etag in parse_etags(if_none_match):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
-        except Exception as e:
-            logger.error(f"Error in batch cost preview: {e}")
-            return Response({"success": False, "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(
+            {"success": True, "version": version, "schedules": [schedule.to_dict() for schedule in schedules]},
+            headers={"ETag": etag},
+        )
@@ -1,7 +1,12 @@
 # apps/ai_chat/api/v1/views.py
+import hashlib
+import json
 import logging
 
-from django.db.models import Sum
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Sum, Prefetch
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import status, serializers
 from rest_framework.response import Response
 from rest_framework.decorators import action
@@ -15,6 +20,7 @@ from apps.ai_chat.models import (
     AISessionStatusEnum,
     GeneralChatAIConfig,
 )
+from apps.ai_chat.services.config_cache import ChatAIConfigCache
 from base_utils.views.mobile import (
     TainoMobileGenericViewSet,
     TainoMobileRetrieveModelMixin,
@@ -31,6 +37,9 @@ from apps.ai_chat.api.v1.serializers import (
 
 logger = logging.getLogger(__name__)
 
+CONFIGS_PAYLOAD_CACHE_PREFIX = "ai_chat:configs_payload"
+CONFIGS_PAYLOAD_CACHE_TTL = 60 * 60  # an hour in seconds
+
 
 class AISessionViewSet(TainoMobileListModelMixin, TainoMobileRetrieveModelMixin, TainoMobileGenericViewSet):
     """ViewSet for AI sessions"""
@@ -94,33 +103,18 @@ class AISessionViewSet(TainoMobileListModelMixin, TainoMobileRetrieveModelMixin,
         """Get AI configuration list with general configs and their related AI configs"""
         general_static_name = request.query_params.get("general_static_name")
 
-        # Get general configs
-        general_configs_query = GeneralChatAIConfig.objects.filter(is_active=True)
-
-        if general_static_name:
-            general_configs_query = general_configs_query.filter(static_name=general_static_name)
-
-        general_configs = general_configs_query.order_by("order")
-
-        # Prepare response data
-        response_data = {
-            "general_configs": GeneralChatAIConfigSerializer(general_configs, many=True).data,
-            "ai_configs_by_general": {},
-        }
+        def build():
+            general_configs = self._get_general_configs_with_ai_configs(general_static_name)
 
-        # Get AI configs for each general config
-        for general_config in general_configs:
-            ai_configs = (
-                ChatAIConfig.objects.filter(general_config=general_config, is_active=True)
-                .select_related("general_config", "related_service")
-                .order_by("order", "strength")
-            )
-
-            response_data["ai_configs_by_general"][str(general_config.pid)] = ChatAIConfigSerializer(
-                ai_configs, many=True
-            ).data
+            return {
+                "general_configs": GeneralChatAIConfigSerializer(general_configs, many=True).data,
+                "ai_configs_by_general": {
+                    str(general_config.pid): ChatAIConfigSerializer(general_config.active_ai_configs, many=True).data
+                    for general_config in general_configs
+                },
+            }
 
-        return Response(response_data)
+        return self._get_cached_configs_response(request, "configs-list", general_static_name, build)
 
     @extend_schema(
         parameters=[
@@ -151,24 +145,8 @@ class AISessionViewSet(TainoMobileListModelMixin, TainoMobileRetrieveModelMixin,
         """Get AI configuration list with nested structure and complete fields"""
         general_static_name = request.query_params.get("general_static_name")
 
-        # Get general configs
-        general_configs_query = GeneralChatAIConfig.objects.filter(is_active=True)
-
-        if general_static_name:
-            general_configs_query = general_configs_query.filter(static_name=general_static_name)
-
-        general_configs = general_configs_query.order_by("order")
-
-        # Build nested response
-        response_data = []
-        for general_config in general_configs:
-            ai_configs = (
-                ChatAIConfig.objects.filter(general_config=general_config, is_active=True)
-                .select_related("general_config", "related_service")
-                .order_by("order", "strength")
-            )
-
-            response_data.append(
+        def build():
+            return [
                 {
                     "pid": str(general_config.pid),
                     "name": general_config.name,
@@ -181,11 +159,59 @@ class AISessionViewSet(TainoMobileListModelMixin, TainoMobileRetrieveModelMixin,
                     "created_at": general_config.created_at,
                     "updated_at": general_config.updated_at,
                     "is_active": general_config.is_active,
-                    "ai_configs": ChatAIConfigSerializer(ai_configs, many=True).data,
+                    "ai_configs": ChatAIConfigSerializer(general_config.active_ai_configs, many=True).data,
                 }
+                for general_config in self._get_general_configs_with_ai_configs(general_static_name)
+            ]
+
+        return self._get_cached_configs_response(request, "configs-nested", general_static_name, build)
+
+    @staticmethod
+    def _get_general_configs_with_ai_configs(general_static_name=None):
+        """
+        Active general configs with their active AI configs prefetched into ``active_ai_configs``.
+        Two queries in total, however many general configs there are; the prefetch also sets each
+        AI config's ``general_config`` back to its (prefetched) parent.
+        """
+        general_configs_query = GeneralChatAIConfig.objects.filter(is_active=True)
+
+        if general_static_name:
+            general_configs_query = general_configs_query.filter(static_name=general_static_name)
+
+        return general_configs_query.order_by("order").prefetch_related(
+            Prefetch(
+                "ai_configs",
+                queryset=ChatAIConfig.objects.filter(is_active=True)
+                .select_related("related_service")
+                .order_by("order", "strength"),
+                to_attr="active_ai_configs",
             )
+        )
+
+    @staticmethod
+    def _get_cached_configs_response(request, endpoint, general_static_name, build):
+        """
+        Serve a config listing from the cache, keyed by the current config generation, so any
+        ChatAIConfig / GeneralChatAIConfig change naturally retires the cached payload.
+        Clients sending a matching If-None-Match get a 304 without a body.
+        """
+        cache_key = (
+            f"{CONFIGS_PAYLOAD_CACHE_PREFIX}:{endpoint}:{ChatAIConfigCache.get_generation()}:{general_static_name or ''}"
+        )
+
+        cached = cache.get(cache_key)
+        if cached is None:
+            payload = build()
+            body = json.dumps(payload, cls=DjangoJSONEncoder, sort_keys=True)
+            cached = {"payload": payload, "etag": quote_etag(hashlib.md5(body.encode()).hexdigest())}
+            cache.set(cache_key, cached, CONFIGS_PAYLOAD_CACHE_TTL)
+
+        etag = cached["etag"]
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == "*"):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
-        return Response(response_data)
+        return Response(cached["payload"], headers={"ETag": etag})
 
     @extend_schema(request=CreateAISessionSerializer, responses={200: AISessionDetailSerializer})
     @action(detail=False, methods=["post"], url_path="create")
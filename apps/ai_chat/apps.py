@@ -7,8 +7,8 @@ class AIChatConfig(AppConfig):
     name = "apps.ai_chat"
     verbose_name = "چت با هوش مصنوعی"
 
-    # def ready(self):
-    #     try:
-    #         import apps.ai_chat.signals
-    #     except ImportError:
-    #         pass
+    def ready(self):
+        try:
+            import apps.ai_chat.cache_signals
+        except ImportError:
+            pass
@@ -0,0 +1,36 @@
+# apps/ai_chat/cache_signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.ai_chat.models import AIMessage, ChatAIConfig, GeneralChatAIConfig
+from apps.ai_chat.services.config_cache import ChatAIConfigCache
+from apps.ai_chat.services.history_snapshot import AIMessageHistorySnapshot
+from apps.soft_delete.signals import post_restore
+from base_utils.facades.ai_clients import AIClientRegistry
+
+# Cache invalidation receivers. Kept apart from apps.ai_chat.signals, whose MongoDB sync receivers
+# are not connected.
+
+
+@receiver([post_save, post_delete, post_restore], sender=AIMessage)
+def invalidate_ai_history_snapshot(sender, instance, **kwargs):
+    """Retire the cached history frame of the message's session once the change is committed"""
+    session_pk = instance.ai_session_id
+    transaction.on_commit(lambda: AIMessageHistorySnapshot.invalidate(session_pk))
+
+
+@receiver([post_save, post_delete], sender=ChatAIConfig)
+def invalidate_ai_clients(sender, instance, **kwargs):
+    """
+    Drop pooled AI clients built from this config (api_key / base_url may have changed)
+    """
+    AIClientRegistry.invalidate_tag(AIClientRegistry.tag_for(instance))
+
+
+@receiver([post_save, post_delete], sender=ChatAIConfig)
+@receiver([post_save, post_delete], sender=GeneralChatAIConfig)
+def invalidate_ai_config_cache(sender, instance, **kwargs):
+    """Invalidate cached AI configs in every process, once the change is committed"""
+    # Before commit a concurrent reader could cache the old row again under the new generation
+    transaction.on_commit(ChatAIConfigCache.invalidate)
@@ -1,14 +1,20 @@
 # apps/ai_chat/consumers/base.py
+import asyncio
 import json
 import logging
+import time
+import uuid
 from datetime import datetime
 from typing import Dict, Any, Optional
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
 from apps.ai_chat.models import AISession, AIMessage
+from apps.ai_chat.services.history_snapshot import AIMessageHistorySnapshot
+from base_utils.facades.ai_response_supervisor import AIResponseSupervisor
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -56,6 +62,9 @@ class BaseTainoAIAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
 
     async def disconnect(self, close_code):
         """Disconnect from WebSocket"""
+        if getattr(settings, "AI_RESPONSE_CANCEL_ON_DISCONNECT", True):
+            AIResponseSupervisor.get_default().cancel_owner(self.channel_name)
+
         if self.room_group_name:
             await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
 
@@ -87,6 +96,10 @@ class BaseTainoAIAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
         """Send message to WebSocket"""
         await self.send_json(event)
 
+    async def ai_chat_delta(self, event):
+        """Send streamed AI response chunk to WebSocket"""
+        await self.send_json(event)
+
     async def user_typing(self, event):
         """Send typing status to WebSocket"""
         await self.send_json(event)
@@ -117,18 +130,12 @@ class BaseTainoAIAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
         self.ai_session.mark_all_read()
 
     @database_sync_to_async
-    def get_recent_messages(self, limit=20) -> list:
-        """Get recent messages for the AI session"""
+    def get_history_payload(self) -> Optional[str]:
+        """Encoded history frame with the recent messages of the session"""
         if not self.ai_session:
-            return []
-
-        messages = (
-            AIMessage.objects.filter(ai_session=self.ai_session, is_deleted=False)
-            .select_related("sender")
-            .order_by("-created_at")[:limit]
-        )
+            return None
 
-        return list(reversed(messages))
+        return AIMessageHistorySnapshot.get_payload(self.ai_session.pk)
 
     @database_sync_to_async
     def create_message(self, content) -> Optional[AIMessage]:
@@ -150,6 +157,7 @@ class BaseTainoAIAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
 
         if self.user != self.ai_session.user:
             return None
+        pre_charge = 0
         try:
             message_text = content.get("message", "").strip()
             message_type = content.get("message_type", "text")
@@ -209,6 +217,9 @@ class BaseTainoAIAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
                         logger.error(f"Pre-charge failed: {message}")
                         return None
 
+                    if not details.get("is_free"):
+                        pre_charge = details.get("charged_amount", 0)
+
                     # ذخیره اطلاعات هزینه
                     cost_breakdown = details
                     self.ai_session.add_hybrid_usage(
@@ -244,6 +255,8 @@ class BaseTainoAIAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
                 message_type=message_type,
                 # attachment=attachment,
             )
+            # Refunded by refund_pre_charge if the AI never gets to answer it
+            message.pre_charge = pre_charge
 
             return message
 
@@ -252,26 +265,27 @@ class BaseTainoAIAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
             return None
 
     async def send_recent_messages(self):
-        """Send recent messages to the client"""
-        messages = await self.get_recent_messages()
+        """Send recent messages to the client, as one history frame shared by every connecting socket"""
+        payload = await self.get_history_payload()
+        if payload is None:
+            return
 
-        for message in messages:
-            await self.send_json(
-                {
-                    "type": "ai_chat.message",
-                    "id": str(message.pid),
-                    "sender": str(message.sender.pid),
-                    "sender_name": f"{message.sender.first_name} {message.sender.last_name}",
-                    "message": message.content,
-                    "message_type": message.message_type,
-                    "timestamp": message.created_at.isoformat(),
-                    "is_ai": message.is_ai,
-                    "is_system": message.is_system,
-                }
-            )
+        if AIMessageHistorySnapshot.is_requested(self.scope):
+            await self.send(text_data=payload)
+            return
+
+        # Clients that still expect one frame per message
+        for message in json.loads(payload)["messages"]:
+            await self.send_json(message)
 
     async def handle_chat_message(self, content):
         """Handle chat message"""
+        # Refuse before the message is created and charged if it could not be answered
+        status = AIResponseSupervisor.get_default().admission_status(self.user.pk, self.session_id)
+        if AIResponseSupervisor.get_default().is_refused(status):
+            await self.send_ai_busy(status, content)
+            return
+
         message = await self.create_message(content)
 
         if not message:
@@ -326,8 +340,88 @@ class BaseTainoAIAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
         )
 
     async def process_ai_response(self, user_message):
-        """Process AI response for AI chat"""
-        # Send typing indicator immediately
+        """
+        Process AI response for AI chat, as a task of the per-process AI response supervisor
+
+        The message was pre-charged by ``create_message``: the charge is refunded when the response
+        is refused, times out in the queue or is cancelled (disconnect) before its reply was stored.
+        """
+
+        async def respond():
+            await self._generate_ai_response(user_message)
+
+        async def on_timeout():
+            await self.refund_pre_charge(user_message, "timeout")
+            await self.send_ai_busy("timeout")
+
+        def on_done(task):
+            if task.cancelled() and not getattr(user_message, "answered", False):
+                asyncio.ensure_future(self.refund_pre_charge(user_message, "cancelled"))
+
+        task, status = AIResponseSupervisor.get_default().submit(
+            respond,
+            owner=self.channel_name,
+            user=self.user.pk,
+            session=self.session_id,
+            on_timeout=on_timeout,
+        )
+
+        if task is None:
+            await self.refund_pre_charge(user_message, status)
+        else:
+            task.add_done_callback(on_done)
+
+        if status != AIResponseSupervisor.STARTED:
+            await self.send_ai_busy(status)
+
+    async def refund_pre_charge(self, user_message, reason):
+        """Give back the pre-charge of a message the AI never answered (at most once per message)"""
+        amount, user_message.pre_charge = getattr(user_message, "pre_charge", 0), 0
+        if not amount:
+            return
+
+        try:
+            await self._refund_coins(user_message, amount, reason)
+        except Exception as e:
+            logger.error(f"Error refunding pre-charge of message {user_message.pid}: {e}", exc_info=True)
+
+    @database_sync_to_async
+    def _refund_coins(self, user_message, amount, reason):
+        from apps.wallet.services.wallet import WalletService
+
+        WalletService.refund_coins(
+            user=self.user,
+            coin_amount=amount,
+            reference_id=f"ai_refund_{user_message.pid}",
+            description=f"بازگشت هزینه پیام بدون پاسخ هوش مصنوعی ({reason})",
+        )
+        logger.info(f"Refunded pre-charge of {amount} for message {user_message.pid}: {reason}")
+
+    async def send_ai_busy(self, status, original_content=None):
+        """Tell this client its message is queued, or that the AI can't take it right now"""
+        queued = status == AIResponseSupervisor.QUEUED
+        frame = {
+            "type": "ai_chat.busy",
+            "status": status,
+            "queued": queued,
+            "message": (
+                "پیام شما در صف پاسخگویی قرار گرفت."
+                if queued
+                else "هوش مصنوعی در حال حاضر مشغول است. لطفاً چند لحظه دیگر دوباره تلاش کنید."
+            ),
+            "timestamp": timezone.now().isoformat(),
+        }
+        if original_content is not None:
+            frame["original_content"] = original_content
+        await self.send_json(frame)
+
+    async def _generate_ai_response(self, user_message):
+        """Background task to generate AI response"""
+        from apps.ai_chat.services.ai_service import ChatBackendAIService
+
+        stream_id = None
+
+        # Typing starts once the response has a slot, not while it waits in the queue
         await self.channel_layer.group_send(
             self.room_group_name,
             {
@@ -338,27 +432,27 @@ class BaseTainoAIAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
             },
         )
 
-        # Import asyncio to create background task
-        import asyncio
-
-        # Create background task for AI response generation
-        asyncio.create_task(self._generate_ai_response(user_message))
-
-    async def _generate_ai_response(self, user_message):
-        """Background task to generate AI response"""
-        from apps.ai_chat.services.ai_service import ChatBackendAIService
-
         try:
             # Generate AI response
-            ai_message = await ChatBackendAIService.generate_response(ai_session=self.ai_session, user_message=user_message)
+            if getattr(settings, "AI_CHAT_STREAMING_ENABLED", False):
+                stream_id = uuid.uuid4().hex
+                ai_message = await self._generate_streamed_ai_response(user_message, stream_id)
+            else:
+                ai_message = await ChatBackendAIService.generate_response(
+                    ai_session=self.ai_session, user_message=user_message
+                )
 
             if ai_message:
+                # The reply is stored, a later cancel (disconnect) no longer refunds the pre-charge
+                user_message.answered = True
+
                 # Send the AI response
                 await self.channel_layer.group_send(
                     self.room_group_name,
                     {
                         "type": "ai_chat.message",
                         "id": str(ai_message.pid),
+                        "stream_id": stream_id,
                         "sender": "ai",
                         "sender_name": "هوش مصنوعی",
                         "message": ai_message.content,
@@ -423,3 +517,56 @@ class BaseTainoAIAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
                 )
             except Exception as e:
                 logger.error(f"Error stopping typing indicator: {e}")
+
+    async def _generate_streamed_ai_response(self, user_message, stream_id):
+        """
+        Generate AI response in streaming mode, fanning out ``ai_chat.delta`` frames to the group.
+
+        Deltas are buffered and flushed by size or age, so a long answer costs a few dozen
+        channel layer publishes instead of one per token. The closing ``ai_chat.message`` frame
+        carries the same ``stream_id`` so clients can swap the streamed text for the stored message.
+        """
+        from apps.ai_chat.services.ai_service import ChatBackendAIService
+
+        flush_chars = getattr(settings, "AI_CHAT_STREAM_FLUSH_CHARS", 64)
+        flush_interval = getattr(settings, "AI_CHAT_STREAM_FLUSH_INTERVAL_MS", 80) / 1000
+        buffer = []
+        state = {"seq": 0, "buffered_chars": 0, "last_flush": time.monotonic()}
+
+        async def flush():
+            if not buffer:
+                return
+            delta = "".join(buffer)
+            buffer.clear()
+            state["buffered_chars"] = 0
+            state["last_flush"] = time.monotonic()
+            await self.channel_layer.group_send(
+                self.room_group_name,
+                {
+                    "type": "ai_chat.delta",
+                    "stream_id": stream_id,
+                    "seq": state["seq"],
+                    "delta": delta,
+                    "sender": "ai",
+                    "timestamp": timezone.now().isoformat(),
+                },
+            )
+            state["seq"] += 1
+
+        async def on_delta(delta):
+            buffer.append(delta)
+            state["buffered_chars"] += len(delta)
+            # Always flush the first chunk right away: time-to-first-token is what the user sees
+            if (
+                state["seq"] == 0
+                or state["buffered_chars"] >= flush_chars
+                or time.monotonic() - state["last_flush"] >= flush_interval
+            ):
+                await flush()
+
+        ai_message = await ChatBackendAIService.generate_response_stream(
+            ai_session=self.ai_session, user_message=user_message, on_delta=on_delta
+        )
+        await flush()
+
+        return ai_message
@@ -0,0 +1,85 @@
+# apps/ai_chat/management/commands/benchmark_pricing_trace.py
+import logging
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ai_chat.models import ChatAIConfig
+from apps.ai_chat.services.ai_pricing_calculator import AIPricingCalculator
+from base_utils.log.tracing import Tracing
+
+
+class Command(BaseCommand):
+    help = "Measure the per-call overhead of debug tracing on the AI pricing path"
+
+    def add_arguments(self, parser):
+        parser.add_argument("config", type=str, help="static_name of an active ChatAIConfig")
+        parser.add_argument("--iterations", type=int, default=5000)
+        parser.add_argument("--characters", type=int, default=2500)
+        parser.add_argument("--max-tokens", type=int, default=None)
+        parser.add_argument("--voice-seconds", type=int, default=90)
+        parser.add_argument("--sample-rate", type=float, default=0.01, help="sample rate of the sampled run")
+
+    def handle(self, *args, **options):
+        config = ChatAIConfig.objects.filter(static_name=options["config"], is_active=True).first()
+        if not config:
+            raise CommandError("AI config not found")
+        user = get_user_model().objects.filter(is_active=True).first()
+        if not user:
+            raise CommandError("No active users")
+
+        max_tokens = options["max_tokens"] or config.hybrid_tokens_max or None
+        iterations = options["iterations"]
+
+        def complete_cost():
+            AIPricingCalculator.calculate_complete_cost(
+                user,
+                config.static_name,
+                options["characters"],
+                max_tokens_requested=max_tokens,
+                voice_duration_seconds=options["voice_seconds"],
+            )
+
+        def hybrid_cost():
+            config.calculate_advanced_hybrid_cost(options["characters"], max_tokens or 0)
+
+        benchmarks = [("calculate_complete_cost", complete_cost)]
+        if config.is_advanced_hybrid_pricing():
+            benchmarks.append(("calculate_advanced_hybrid_cost", hybrid_cost))
+
+        # Emitted events go to /dev/null through a flushing handler, the cost of the old print(..., flush=True)
+        trace_logger = logging.getLogger("trace")
+        previous = dict(Tracing.get_modules()), trace_logger.level, trace_logger.propagate, trace_logger.handlers
+        devnull = open(os.devnull, "w")
+        trace_logger.handlers = [logging.StreamHandler(devnull)]
+        trace_logger.setLevel(logging.INFO)
+        trace_logger.propagate = False
+
+        modes = [
+            ("disabled", {}),
+            (f"sampled {options['sample_rate']:g}", {"*": options["sample_rate"]}),
+            ("every event", {"*": 1.0}),
+        ]
+        try:
+            for name, call in benchmarks:
+                # Warm the config cache and pricing schedule
+                call()
+                baseline = None
+                for mode, modules in modes:
+                    Tracing.configure(modules)
+                    started = time.perf_counter()
+                    for _ in range(iterations):
+                        call()
+                    per_call = (time.perf_counter() - started) / iterations * 1e6
+                    baseline = per_call if baseline is None else baseline
+                    self.stdout.write(
+                        f"{name} [{mode}]: {per_call:.1f}us per call ({per_call - baseline:+.1f}us vs disabled)"
+                    )
+        finally:
+            modules, trace_logger.level, trace_logger.propagate, trace_logger.handlers = previous
+            Tracing.configure(modules)
+            devnull.close()
+
+        self.stdout.write(self.style.SUCCESS("Benchmark finished"))
@@ -69,7 +69,8 @@ class AIMessage(TimeStampModel, ActivableModel, AdminStatusModel):
         verbose_name_plural = _("پیام‌های هوش مصنوعی")
         ordering = ["created_at"]
         indexes = [
-            models.Index(fields=["ai_session"]),
+            # Also serves plain ai_session lookups; the keyset pagination of the history walks it
+            models.Index(fields=["ai_session", "created_at", "id"]),
             models.Index(fields=["sender"]),
             models.Index(fields=["message_type"]),
             models.Index(fields=["is_read"]),
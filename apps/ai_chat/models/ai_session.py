@@ -1,7 +1,8 @@
 # apps/ai_chat/models/ai_session.py
 
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 
@@ -135,6 +136,7 @@ class AISession(TimeStampModel, BoundaryDateModel, ActivableModel, AdminStatusMo
             self.readonly_reason = "max_messages_reached"
             self.status = AISessionStatusEnum.COMPLETED
             self.save()
+            self.release_charge_hold()
             return True, "حداکثر تعداد پیام‌ها"
 
         # بررسی محدودیت توکن
@@ -143,10 +145,17 @@ class AISession(TimeStampModel, BoundaryDateModel, ActivableModel, AdminStatusMo
             self.readonly_reason = "max_tokens_reached"
             self.status = AISessionStatusEnum.COMPLETED
             self.save()
+            self.release_charge_hold()
             return True, "حداکثر تعداد توکن‌ها"
 
         return False, None
 
+    def release_charge_hold(self):
+        """Settle the aggregated message charges of a closed session and refund the unused coins"""
+        from apps.ai_chat.services.charge_aggregation import AIChargeAggregator
+
+        transaction.on_commit(lambda: AIChargeAggregator.release_session(self))
+
     def add_message_based_cost(self, cost: float):
         """
         افزودن هزینه پیام‌محور
@@ -156,7 +165,10 @@ class AISession(TimeStampModel, BoundaryDateModel, ActivableModel, AdminStatusMo
         Args:
             cost: هزینه به سکه
         """
-        self.add_message_based_cost(cost)
+        # Atomic increment so concurrent charges of the same session do not overwrite each other
+        cost = Decimal(str(cost))
+        AISession.objects.filter(pk=self.pk).update(total_cost_coins=F("total_cost_coins") + cost)
+        self.total_cost_coins += cost
 
     def add_hybrid_usage(self, character_count: int, input_tokens: int, output_tokens: int, cost_breakdown: dict):
         """
@@ -12,9 +12,11 @@ from base_utils.base_models import (
     CreatorModel,
     StaticalIdentifier,
 )
+from base_utils.log.tracing import Tracing
 from base_utils.numbers import safe_decimal_to_float
 
 logger = logging.getLogger(__name__)
+trace = Tracing.get_tracer(__name__)
 
 
 class AIStrengthEnum(models.TextChoices):
@@ -237,6 +239,11 @@ class ChatAIConfig(TimeStampModel, ActivableModel, AdminStatusModel, CreatorMode
 
     def get_combined_system_prompt(self):
         """ترکیب پرامپت سیستمی کلی با پرامپت اختصاصی"""
+        # Precomputed by ChatAIConfigCache
+        precomputed = self.__dict__.get("_combined_system_prompt")
+        if precomputed is not None:
+            return precomputed
+
         general_instruction = self.general_config.system_instruction
         specific_prompt = self.system_prompt
         return f"{general_instruction}\n\n{specific_prompt}"
@@ -289,16 +296,7 @@ class ChatAIConfig(TimeStampModel, ActivableModel, AdminStatusModel, CreatorMode
         Returns:
             dict با جزئیات محاسبات هزینه
         """
-        print(
-            f"🚀 Starting advanced hybrid cost calculation - config_id={self.id}, config_name='{self.name}', character_count={character_count}, max_tokens_requested={max_tokens_requested}, pricing_type={self.pricing_type}",
-            flush=True,
-        )
-
         if not self.is_advanced_hybrid_pricing():
-            print(
-                f"⚠️ Invalid pricing type for advanced hybrid calculation - config_id={self.id}, expected_type={PricingTypeEnum.ADVANCED_HYBRID}, actual_type={self.pricing_type}",
-                flush=True,
-            )
             return {"pricing_type": "not_advanced_hybrid", "error": "این کانفیگ از قیمت‌گذاری هیبریدی پیشرفته استفاده نمی‌کند"}
 
         result = {
@@ -321,11 +319,6 @@ class ChatAIConfig(TimeStampModel, ActivableModel, AdminStatusModel, CreatorMode
         # ─────────────────────────────────────────────────────────
         # محاسبه هزینه بر اساس کاراکتر
         # ─────────────────────────────────────────────────────────
-        print(
-            f"📊 Calculating character-based cost - character_count={character_count}, hybrid_free_chars={self.hybrid_free_chars}, hybrid_char_per_coin={self.hybrid_char_per_coin}",
-            flush=True,
-        )
-
         if character_count > self.hybrid_free_chars:
             # کاراکترهای قابل محاسبه (بعد از رایگان)
             billable_chars = character_count - self.hybrid_free_chars
@@ -339,35 +332,18 @@ class ChatAIConfig(TimeStampModel, ActivableModel, AdminStatusModel, CreatorMode
 
             char_cost_rounded = math.ceil(char_coins_needed)
             result["char_cost"] = float(char_cost_rounded)
-
-            print(
-                f"💳 Character cost calculated - billable_chars={billable_chars}, char_coins_needed={char_coins_needed:.2f}, char_cost_rounded={char_cost_rounded}, final_char_cost={result['char_cost']}",
-                flush=True,
-            )
         else:
             result["free_chars_used"] = character_count
-            print(f"🆓 Character cost: Free tier applied - free_chars_used={character_count}", flush=True)
 
         # ─────────────────────────────────────────────────────────
         # محاسبه هزینه بر اساس استپ max_tokens
         # ─────────────────────────────────────────────────────────
-        print(
-            f"🔢 Calculating token step-based cost - original_max_tokens={max_tokens_requested}, hybrid_tokens_min={self.hybrid_tokens_min}, hybrid_tokens_max={self.hybrid_tokens_max}, hybrid_tokens_step={self.hybrid_tokens_step}, hybrid_cost_per_step={safe_decimal_to_float(self.hybrid_cost_per_step)}",
-            flush=True,
-        )
-
         # ابتدا بررسی محدوده
         original_tokens = max_tokens_requested
         if max_tokens_requested < self.hybrid_tokens_min:
             max_tokens_requested = self.hybrid_tokens_min
-            print(
-                f"📏 Max tokens adjusted to minimum - original={original_tokens}, adjusted={max_tokens_requested}", flush=True
-            )
         elif max_tokens_requested > self.hybrid_tokens_max:
             max_tokens_requested = self.hybrid_tokens_max
-            print(
-                f"📏 Max tokens adjusted to maximum - original={original_tokens}, adjusted={max_tokens_requested}", flush=True
-            )
 
         result["max_tokens_requested"] = max_tokens_requested
 
@@ -381,27 +357,21 @@ class ChatAIConfig(TimeStampModel, ActivableModel, AdminStatusModel, CreatorMode
             result["num_steps"] = num_steps
             result["step_cost"] = float(Decimal(str(num_steps)) * self.hybrid_cost_per_step)
 
-            print(
-                f"🎯 Step cost calculated - tokens_above_min={tokens_above_min}, num_steps={num_steps}, step_cost={result['step_cost']}",
-                flush=True,
-            )
-        else:
-            print(
-                f"🎯 No step cost applied (at minimum tokens) - tokens_above_min={tokens_above_min}, step_cost=0", flush=True
-            )
-
         # ─────────────────────────────────────────────────────────
         # محاسبه مجموع
         # ─────────────────────────────────────────────────────────
         result["total_cost"] = result["base_cost"] + result["char_cost"] + result["step_cost"]
 
-        print(
-            f"✅ Advanced hybrid cost calculation completed - config_id={self.id}, base_cost={result['base_cost']}, char_cost={result['char_cost']}, step_cost={result['step_cost']}, total_cost={result['total_cost']}",
-            flush=True,
-        )
-        print(
-            f"📋 Final breakdown - base: {result['base_cost']}, character: {result['char_cost']}, steps: {result['step_cost']}, total: {result['total_cost']}",
-            flush=True,
+        trace.event(
+            "advanced_hybrid_cost",
+            config_id=self.id,
+            character_count=character_count,
+            max_tokens=original_tokens,
+            adjusted_max_tokens=max_tokens_requested,
+            base_cost=result["base_cost"],
+            char_cost=result["char_cost"],
+            step_cost=result["step_cost"],
+            total_cost=result["total_cost"],
         )
 
         return result
@@ -53,13 +53,13 @@ class AIChatService(AbstractBaseService):
         Create a new AI chat session
         """
         try:
-            from apps.ai_chat.models import ChatAIConfig
+            from apps.ai_chat.services.config_cache import ChatAIConfigCache
 
             # Get AI config
-            ai_config = ChatAIConfig.objects.filter(static_name=ai_type, is_active=True).first()
+            ai_config = ChatAIConfigCache.get_by_static_name(ai_type)
 
             if not ai_config:
-                ai_config = ChatAIConfig.objects.filter(is_active=True, is_default=True).first()
+                ai_config = ChatAIConfigCache.get_default()
 
             if not ai_config:
                 logger.error("No active AI configuration found")
@@ -201,6 +201,7 @@ class AIChatService(AbstractBaseService):
         ai_session.end_date = end_date
         ai_session.status = AISessionStatusEnum.COMPLETED
         ai_session.save()
+        ai_session.release_charge_hold()
 
         # Create end message
         end_message = f"جلسه گفتگو با هوش مصنوعی پایان یافت."
@@ -1,15 +1,18 @@
 # apps/chat/services/ai_service.py
 import logging
 
-from typing import Optional, List, Dict, Any
-from openai import AsyncOpenAI
+from typing import Optional, List, Dict, Any, Awaitable, Callable
 from channels.db import database_sync_to_async
 
+from django.db import transaction
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 from apps.ai_chat.models import AISession, AIMessage, ChatAIConfig, AIMessageTypeEnum
+from apps.ai_chat.services.charge_aggregation import AIChargeAggregator
+from apps.ai_chat.services.config_cache import ChatAIConfigCache
 from apps.ai_chat.services.transaction_tracking import AITransactionTracker
+from base_utils.facades.ai_clients import AIClientRegistry
 from base_utils.services import AbstractBaseService
 
 User = get_user_model()
@@ -101,43 +104,7 @@ class ChatBackendAIService(AbstractBaseService):
     @staticmethod
     @database_sync_to_async
     def get_default_ai_config() -> Optional[ChatAIConfig]:
-        return ChatAIConfig.objects.filter(is_active=True, is_default=True).first()
-
-    @staticmethod
-    @database_sync_to_async
-    def check_session_readonly(ai_session):
-        """Check if session is readonly - wrapped for async"""
-        return ai_session.check_and_update_readonly()
-
-    @staticmethod
-    @database_sync_to_async
-    def get_ai_config_data(ai_session):
-        """Get AI config data safely for async context"""
-        if not ai_session.ai_config:
-            return None
-
-        # Access all needed attributes in sync context
-        return {
-            "pid": ai_session.ai_config.pid,
-            "static_name": ai_session.ai_config.static_name,
-            "name": ai_session.ai_config.name,
-            "model_name": ai_session.ai_config.model_name,
-            "api_key": ai_session.ai_config.api_key,
-            "base_url": ai_session.ai_config.base_url,
-            "default_temperature": ai_session.ai_config.default_temperature,
-            "default_max_tokens": ai_session.ai_config.default_max_tokens,
-            "combined_system_prompt": ai_session.ai_config.get_combined_system_prompt(),
-        }
-
-    @staticmethod
-    @database_sync_to_async
-    def get_session_parameters(ai_session):
-        """Get session-specific parameters"""
-        return {
-            "temperature": ai_session.temperature,
-            "max_tokens": ai_session.max_tokens,
-            "ai_context": ai_session.ai_context,
-        }
+        return ChatAIConfigCache.get_default()
 
     @staticmethod
     @database_sync_to_async
@@ -148,42 +115,6 @@ class ChatBackendAIService(AbstractBaseService):
         ai_session.ai_context["usage"] = usage
         ai_session.save(update_fields=["ai_context"])
 
-    @staticmethod
-    @database_sync_to_async
-    def get_previous_messages(ai_session: AISession, user_message: AIMessage) -> list:
-        """
-        Get previous messages with sender info, safely for async context.
-        """
-        # Get at most the last 10 messages in chronological order (oldest first)
-        messages = (
-            AIMessage.objects.filter(ai_session=ai_session, created_at__lt=user_message.created_at)
-            .select_related("sender")  # avoids lazy loading
-            .order_by("-created_at")[:10]  # Get last 10 messages in reverse order
-        )
-
-        # Ctainoert to list and reverse to get chronological order
-        message_list = list(reversed(messages))
-
-        result = []
-        for msg in message_list:
-            # Determine message role based on sender
-            if msg.is_ai:
-                role = "assistant"
-            elif msg.is_system:
-                role = "system"
-            else:
-                role = "user"
-
-            result.append({"role": role, "content": msg.content})
-
-        # Add the current user message
-        result.append({"role": "user", "content": user_message.content})
-
-        # Log the message structure
-        logger.info(f"Message sequence before formatting: {[msg['role'] for msg in result]}")
-
-        return result
-
     @staticmethod
     @database_sync_to_async
     def get_ai_config_from_session(ai_session: AISession) -> Optional[ChatAIConfig]:
@@ -193,12 +124,12 @@ class ChatBackendAIService(AbstractBaseService):
         if ai_session.ai_context and "chat_type" in ai_session.ai_context:
             chat_type = ai_session.ai_context.get("chat_type")
             # Try to get config by static_name
-            config = ChatAIConfig.objects.filter(static_name=chat_type, is_active=True).first()
+            config = ChatAIConfigCache.get_by_static_name(chat_type)
             if config:
                 return config
 
         # Fallback to default config
-        return ChatAIConfig.objects.filter(is_active=True, is_default=True).first()
+        return ChatAIConfigCache.get_default()
 
     @staticmethod
     @database_sync_to_async
@@ -215,144 +146,287 @@ class ChatBackendAIService(AbstractBaseService):
 
     @staticmethod
     @database_sync_to_async
-    def add_token_usage_to_session(ai_session, prompt_tokens, completion_tokens):
-        """Add token usage to session"""
-        ai_session.add_token_usage(prompt_tokens, completion_tokens)
+    def load_turn_context(ai_session: AISession, user_message: AIMessage, history_limit: int = 10) -> dict:
+        """
+        Load everything a reply needs in a single sync hop.
 
-    @staticmethod
-    @database_sync_to_async
-    def charge_for_tokens(ai_session, input_tokens, output_tokens):
-        """Charge user for token usage"""
-        ChatBackendAIService._charge_for_tokens_v2(ai_session, input_tokens, output_tokens)
+        Session config (joined with its general config), readonly state, pre-charge validation
+        against a fresh wallet balance and the recent history are all resolved here, instead of
+        one database_sync_to_async round-trip per step.
 
-    @staticmethod
-    async def generate_response(
-        ai_session: AISession,
-        user_message: AIMessage,
-    ) -> Optional[AIMessage]:
-        """Generate AI response using OpenAI-compatible API with both pricing types"""
+        Returns:
+            dict: either {"early_message": AIMessage} when the turn must stop (readonly session,
+            failed validation), {} when the session has no AI config, or the request context
+            ({"ai_config_data", "messages", "temperature", "max_tokens"}).
+        """
+        from apps.wallet.models import Wallet
+
+        # Config + general config in one joined query (skipped when already cached on the instance)
+        if ai_session.ai_config_id and not AISession._meta.get_field("ai_config").is_cached(ai_session):
+            ai_session.ai_config = (
+                ChatAIConfig.objects.select_related("general_config").filter(pk=ai_session.ai_config_id).first()
+            )
 
         # Check if session is readonly
-        is_readonly, reason = await ChatBackendAIService.check_session_readonly(ai_session)
+        is_readonly, reason = ai_session.check_and_update_readonly()
         if is_readonly:
-            error_msg = f"این چت به حداکثر محدودیت خود رسیده است: {reason}"
-            return await ChatBackendAIService.create_ai_message(
+            early_message = AIMessage.objects.create(
                 ai_session=ai_session,
-                content=error_msg,
+                sender=ai_session.user,
+                content=f"این چت به حداکثر محدودیت خود رسیده است: {reason}",
                 message_type=AIMessageTypeEnum.TEXT,
                 is_ai=True,
                 is_system=True,
             )
+            return {"early_message": early_message}
 
-        # Get AI config data
-        ai_config_data = await ChatBackendAIService.get_ai_config_data(ai_session)
-        if not ai_config_data:
+        ai_config = ai_session.ai_config
+        if not ai_config:
             logger.error("No AI configuration found for session")
-            return None
+            return {}
 
-        try:
-            # PRE-CHARGE VALIDATION
-            is_valid, error_msg = await database_sync_to_async(AITransactionTracker.pre_charge_validation)(
-                ai_session, str(user_message.pid)
+        # PRE-CHARGE VALIDATION (balance read fresh, it changes between turns)
+        coin_balance = None
+        if ai_config.is_message_based_pricing() and ai_config.cost_per_message > 0:
+            coin_balance = (
+                Wallet.objects.filter(user_id=ai_session.user_id).values_list("coin_balance", flat=True).first() or 0
             )
+            if AIChargeAggregator.is_enabled():
+                # Coins already reserved for this session are no longer in the wallet balance
+                coin_balance += AIChargeAggregator.available(ai_session)
 
-            if not is_valid:
-                logger.error(f"Pre-charge validation failed: {error_msg}")
-                return await ChatBackendAIService.create_ai_message(
-                    ai_session=ai_session,
-                    content=f"خطا: {error_msg}",
-                    message_type=AIMessageTypeEnum.TEXT,
-                    is_ai=True,
-                    is_system=True,
-                )
-
-            # Get ctainoersation history
-            previous_messages = await ChatBackendAIService.get_previous_messages(ai_session, user_message)
-
-            # Get combined system prompt
-            combined_prompt = ai_config_data["combined_system_prompt"]
+        is_valid, error_msg = AITransactionTracker.pre_charge_validation(
+            ai_session, str(user_message.pid), coin_balance=coin_balance
+        )
+        if not is_valid:
+            logger.error(f"Pre-charge validation failed: {error_msg}")
+            early_message = AIMessage.objects.create(
+                ai_session=ai_session,
+                sender=ai_session.user,
+                content=f"خطا: {error_msg}",
+                message_type=AIMessageTypeEnum.TEXT,
+                is_ai=True,
+                is_system=True,
+            )
+            return {"early_message": early_message}
 
-            # Format messages
-            formatted_messages = [{"role": "system", "content": combined_prompt}]
-            formatted_messages.extend(previous_messages)
-            formatted_messages = ChatBackendAIService.format_messages(formatted_messages)
+        # Get ctainoersation history (only the columns needed to build the prompt)
+        history = (
+            AIMessage.objects.filter(ai_session=ai_session, created_at__lt=user_message.created_at)
+            .order_by("-created_at")
+            .values_list("content", "is_ai", "is_system")[:history_limit]
+        )
 
-            # Get session parameters
-            session_params = await ChatBackendAIService.get_session_parameters(ai_session)
-            temperature = session_params["temperature"] or ai_config_data["default_temperature"]
-            max_tokens = session_params["max_tokens"] or ai_config_data["default_max_tokens"]
+        previous_messages = []
+        for content, is_ai, is_system in reversed(history):
+            if is_ai:
+                role = "assistant"
+            elif is_system:
+                role = "system"
+            else:
+                role = "user"
+            previous_messages.append({"role": role, "content": content})
 
-            # Set up client
-            client = AsyncOpenAI(
-                api_key=ai_config_data["api_key"],
-                base_url=ai_config_data["base_url"] or "https://api.deepseek.com/v1",
-            )
+        previous_messages.append({"role": "user", "content": user_message.content})
 
-            # Call API
-            response = await client.chat.completions.create(
-                model=ai_config_data["model_name"],
-                messages=formatted_messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
+        # Format messages
+        formatted_messages = [{"role": "system", "content": ai_config.get_combined_system_prompt()}]
+        formatted_messages.extend(previous_messages)
+        formatted_messages = ChatBackendAIService.format_messages(formatted_messages)
 
-            # Extract response and usage
-            ai_response = response.choices[0].message.content.strip()
-            usage = response.usage
+        return {
+            "ai_config_data": {
+                "pid": ai_config.pid,
+                "static_name": ai_config.static_name,
+                "name": ai_config.name,
+                "model_name": ai_config.model_name,
+                "api_key": ai_config.api_key,
+                "base_url": ai_config.base_url,
+                "client_tag": AIClientRegistry.tag_for(ai_config),
+            },
+            "messages": formatted_messages,
+            "temperature": ai_session.temperature or ai_config.default_temperature,
+            "max_tokens": ai_session.max_tokens or ai_config.default_max_tokens,
+        }
 
+    @staticmethod
+    @database_sync_to_async
+    def commit_turn(ai_session: AISession, ai_response: str, prompt_tokens: int, completion_tokens: int) -> AIMessage:
+        """
+        Persist the AI reply, its token usage, the session counters and the charge in one
+        sync hop and one database transaction.
+        """
+        with transaction.atomic():
             # Create AI message FIRST (so we have the message PID)
-            ai_message = await ChatBackendAIService.create_ai_message(
+            ai_message = AIMessage.objects.create(
                 ai_session=ai_session,
+                sender=ai_session.user,
                 content=ai_response,
                 message_type=AIMessageTypeEnum.TEXT,
                 is_ai=True,
             )
 
             # Update token usage (for tracking, even in message-based pricing)
-            await ChatBackendAIService.add_token_usage_to_session(ai_session, usage.prompt_tokens, usage.completion_tokens)
+            ai_session.add_token_usage(prompt_tokens, completion_tokens)
 
             # CHARGE USER WITH TRANSACTION TRACKING
             if ai_session.ai_config.is_message_based_pricing():
                 # Message-based: charge fixed amount
-                cost = float(ai_session.ai_config.cost_per_message)
-
-                transaction_info = await database_sync_to_async(AITransactionTracker.record_message_charge)(
+                transaction_info = AITransactionTracker.record_message_charge(
                     ai_session=ai_session,
                     message_pid=str(ai_message.pid),
-                    cost=cost,
+                    cost=float(ai_session.ai_config.cost_per_message),
                 )
 
                 if not transaction_info["success"]:
                     logger.error(f"Message charge failed: {transaction_info.get('error')}")
-                    # Optionally: mark message as failed or add system message
 
             else:
-                # Token-based: charge based on usage
-                cost_info = ai_session.ai_config.calculate_token_cost(usage.prompt_tokens, usage.completion_tokens)
-
-                transaction_info = await database_sync_to_async(AITransactionTracker.record_token_charge)(
+                # Advanced hybrid: the cost was collected up-front when the user message was sent,
+                # only the token usage is recorded against the reply here
+                transaction_info = AITransactionTracker.record_token_charge(
                     ai_session=ai_session,
                     message_pid=str(ai_message.pid),
-                    input_tokens=usage.prompt_tokens,
-                    output_tokens=usage.completion_tokens,
-                    cost=cost_info["total_cost"],
+                    input_tokens=prompt_tokens,
+                    output_tokens=completion_tokens,
+                    cost=0,
                 )
 
                 if not transaction_info["success"]:
                     logger.error(f"Token charge failed: {transaction_info.get('error')}")
 
-            return ai_message
+        return ai_message
+
+    @staticmethod
+    async def _create_failure_message(ai_session: AISession) -> AIMessage:
+        return await ChatBackendAIService.create_ai_message(
+            ai_session=ai_session,
+            content="متاسفانه، به مشکلی برخوردیم. لطفا دوباره تلاش کنید!",
+            message_type=AIMessageTypeEnum.TEXT,
+            is_ai=True,
+            is_system=True,
+        )
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """
+        Rough token estimate, used only when a provider does not send a usage chunk
+        at the end of a stream (~4 characters per token).
+        """
+        if not text:
+            return 0
+        return max(1, len(text) // 4)
+
+    @staticmethod
+    async def generate_response(
+        ai_session: AISession,
+        user_message: AIMessage,
+    ) -> Optional[AIMessage]:
+        """Generate AI response using OpenAI-compatible API with both pricing types"""
+        try:
+            context = await ChatBackendAIService.load_turn_context(ai_session, user_message)
+            if "messages" not in context:
+                return context.get("early_message")
+
+            ai_config_data = context["ai_config_data"]
+
+            # Pooled client, reused across messages
+            client = AIClientRegistry.get_async_client(
+                api_key=ai_config_data["api_key"],
+                base_url=ai_config_data["base_url"] or "https://api.deepseek.com/v1",
+                model=ai_config_data["model_name"],
+                tag=ai_config_data["client_tag"],
+            )
+
+            # Call API
+            response = await client.chat.completions.create(
+                model=ai_config_data["model_name"],
+                messages=context["messages"],
+                temperature=context["temperature"],
+                max_tokens=context["max_tokens"],
+            )
+
+            # Extract response and usage
+            ai_response = response.choices[0].message.content.strip()
+            usage = response.usage
+
+            return await ChatBackendAIService.commit_turn(
+                ai_session, ai_response, usage.prompt_tokens, usage.completion_tokens
+            )
 
         except Exception as e:
             logger.error(f"AI API error: {str(e)}", exc_info=True)
-            return await ChatBackendAIService.create_ai_message(
-                ai_session=ai_session,
-                content="متاسفانه، به مشکلی برخوردیم. لطفا دوباره تلاش کنید!",
-                message_type=AIMessageTypeEnum.TEXT,
-                is_ai=True,
-                is_system=True,
+            return await ChatBackendAIService._create_failure_message(ai_session)
+
+    @staticmethod
+    async def generate_response_stream(
+        ai_session: AISession,
+        user_message: AIMessage,
+        on_delta: Callable[[str], Awaitable[None]],
+    ) -> Optional[AIMessage]:
+        """
+        Streaming variant of generate_response.
+
+        Every content delta is handed to ``on_delta`` as soon as it arrives from the provider,
+        so the user sees the first tokens instead of a blank screen. The final message is
+        persisted once, and usage/billing is reconciled from the stream's trailing usage chunk.
+        """
+        try:
+            context = await ChatBackendAIService.load_turn_context(ai_session, user_message)
+            if "messages" not in context:
+                return context.get("early_message")
+
+            ai_config_data = context["ai_config_data"]
+
+            # Pooled client, reused across messages
+            client = AIClientRegistry.get_async_client(
+                api_key=ai_config_data["api_key"],
+                base_url=ai_config_data["base_url"] or "https://api.deepseek.com/v1",
+                model=ai_config_data["model_name"],
+                tag=ai_config_data["client_tag"],
             )
 
+            stream = await client.chat.completions.create(
+                model=ai_config_data["model_name"],
+                messages=context["messages"],
+                temperature=context["temperature"],
+                max_tokens=context["max_tokens"],
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+
+            parts = []
+            usage = None
+            async for chunk in stream:
+                # The usage chunk arrives last and carries no choices
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+
+                if not chunk.choices:
+                    continue
+
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    await on_delta(delta)
+
+            ai_response = "".join(parts).strip()
+
+            if usage:
+                prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+            else:
+                logger.warning(f"No usage chunk in stream for session {ai_session.pid}, estimating tokens")
+                prompt_tokens = sum(
+                    ChatBackendAIService._estimate_tokens(msg["content"]) for msg in context["messages"]
+                )
+                completion_tokens = ChatBackendAIService._estimate_tokens(ai_response)
+
+            return await ChatBackendAIService.commit_turn(ai_session, ai_response, prompt_tokens, completion_tokens)
+
+        except Exception as e:
+            logger.error(f"AI API streaming error: {str(e)}", exc_info=True)
+            return await ChatBackendAIService._create_failure_message(ai_session)
+
     @staticmethod
     @database_sync_to_async
     def charge_for_message(ai_session, message_pid):
@@ -459,37 +533,6 @@ class ChatBackendAIService(AbstractBaseService):
         except Exception as e:
             logger.error(f"Error charging for AI usage: {e}")
 
-    @staticmethod
-    def _charge_for_tokens_v2(ai_session, input_tokens, output_tokens):
-        """
-        Charge user for token usage using the new AI pricing calculator
-        """
-        if not ai_session.ai_config:
-            return
-
-        from apps.ai_chat.services.ai_pricing_calculator import AIPricingCalculator
-
-        try:
-            # Use the AI config's static_name for charging
-            success, message, details = AIPricingCalculator.charge_for_usage(
-                user=ai_session.user,
-                ai_config_static_name=ai_session.ai_config.static_name,
-                actual_input_tokens=input_tokens,
-                actual_output_tokens=output_tokens,
-                description=f"استفاده از {ai_session.ai_config.name}",
-            )
-
-            if not success:
-                logger.error(f"Failed to charge for tokens: {message}")
-            else:
-                logger.info(
-                    f"Successfully charged: {details.get('charged_amount', 0)} coins for "
-                    f"{input_tokens + output_tokens} tokens. Free: {details.get('is_free', False)}"
-                )
-
-        except Exception as e:
-            logger.error(f"Error charging for tokens: {e}")
-
     @staticmethod
     def _charge_for_tokens(ai_session, input_tokens, output_tokens):
         """Charge user for token usage using the pricing service"""
@@ -541,7 +584,7 @@ class ChatBackendAIService(AbstractBaseService):
             return 0.0
 
         # Get default AI config for pricing
-        ai_config = ChatAIConfig.objects.filter(is_active=True, is_default=True).first()
+        ai_config = ChatAIConfigCache.get_default()
         if not ai_config:
             return 0.0
 
@@ -565,7 +608,7 @@ class ChatBackendAIService(AbstractBaseService):
         """
         Get default AI config synchronously (for celery tasks)
         """
-        return ChatAIConfig.objects.filter(is_active=True, is_default=True).first()
+        return ChatAIConfigCache.get_default()
 
     @staticmethod
     def generate_direct_response(prompt, ai_config):
@@ -574,17 +617,17 @@ class ChatBackendAIService(AbstractBaseService):
         This is a synchronous version for use in Celery tasks
         """
         try:
-            from openai import OpenAI
-
             # Format the message for Deepseek API
             messages = [{"role": "system", "content": ai_config.system_prompt}, {"role": "user", "content": prompt}]
 
             # Set up client with API key and base URL
             base_url = ai_config.base_url or "https://api.deepseek.com/v1"
 
-            client = OpenAI(
+            client = AIClientRegistry.get_client(
                 api_key=ai_config.api_key,
                 base_url=base_url,
+                model=ai_config.model_name,
+                tag=AIClientRegistry.tag_for(ai_config),
             )
 
             # Call API
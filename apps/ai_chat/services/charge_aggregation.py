@@ -0,0 +1,389 @@
+# apps/ai_chat/services/charge_aggregation.py
+"""
+Aggregated billing for message-based AI sessions.
+
+Instead of one wallet update + Transaction + session save per message, coins are reserved
+from the wallet in chunks (a pending "hold" Transaction per session), every message is debited
+from that budget atomically in Redis, and the spend is settled to Postgres as one Transaction
+per session per settlement run (see ``settle_ai_charges`` task) or when the session closes
+(``release_session``).
+
+Postgres stays the source of truth for money:
+    * the hold row is written (and the wallet debited) before Redis learns about the budget,
+      so a crash in between can only leave unused budget, which is refunded on release;
+    * settlements are idempotent, keyed by a per-session sequence number kept in Redis;
+    * if the Redis state is lost, the unsettled spend is forgiven and the full hold refunded.
+"""
+import logging
+import math
+import time
+from decimal import Decimal
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.ai_chat.models import AISession, AISessionStatusEnum
+from apps.wallet.models import Transaction, CoinSettings
+from apps.wallet.services.ledger import WalletLedger, InsufficientWalletBalance
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] = session key, ARGV[1] = cost (units), ARGV[2] = now
+# Returns the remaining budget in units, or -1 if the budget does not cover the cost
+CHARGE_SCRIPT = """
+local reserved = tonumber(redis.call('HGET', KEYS[1], 'reserved') or '0')
+local spent = tonumber(redis.call('HGET', KEYS[1], 'spent') or '0')
+local settling = tonumber(redis.call('HGET', KEYS[1], 'settling') or '0')
+local cost = tonumber(ARGV[1])
+local available = reserved - spent - settling
+if available < cost then
+    return -1
+end
+redis.call('HINCRBY', KEYS[1], 'spent', cost)
+redis.call('HSET', KEYS[1], 'last_charge_at', ARGV[2])
+return available - cost
+"""
+
+# KEYS[1] = session key, ARGV[1] = reserved amount (units), ARGV[2] = cost (units), ARGV[3] = now,
+# ARGV[4] = pk of the hold the amount was reserved on
+TOPUP_SCRIPT = """
+redis.call('HINCRBY', KEYS[1], 'reserved', ARGV[1])
+redis.call('HINCRBY', KEYS[1], 'spent', ARGV[2])
+redis.call('HSET', KEYS[1], 'last_charge_at', ARGV[3])
+redis.call('HSET', KEYS[1], 'hold', ARGV[4])
+return 1
+"""
+
+# Moves the unsettled spend into 'settling' under a new sequence number. A leftover 'settling'
+# amount means the previous settlement did not finish; it is returned with its original
+# sequence number so the retry is idempotent.
+BEGIN_SETTLEMENT_SCRIPT = """
+local settling = tonumber(redis.call('HGET', KEYS[1], 'settling') or '0')
+local seq = tonumber(redis.call('HGET', KEYS[1], 'seq') or '0')
+if settling > 0 then
+    return {settling, seq}
+end
+local spent = tonumber(redis.call('HGET', KEYS[1], 'spent') or '0')
+if spent <= 0 then
+    return {0, seq}
+end
+redis.call('HSET', KEYS[1], 'spent', 0)
+redis.call('HSET', KEYS[1], 'settling', spent)
+seq = redis.call('HINCRBY', KEYS[1], 'seq', 1)
+return {spent, seq}
+"""
+
+# ARGV[1] = sequence number of the settlement; a stale finish (that settlement was already
+# finished and a newer one begun) is a no-op
+FINISH_SETTLEMENT_SCRIPT = """
+if tonumber(redis.call('HGET', KEYS[1], 'seq') or '0') ~= tonumber(ARGV[1]) then
+    return 0
+end
+local settling = tonumber(redis.call('HGET', KEYS[1], 'settling') or '0')
+redis.call('HINCRBY', KEYS[1], 'reserved', -settling)
+redis.call('HSET', KEYS[1], 'settling', 0)
+return settling
+"""
+
+# Compare-and-delete after a release. ARGV[1] = pk of the released hold, ARGV[2] = refunded
+# amount (units). If a new hold was topped up since, only the refunded budget is taken back.
+RELEASE_SCRIPT = """
+local hold = redis.call('HGET', KEYS[1], 'hold')
+if not hold or hold == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+redis.call('HINCRBY', KEYS[1], 'reserved', -tonumber(ARGV[2]))
+return 0
+"""
+
+
+class AIChargeAggregator:
+    """Reserve / debit / settle cycle for message-based AI charges"""
+
+    KEY_PREFIX = "ai_chat:charges"
+    HOLD_REFERENCE_PREFIX = "ai_hold_"
+    SETTLEMENT_REFERENCE_PREFIX = "ai_settle_"
+    # Costs have two decimal places; Redis counters are kept in hundredths of a coin
+    UNITS_PER_COIN = 100
+
+    _scripts = {}
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return getattr(settings, "AI_CHARGE_AGGREGATION_ENABLED", False)
+
+    @staticmethod
+    def _redis():
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+
+    @classmethod
+    def _script(cls, name: str, source: str):
+        if name not in cls._scripts:
+            cls._scripts[name] = cls._redis().register_script(source)
+        return cls._scripts[name]
+
+    @classmethod
+    def _key(cls, session_pid: str) -> str:
+        return f"{cls.KEY_PREFIX}:{session_pid}"
+
+    @classmethod
+    def _to_units(cls, amount) -> int:
+        return int((Decimal(str(amount)) * cls.UNITS_PER_COIN).to_integral_value())
+
+    @classmethod
+    def _from_units(cls, units) -> Decimal:
+        return Decimal(int(units)) / cls.UNITS_PER_COIN
+
+    @classmethod
+    def _hold_reference(cls, session_pid: str) -> str:
+        return f"{cls.HOLD_REFERENCE_PREFIX}{session_pid}"
+
+    @classmethod
+    def available(cls, ai_session) -> Decimal:
+        """Coins still reserved for the session and not yet spent"""
+        try:
+            values = cls._redis().hmget(cls._key(ai_session.pid), "reserved", "spent", "settling")
+        except Exception as e:
+            logger.warning(f"Could not read charge budget of session {ai_session.pid}: {e}")
+            return Decimal(0)
+
+        reserved, spent, settling = (int(value or 0) for value in values)
+        return max(Decimal(0), cls._from_units(reserved - spent - settling))
+
+    @classmethod
+    def charge(cls, ai_session, message_pid: str, cost: float) -> Optional[Dict]:
+        """
+        Debit ``cost`` from the session budget, reserving a new chunk from the wallet when needed.
+
+        Returns the same transaction info dict as ``AITransactionTracker.record_message_charge``,
+        or None when Redis is unavailable so the caller can fall back to a direct charge.
+        """
+        transaction_info = {
+            "session_pid": str(ai_session.pid),
+            "message_pid": message_pid,
+            "pricing_type": "message_based",
+            "cost": cost,
+            "success": True,
+            "aggregated": True,
+            "reference_id": cls._hold_reference(ai_session.pid),
+            "timestamp": str(timezone.now()),
+        }
+
+        units = cls._to_units(cost)
+        key = cls._key(ai_session.pid)
+
+        try:
+            remaining = cls._script("charge", CHARGE_SCRIPT)(keys=[key], args=[units, int(time.time())])
+        except Exception as e:
+            logger.warning(f"Charge aggregation unavailable, charging directly: {e}")
+            return None
+
+        if remaining < 0 and not cls._reserve(ai_session, units):
+            transaction_info["success"] = False
+            transaction_info["error"] = "Insufficient balance"
+            logger.error(f"Insufficient balance to reserve coins for message {message_pid}")
+
+        return transaction_info
+
+    @classmethod
+    def _reserve(cls, ai_session, units: int) -> bool:
+        """
+        Move a chunk of coins from the wallet into the session hold and charge ``units`` from it.
+        The Redis side is only updated once the hold is committed.
+
+        The chunk is capped at a share of the balance (but always covers this message), so a low
+        balance is not locked away from the other coin features while the hold is open.
+        """
+        cost = cls._from_units(units)
+        messages = max(1, getattr(settings, "AI_CHARGE_RESERVATION_MESSAGES", 20))
+        share = Decimal(str(getattr(settings, "AI_CHARGE_RESERVATION_BALANCE_SHARE", 0.25)))
+
+        wallet_id = WalletLedger.get_wallet_id(ai_session.user)
+        coin_balance = WalletLedger.get_balances(wallet_id)["coin_balance"]
+
+        # Wallet balances are whole coins
+        amount = min(
+            Decimal(math.ceil(cost * messages)),
+            max(Decimal(math.ceil(cost)), Decimal(math.floor(coin_balance * share))),
+        )
+        if amount < cost or amount > coin_balance:
+            return False
+
+        reference_id = cls._hold_reference(ai_session.pid)
+
+        try:
+            with transaction.atomic():
+                WalletLedger.apply_delta(wallet_id, -amount)
+
+                # Locked, so a concurrent settlement or release of this hold is serialized with us
+                hold = (
+                    Transaction.objects.select_for_update()
+                    .filter(wallet_id=wallet_id, reference_id=reference_id, status="pending")
+                    .first()
+                )
+                if hold:
+                    Transaction.objects.filter(pk=hold.pk).update(
+                        coin_amount=F("coin_amount") + amount, updated_at=timezone.now()
+                    )
+                else:
+                    hold = Transaction.objects.create(
+                        wallet_id=wallet_id,
+                        coin_amount=amount,
+                        type="ai_chat",
+                        status="pending",
+                        reference_id=reference_id,
+                        description=f"رزرو سکه برای {ai_session.ai_config.name}",
+                        metadata={"session_pid": str(ai_session.pid)},
+                    )
+        except InsufficientWalletBalance:
+            return False
+
+        key = cls._key(ai_session.pid)
+        transaction.on_commit(
+            lambda: cls._script("topup", TOPUP_SCRIPT)(
+                keys=[key], args=[cls._to_units(amount), units, int(time.time()), hold.pk]
+            )
+        )
+
+        logger.info(f"Reserved {amount} coins for session {ai_session.pid}")
+        return True
+
+    @classmethod
+    def settle(cls, hold: Transaction) -> Decimal:
+        """Write the unsettled spend of a hold as one completed Transaction"""
+        session_pid = (hold.metadata or {}).get("session_pid")
+        if not session_pid:
+            return Decimal(0)
+
+        key = cls._key(session_pid)
+        units, seq = cls._script("begin_settlement", BEGIN_SETTLEMENT_SCRIPT)(keys=[key])
+        if not units:
+            return Decimal(0)
+
+        amount = cls._from_units(units)
+        reference_id = f"{cls.SETTLEMENT_REFERENCE_PREFIX}{session_pid}_{seq}"
+
+        with transaction.atomic():
+            # The hold row lock serializes concurrent settlements (beat task, session close), so the
+            # check below cannot race. A hold released meanwhile was refunded whole: nothing to write.
+            is_pending = Transaction.objects.select_for_update().filter(pk=hold.pk, status="pending").exists()
+            # Already written by a settlement that died before clearing Redis
+            if is_pending and not Transaction.objects.filter(
+                wallet_id=hold.wallet_id, reference_id=reference_id
+            ).exists():
+                exchange_rate = CoinSettings.get_exchange_rate()
+                Transaction.objects.create(
+                    wallet_id=hold.wallet_id,
+                    amount=int(amount * exchange_rate),  # Rial equivalent for reference
+                    coin_amount=amount,
+                    type="ai_chat",
+                    status="completed",
+                    reference_id=reference_id,
+                    description="هزینه پیام‌های گفتگوی هوش مصنوعی",
+                    exchange_rate=exchange_rate,
+                    metadata={"session_pid": session_pid},
+                )
+                Transaction.objects.filter(pk=hold.pk).update(
+                    coin_amount=F("coin_amount") - amount, updated_at=timezone.now()
+                )
+                AISession.objects.filter(pid=session_pid).update(total_cost_coins=F("total_cost_coins") + amount)
+
+        cls._script("finish_settlement", FINISH_SETTLEMENT_SCRIPT)(keys=[key], args=[seq])
+
+        logger.info(f"Settled {amount} coins for session {session_pid}")
+        return amount
+
+    @classmethod
+    def release(cls, hold: Transaction) -> Decimal:
+        """Settle a hold and return whatever is left of it to the wallet"""
+        session_pid = (hold.metadata or {}).get("session_pid")
+
+        cls.settle(hold)
+
+        with transaction.atomic():
+            remaining = (
+                Transaction.objects.select_for_update()
+                .filter(pk=hold.pk, status="pending")
+                .values_list("coin_amount", flat=True)
+                .first()
+            )
+            if remaining is None:
+                return Decimal(0)
+
+            Transaction.objects.filter(pk=hold.pk).update(status="canceled", updated_at=timezone.now())
+            if remaining > 0:
+                WalletLedger.apply_delta(hold.wallet_id, remaining)
+
+        cls._script("release", RELEASE_SCRIPT)(keys=[cls._key(session_pid)], args=[hold.pk, cls._to_units(remaining)])
+
+        logger.info(f"Released {remaining} reserved coins of session {session_pid}")
+        return remaining
+
+    @classmethod
+    def release_session(cls, ai_session) -> Decimal:
+        """Settle and release the hold of a session that was just closed (ended or readonly)"""
+        if not cls.is_enabled():
+            return Decimal(0)
+
+        hold = Transaction.objects.filter(
+            type="ai_chat", status="pending", reference_id=cls._hold_reference(ai_session.pid)
+        ).first()
+        if hold is None:
+            return Decimal(0)
+
+        try:
+            return cls.release(hold)
+        except Exception as e:
+            # The settlement task releases it on its next run
+            logger.error(f"Error releasing AI charge hold of session {ai_session.pid}: {e}", exc_info=True)
+            return Decimal(0)
+
+    @classmethod
+    def _is_idle(cls, hold: Transaction, idle_seconds: int) -> bool:
+        session_pid = (hold.metadata or {}).get("session_pid")
+        last_charge_at = cls._redis().hget(cls._key(session_pid), "last_charge_at")
+        if last_charge_at is None:
+            # Redis state lost: nothing left to settle, only the hold to refund
+            return True
+        return time.time() - int(last_charge_at) > idle_seconds
+
+    @classmethod
+    def settle_all(cls) -> Dict:
+        """
+        Settle every open hold; release the holds of sessions that are no longer active or have
+        been idle for AI_CHARGE_HOLD_IDLE_SECONDS.
+        """
+        idle_seconds = getattr(settings, "AI_CHARGE_HOLD_IDLE_SECONDS", 15 * 60)
+        result = {"settled": 0, "released": 0, "failed": 0}
+
+        holds = Transaction.objects.filter(
+            type="ai_chat", status="pending", reference_id__startswith=cls.HOLD_REFERENCE_PREFIX
+        )
+        active_session_pids = set(
+            AISession.objects.filter(
+                pid__in=[h.metadata.get("session_pid") for h in holds if h.metadata],
+                status=AISessionStatusEnum.ACTIVE,
+                is_deleted=False,
+            ).values_list("pid", flat=True)
+        )
+
+        for hold in holds:
+            try:
+                session_pid = (hold.metadata or {}).get("session_pid")
+                if session_pid not in active_session_pids or cls._is_idle(hold, idle_seconds):
+                    cls.release(hold)
+                    result["released"] += 1
+                else:
+                    cls.settle(hold)
+                    result["settled"] += 1
+            except Exception as e:
+                result["failed"] += 1
+                logger.error(f"Error settling AI charge hold {hold.pk}: {e}", exc_info=True)
+
+        return result
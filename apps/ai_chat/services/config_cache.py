@@ -0,0 +1,147 @@
+# apps/ai_chat/services/config_cache.py
+import copy
+import logging
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.ai_chat.models import ChatAIConfig
+from apps.ai_chat.services.pricing_schedule import PricingSchedule
+from base_utils.facades.cache import LocalTTLCache, CacheInvalidationBus
+
+logger = logging.getLogger(__name__)
+
+
+class ChatAIConfigCache:
+    """
+    Two-tier cache for ChatAIConfig lookups (per-process LRU in front of the Redis cache).
+
+    Configs are cached with their general config joined and the combined system prompt
+    precomputed, so a chat turn does not touch Postgres for them. Redis entries are scoped by a
+    config generation counter; saving or deleting a ChatAIConfig / GeneralChatAIConfig bumps the
+    generation and fans out a pub/sub message that clears the local tier of every process.
+
+    Returned instances are copies and can be used (e.g. assigned to a FK) freely. Compiled
+    pricing schedules live in the same local tier and are invalidated with their configs.
+    """
+
+    CACHE_PREFIX = "ai_chat:config"
+    GENERATION_KEY = "ai_chat:config:generation"
+    INVALIDATION_CHANNEL = "ai_chat:config:invalidate"
+    CACHE_TTL = 60 * 60  # an hour in seconds
+
+    _MISSING = object()
+    _local = LocalTTLCache(
+        max_entries=getattr(settings, "AI_CONFIG_LOCAL_CACHE_MAX_ENTRIES", 256),
+        ttl=getattr(settings, "AI_CONFIG_LOCAL_CACHE_TTL", 30),
+    )
+
+    @classmethod
+    def get_generation(cls) -> int:
+        """Current config generation, bumped on every config change"""
+        try:
+            return cache.get(cls.GENERATION_KEY) or 0
+        except Exception as e:
+            logger.warning(f"Could not read AI config generation: {e}")
+            return 0
+
+    @classmethod
+    def _bump_generation(cls):
+        try:
+            cache.incr(cls.GENERATION_KEY)
+        except ValueError:
+            # Key does not exist yet
+            cache.set(cls.GENERATION_KEY, 1, None)
+        except Exception as e:
+            logger.warning(f"Could not bump AI config generation: {e}")
+
+    @classmethod
+    def clear_local(cls, *args):
+        cls._local.clear()
+
+    @classmethod
+    def invalidate(cls):
+        """Invalidate both tiers in every process"""
+        cls._bump_generation()
+        cls.clear_local()
+        CacheInvalidationBus.publish(cls.INVALIDATION_CHANNEL)
+
+    @staticmethod
+    def _prime(config: Optional[ChatAIConfig]) -> Optional[ChatAIConfig]:
+        if config is not None:
+            config._combined_system_prompt = config.get_combined_system_prompt()
+        return config
+
+    @classmethod
+    def _get(cls, key: str, loader: Callable[[], Optional[ChatAIConfig]]) -> Optional[ChatAIConfig]:
+        CacheInvalidationBus.subscribe(cls.INVALIDATION_CHANNEL, cls.clear_local)
+
+        config = cls._local.get(key, cls._MISSING)
+
+        if config is cls._MISSING:
+            redis_key = f"{cls.CACHE_PREFIX}:{cls.get_generation()}:{key}"
+            try:
+                config = cache.get(redis_key, cls._MISSING)
+            except Exception as e:
+                logger.warning(f"Could not read AI config {key} from cache: {e}")
+                config = cls._MISSING
+
+            if config is cls._MISSING:
+                config = cls._prime(loader())
+                try:
+                    cache.set(redis_key, config, cls.CACHE_TTL)
+                except Exception as e:
+                    logger.warning(f"Could not write AI config {key} to cache: {e}")
+
+            cls._local.set(key, config)
+
+        return copy.copy(config) if config is not None else None
+
+    @classmethod
+    def get_by_static_name(cls, static_name: str) -> Optional[ChatAIConfig]:
+        """Active config by static_name"""
+        if not static_name:
+            return None
+
+        return cls._get(
+            f"static_name:{static_name}",
+            lambda: ChatAIConfig.objects.filter(static_name=static_name, is_active=True)
+            .select_related("general_config")
+            .first(),
+        )
+
+    @classmethod
+    def get_by_pid(cls, pid: str) -> Optional[ChatAIConfig]:
+        """Active config by pid"""
+        if not pid:
+            return None
+
+        return cls._get(
+            f"pid:{pid}",
+            lambda: ChatAIConfig.objects.filter(pid=pid, is_active=True).select_related("general_config").first(),
+        )
+
+    @classmethod
+    def get_default(cls) -> Optional[ChatAIConfig]:
+        """The active default config"""
+        return cls._get(
+            "default",
+            lambda: ChatAIConfig.objects.filter(is_active=True, is_default=True).select_related("general_config").first(),
+        )
+
+    @classmethod
+    def get_pricing_schedule(cls, static_name: str) -> Optional[PricingSchedule]:
+        """Compiled pricing schedule of the active config ``static_name`` (immutable, not copied)"""
+        if not static_name:
+            return None
+
+        CacheInvalidationBus.subscribe(cls.INVALIDATION_CHANNEL, cls.clear_local)
+
+        key = f"schedule:{static_name}"
+        schedule = cls._local.get(key, cls._MISSING)
+        if schedule is cls._MISSING:
+            config = cls.get_by_static_name(static_name)
+            schedule = PricingSchedule.from_config(config) if config is not None else None
+            cls._local.set(key, schedule)
+        return schedule
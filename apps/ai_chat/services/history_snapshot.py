@@ -0,0 +1,13 @@
+# apps/ai_chat/services/history_snapshot.py
+from apps.ai_chat.models import AIMessage
+from base_utils.facades.history_snapshot import MessageHistorySnapshot
+
+
+class AIMessageHistorySnapshot(MessageHistorySnapshot):
+    """History frame sent by the AI chat consumer on connect"""
+
+    model = AIMessage
+    SESSION_FIELD = "ai_session"
+    CACHE_PREFIX = "ai_chat:history"
+    HISTORY_TYPE = "ai_chat.history"
+    MESSAGE_TYPE = "ai_chat.message"
@@ -0,0 +1,153 @@
+# apps/ai_chat/services/pricing_schedule.py
+import hashlib
+import json
+import math
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from typing import List, Optional, Sequence, Tuple
+
+from apps.ai_chat.models import ChatAIConfig
+from apps.ai_chat.models.chat_ai_config import PricingTypeEnum
+from base_utils.numbers import safe_decimal_to_float
+
+
+@dataclass(frozen=True)
+class PricingSchedule:
+    """
+    Immutable, precompiled pricing of one ChatAIConfig.
+
+    Holds plain numbers only (the Decimal step costs are expanded once into ``step_costs``), so
+    pricing a message is a few integer operations and a table lookup, with the same results as
+    ``ChatAIConfig.calculate_message_cost`` / ``calculate_advanced_hybrid_cost``. ``version`` is a
+    hash of the pricing fields; clients that price locally from ``to_dict`` send it back at charge
+    time to confirm they used the current schedule.
+    """
+
+    static_name: str
+    name: str
+    model_name: str
+    strength: str
+    pricing_type: str
+    cost_per_message: float = 0.0
+    base_cost: float = 0.0
+    free_chars: int = 0
+    char_per_coin: int = 1
+    tokens_min: int = 0
+    tokens_max: int = 0
+    tokens_step: int = 1
+    cost_per_step: float = 0.0
+    # step_costs[n] = cost of n token steps above tokens_min
+    step_costs: Tuple[float, ...] = ()
+    version: str = field(default="", compare=False)
+
+    @classmethod
+    def from_config(cls, config: ChatAIConfig) -> "PricingSchedule":
+        tokens_min = config.hybrid_tokens_min or 0
+        tokens_max = max(config.hybrid_tokens_max or 0, tokens_min)
+        tokens_step = config.hybrid_tokens_step or 1
+        cost_per_step = config.hybrid_cost_per_step or Decimal("0")
+        max_steps = math.ceil((tokens_max - tokens_min) / tokens_step)
+
+        schedule = cls(
+            static_name=config.static_name,
+            name=config.name,
+            model_name=config.model_name,
+            strength=config.strength,
+            pricing_type=config.pricing_type,
+            cost_per_message=safe_decimal_to_float(config.cost_per_message),
+            base_cost=safe_decimal_to_float(config.hybrid_base_cost),
+            free_chars=config.hybrid_free_chars or 0,
+            char_per_coin=config.hybrid_char_per_coin or 1,
+            tokens_min=tokens_min,
+            tokens_max=tokens_max,
+            tokens_step=tokens_step,
+            cost_per_step=safe_decimal_to_float(cost_per_step),
+            step_costs=tuple(float(Decimal(n) * cost_per_step) for n in range(max_steps + 1)),
+        )
+        digest = hashlib.sha1(json.dumps(schedule.to_dict(with_version=False), sort_keys=True).encode()).hexdigest()
+        object.__setattr__(schedule, "version", digest[:16])
+        return schedule
+
+    @property
+    def is_message_based(self) -> bool:
+        return self.pricing_type == PricingTypeEnum.MESSAGE_BASED
+
+    @property
+    def is_advanced_hybrid(self) -> bool:
+        return self.pricing_type == PricingTypeEnum.ADVANCED_HYBRID
+
+    def config_info(self) -> dict:
+        return {
+            "static_name": self.static_name,
+            "name": self.name,
+            "model_name": self.model_name,
+            "strength": self.strength,
+            "pricing_type": self.pricing_type,
+        }
+
+    def to_dict(self, with_version: bool = True) -> dict:
+        data = asdict(self)
+        data["step_costs"] = list(self.step_costs)
+        if not with_version:
+            data.pop("version")
+        return data
+
+    def price(self, character_count: int, max_tokens_requested: Optional[int] = None) -> dict:
+        """Cost of one message, in the shape of ``AIPricingCalculator.preview_cost`` (without ``ai_config``)"""
+        return self.price_many([character_count], [max_tokens_requested])[0]
+
+    def price_many(self, character_counts: Sequence[int], max_tokens: Sequence[Optional[int]] = None) -> List[dict]:
+        """Cost of many messages in one pass over the compiled tables"""
+        if max_tokens is None:
+            max_tokens = [None] * len(character_counts)
+
+        if self.is_message_based:
+            cost = self.cost_per_message
+            return [
+                {
+                    "character_count": count,
+                    "cost": cost,
+                    "currency": "coins",
+                    "pricing_type": "message_based",
+                }
+                for count in character_counts
+            ]
+
+        if not self.is_advanced_hybrid:
+            return [{"character_count": count, "pricing_type": self.pricing_type} for count in character_counts]
+
+        free_chars, char_per_coin, base_cost = self.free_chars, self.char_per_coin, self.base_cost
+        tokens_min, tokens_max, tokens_step, step_costs = self.tokens_min, self.tokens_max, self.tokens_step, self.step_costs
+
+        results = []
+        for count, tokens in zip(character_counts, max_tokens):
+            result = {"character_count": count}
+
+            tokens = tokens_min if tokens is None else int(tokens)
+            if tokens < tokens_min:
+                result["warning"] = f"حداقل توکن مجاز {tokens_min} است"
+                tokens = tokens_min
+            elif tokens > tokens_max:
+                result["warning"] = f"حداکثر توکن مجاز {tokens_max} است"
+                tokens = tokens_max
+
+            billable_chars = max(0, count - free_chars)
+            char_cost = float(-(-billable_chars // char_per_coin))
+            num_steps = -(-(tokens - tokens_min) // tokens_step)
+            step_cost = step_costs[num_steps]
+
+            result.update(
+                {
+                    "pricing_type": "advanced_hybrid",
+                    "max_tokens_requested": tokens,
+                    "base_cost": base_cost,
+                    "char_cost": char_cost,
+                    "free_chars_used": min(count, free_chars),
+                    "billable_chars": billable_chars,
+                    "step_cost": step_cost,
+                    "num_steps": num_steps,
+                    "total_cost": base_cost + char_cost + step_cost,
+                }
+            )
+            results.append(result)
+        return results
@@ -34,6 +34,7 @@ class AITransactionTracker:
         Returns:
             dict with transaction details
         """
+        from apps.ai_chat.services.charge_aggregation import AIChargeAggregator
         from apps.wallet.services.wallet import WalletService
 
         transaction_info = {
@@ -50,6 +51,12 @@ class AITransactionTracker:
             logger.error(f"Failed to charge for message {message_pid} " f"in session {ai_session.pid}: {error_message}")
             return transaction_info
 
+        if AIChargeAggregator.is_enabled():
+            # Debited from the session's reserved budget, settled to the wallet ledger later
+            aggregated_info = AIChargeAggregator.charge(ai_session, message_pid, cost)
+            if aggregated_info is not None:
+                return aggregated_info
+
         try:
             # Create unique reference ID
             reference_id = f"ai_msg_{ai_session.pid}_{message_pid}"
@@ -171,13 +178,14 @@ class AITransactionTracker:
         }
 
     @staticmethod
-    def pre_charge_validation(ai_session, message_pid: Optional[str] = None) -> tuple[bool, str]:
+    def pre_charge_validation(ai_session, message_pid: Optional[str] = None, coin_balance=None) -> tuple[bool, str]:
         """
         Validate before charging
 
         Args:
             ai_session: The AI session
             message_pid: Optional message PID for logging
+            coin_balance: Wallet coin balance if the caller already loaded it (avoids another lookup)
 
         Returns:
             tuple: (is_valid, error_message)
@@ -198,7 +206,7 @@ class AITransactionTracker:
             if cost <= 0:
                 return True, ""  # Free message
 
-            balance = WalletService.get_wallet_coin_balance(ai_session.user)
+            balance = coin_balance if coin_balance is not None else WalletService.get_wallet_coin_balance(ai_session.user)
             if balance < cost:
                 return False, f"Insufficient balance: required {cost}, available {balance}"
 
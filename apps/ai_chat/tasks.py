@@ -55,3 +55,16 @@ def update_expired_ai_sessions():
         )
 
     return f"Updated {count} expired AI sessions"
+
+
+@shared_task(name="apps.ai_chat.tasks.settle_ai_charges")
+def settle_ai_charges():
+    """
+    Periodic task to settle aggregated AI charges to the wallet ledger and release the
+    reserved coins of closed or idle sessions
+    """
+    from apps.ai_chat.services.charge_aggregation import AIChargeAggregator
+
+    result = AIChargeAggregator.settle_all()
+    logger.info(f"AI charge settlement: {result}")
+    return result
@@ -0,0 +1,84 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+
+from apps.ai_chat.models import AIMessage, AISession
+from base_utils.base_tests import TainoBaseAPITestCase
+
+
+class AISessionMessagesPaginationAPITest(TainoBaseAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ai_session = baker.make(AISession, user=self.user)
+        self.messages = [
+            baker.make(AIMessage, ai_session=self.ai_session, sender=self.user, content=f"message {i}")
+            for i in range(5)
+        ]
+        self.url = reverse("ai_chat:ai_chat_v1:ai_messages-session-messages", kwargs={"session_id": self.ai_session.pid})
+
+    def get_page(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def contents(self, page):
+        return [item["content"] for item in page["results"]]
+
+    def test_first_page_is_the_newest_messages_in_order(self):
+        page = self.get_page(self.url, {"limit": 2})
+
+        self.assertEqual(self.contents(page), ["message 3", "message 4"])
+        self.assertIsNone(page["next"])
+        self.assertIsNotNone(page["previous"])
+        self.assertNotIn("count", page)
+
+    def test_scrolling_back_walks_the_whole_history(self):
+        page = self.get_page(self.url, {"limit": 2})
+        seen = self.contents(page)
+        while page["previous"]:
+            page = self.get_page(page["previous"])
+            seen = self.contents(page) + seen
+
+        self.assertEqual(seen, [f"message {i}" for i in range(5)])
+        self.assertEqual(self.contents(page), ["message 0"])
+
+    def test_next_link_returns_the_newer_messages(self):
+        older = self.get_page(self.get_page(self.url, {"limit": 2})["previous"])
+
+        newer = self.get_page(older["next"])
+
+        self.assertEqual(self.contents(newer), ["message 3", "message 4"])
+        self.assertIsNone(newer["next"])
+
+    def test_page_runs_no_count_query(self):
+        with CaptureQueriesContext(connection) as context:
+            self.get_page(self.url, {"limit": 2})
+
+        self.assertFalse(any("COUNT(" in query["sql"].upper() for query in context.captured_queries))
+
+    def test_invalid_cursor_returns_empty_page(self):
+        page = self.get_page(self.url, {"before": "not-a-cursor"})
+
+        self.assertEqual(page["results"], [])
+        self.assertIsNone(page["next"])
+        self.assertIsNone(page["previous"])
+
+    def test_without_pagination_params_the_full_history_is_returned(self):
+        data = self.get_page(self.url)
+
+        self.assertEqual([item["content"] for item in data], [f"message {i}" for i in range(5)])
+
+    def test_offset_keeps_limit_offset_pages(self):
+        page = self.get_page(self.url, {"limit": 2, "offset": 2})
+
+        self.assertEqual(self.contents(page), ["message 2", "message 3"])
+        self.assertEqual(page["count"], 5)
+
+    def test_empty_before_cursor_returns_the_newest_page(self):
+        page = self.get_page(self.url, {"before": ""})
+
+        self.assertEqual(self.contents(page), [f"message {i}" for i in range(5)])
+        self.assertIsNone(page["previous"])
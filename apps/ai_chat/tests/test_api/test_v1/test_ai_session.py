@@ -0,0 +1,81 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+
+from apps.ai_chat.models import ChatAIConfig, GeneralChatAIConfig
+from base_utils.base_tests import LocMemCacheTestMixin, TainoBaseAPITestCase
+
+
+class AIConfigsListAPITest(LocMemCacheTestMixin, TainoBaseAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.list_url = reverse("ai_chat:ai_chat_v1:ai_sessions-get-configs-list")
+        self.nested_url = reverse("ai_chat:ai_chat_v1:ai_sessions-get-configs-nested")
+
+    def make_general_configs(self, count):
+        # Config saves invalidate the cached payload on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(count):
+                general_config = baker.make(GeneralChatAIConfig, is_active=True)
+                baker.make(ChatAIConfig, general_config=general_config, is_active=True, _quantity=2)
+                baker.make(ChatAIConfig, general_config=general_config, is_active=False)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_configs_list_query_count_does_not_grow(self):
+        self.make_general_configs(1)
+        baseline = self.count_queries(self.list_url)
+
+        # A new config bumps the generation, so the cached payload is not reused
+        self.make_general_configs(4)
+        self.assertEqual(self.count_queries(self.list_url), baseline)
+
+    def test_configs_nested_query_count_does_not_grow(self):
+        self.make_general_configs(1)
+        baseline = self.count_queries(self.nested_url)
+
+        self.make_general_configs(4)
+        self.assertEqual(self.count_queries(self.nested_url), baseline)
+
+    def test_configs_list_only_contains_active_ai_configs(self):
+        self.make_general_configs(2)
+
+        response = self.client.get(self.list_url)
+
+        self.assertEqual(len(response.data["general_configs"]), 2)
+        for general_config in response.data["general_configs"]:
+            self.assertEqual(general_config["ai_configs_count"], 2)
+            self.assertEqual(len(response.data["ai_configs_by_general"][general_config["pid"]]), 2)
+
+    def test_configs_nested_not_modified(self):
+        self.make_general_configs(2)
+
+        response = self.client.get(self.nested_url)
+        etag = response.headers["ETag"]
+
+        response = self.client.get(self.nested_url, headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.headers["ETag"], etag)
+
+    def test_configs_nested_etag_changes_after_config_update(self):
+        self.make_general_configs(1)
+
+        etag = self.client.get(self.nested_url).headers["ETag"]
+
+        ai_config = ChatAIConfig.objects.filter(is_active=True).first()
+        ai_config.name = "updated"
+        with self.captureOnCommitCallbacks(execute=True):
+            ai_config.save()
+
+        response = self.client.get(self.nested_url, headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers["ETag"], etag)
@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from apps.ai_chat.consumers.base import BaseTainoAIAsyncJsonWebsocketConsumer
+from base_utils.facades.ai_response_supervisor import AIResponseSupervisor
+
+
+class AIResponsePreChargeRefundTest(SimpleTestCase):
+
+    def setUp(self):
+        self.supervisor = AIResponseSupervisor(max_concurrency=1, max_per_user=5, queue_timeout=0.01)
+        patcher = mock.patch.object(AIResponseSupervisor, "get_default", return_value=self.supervisor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.release = asyncio.Event()
+        self.consumer = BaseTainoAIAsyncJsonWebsocketConsumer()
+        self.consumer.user = SimpleNamespace(pk=1)
+        self.consumer.channel_name = "channel"
+        self.consumer.send_json = mock.AsyncMock()
+        self.consumer._refund_coins = mock.AsyncMock()
+
+        async def generate(user_message):
+            await self.release.wait()
+            user_message.answered = True
+
+        self.consumer._generate_ai_response = generate
+
+    async def respond(self, pid, session):
+        self.consumer.session_id = session
+        message = SimpleNamespace(pid=pid, pre_charge=5)
+        await self.consumer.process_ai_response(message)
+        return message
+
+    def refunds(self):
+        return [(call.args[0].pid, call.args[2]) for call in self.consumer._refund_coins.await_args_list]
+
+    async def test_refused_response_is_refunded(self):
+        await self.respond("running", "s1")
+        await self.respond("refused", "s1")
+
+        self.assertEqual(self.refunds(), [("refused", "session_limit")])
+        self.release.set()
+
+    async def test_timed_out_response_is_refunded_once(self):
+        await self.respond("running", "s1")
+        await self.respond("queued", "s2")
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(self.refunds(), [("queued", "timeout")])
+        self.release.set()
+
+    async def test_cancelled_queued_and_running_responses_are_refunded(self):
+        await self.respond("running", "s1")
+        await self.respond("queued", "s2")
+        await asyncio.sleep(0)
+
+        self.supervisor.cancel_owner("channel")
+        await asyncio.sleep(0.001)
+
+        self.assertCountEqual(self.refunds(), [("running", "cancelled"), ("queued", "cancelled")])
+
+    async def test_started_response_cancelled_before_its_reply_is_refunded(self):
+        await self.respond("running", "s1")
+        await asyncio.sleep(0)
+
+        self.supervisor.cancel_owner("channel")
+        await asyncio.sleep(0.001)
+
+        self.assertEqual(self.refunds(), [("running", "cancelled")])
+
+    async def test_answered_response_keeps_its_charge(self):
+        self.release.set()
+        await self.respond("answered", "s1")
+        await asyncio.sleep(0.001)
+
+        self.assertEqual(self.refunds(), [])
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from apps.ai_chat.consumers.base import BaseTainoAIAsyncJsonWebsocketConsumer
+from apps.ai_chat.services.ai_service import ChatBackendAIService
+
+
+def chunk(content=None, usage=None):
+    choices = [] if content is None else [SimpleNamespace(delta=SimpleNamespace(content=content))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+async def stream_of(chunks):
+    for item in chunks:
+        yield item
+
+
+@override_settings(AI_CHAT_STREAMING_ENABLED=True, AI_CHAT_STREAM_FLUSH_CHARS=10, AI_CHAT_STREAM_FLUSH_INTERVAL_MS=60000)
+class StreamedAIResponseConsumerTest(SimpleTestCase):
+
+    def setUp(self):
+        self.consumer = BaseTainoAIAsyncJsonWebsocketConsumer()
+        self.consumer.room_group_name = "ai_chat_session"
+        self.consumer.ai_session = SimpleNamespace(ai_context={"ai_type": "v"})
+        self.consumer.channel_layer = mock.Mock(group_send=mock.AsyncMock())
+        self.ai_message = SimpleNamespace(pid="reply", content="hello world!", message_type="text", created_at=timezone.now())
+
+    async def respond(self, deltas):
+        async def generate_response_stream(ai_session, user_message, on_delta):
+            for delta in deltas:
+                await on_delta(delta)
+            return self.ai_message
+
+        with mock.patch.object(ChatBackendAIService, "generate_response_stream", side_effect=generate_response_stream):
+            await self.consumer._generate_ai_response(SimpleNamespace(pid="question"))
+
+        return [call.args[1] for call in self.consumer.channel_layer.group_send.await_args_list]
+
+    async def test_deltas_are_coalesced(self):
+        frames = await self.respond(["he", "llo", " ", "wor", "ld", "!!!", "!", "?"])
+
+        deltas = [frame for frame in frames if frame["type"] == "ai_chat.delta"]
+        # The first delta is flushed at once, the rest every 10 characters and once at the end
+        self.assertEqual([frame["delta"] for frame in deltas], ["he", "llo world!!!", "!?"])
+        self.assertEqual([frame["seq"] for frame in deltas], [0, 1, 2])
+
+    async def test_final_message_carries_the_stream_id(self):
+        frames = await self.respond(["hello", " world!"])
+
+        deltas = [frame for frame in frames if frame["type"] == "ai_chat.delta"]
+        message = next(frame for frame in frames if frame["type"] == "ai_chat.message")
+        self.assertEqual({frame["stream_id"] for frame in deltas}, {message["stream_id"]})
+        self.assertIsNotNone(message["stream_id"])
+        self.assertEqual(message["id"], "reply")
+
+
+class StreamedAIResponseUsageTest(SimpleTestCase):
+
+    async def generate(self, chunks):
+        context = {
+            "ai_config_data": {"api_key": "key", "base_url": "", "model_name": "model", "client_tag": "tag"},
+            "messages": [{"role": "user", "content": "x" * 40}],
+            "temperature": 0.5,
+            "max_tokens": 100,
+        }
+        client = mock.Mock()
+        client.chat.completions.create = mock.AsyncMock(return_value=stream_of(chunks))
+        on_delta = mock.AsyncMock()
+
+        with (
+            mock.patch.object(ChatBackendAIService, "load_turn_context", mock.AsyncMock(return_value=context)),
+            mock.patch("apps.ai_chat.services.ai_service.AIClientRegistry.get_async_client", return_value=client),
+            mock.patch.object(ChatBackendAIService, "commit_turn", mock.AsyncMock()) as commit_turn,
+        ):
+            await ChatBackendAIService.generate_response_stream(SimpleNamespace(pid="s"), SimpleNamespace(), on_delta)
+
+        return commit_turn.await_args.args, on_delta
+
+    async def test_usage_chunk_is_billed(self):
+        usage = SimpleNamespace(prompt_tokens=7, completion_tokens=3)
+        args, on_delta = await self.generate([chunk("abc"), chunk("def"), chunk(usage=usage)])
+
+        self.assertEqual(args[1:], ("abcdef", 7, 3))
+        self.assertEqual(on_delta.await_count, 2)
+
+    async def test_tokens_are_estimated_without_usage_chunk(self):
+        args, _ = await self.generate([chunk("a" * 20), chunk("b" * 20)])
+
+        # ~4 characters per token, for the prompt messages and the answer
+        self.assertEqual(args[1:], ("a" * 20 + "b" * 20, 10, 10))
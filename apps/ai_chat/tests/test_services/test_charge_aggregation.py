@@ -0,0 +1,134 @@
+from decimal import Decimal
+
+from django.test import override_settings
+from model_bakery import baker
+
+from apps.ai_chat.models import AISession, AISessionStatusEnum, ChatAIConfig
+from apps.ai_chat.services import charge_aggregation
+from apps.ai_chat.services.charge_aggregation import AIChargeAggregator
+from apps.ai_chat.services.transaction_tracking import AITransactionTracker
+from apps.wallet.models import Transaction, Wallet
+from apps.wallet.services.wallet import WalletService
+from base_utils.base_tests import TainoBaseServiceTestCase
+
+
+@override_settings(AI_CHARGE_AGGREGATION_ENABLED=True, AI_CHARGE_RESERVATION_MESSAGES=5)
+class AIChargeAggregatorTest(TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.wallet = WalletService.get_or_create_wallet(self.user)
+        Wallet.objects.filter(pk=self.wallet.pk).update(coin_balance=100)
+        self.ai_config = baker.make(ChatAIConfig, cost_per_message=Decimal("2.00"), is_active=True)
+        self.ai_session = baker.make(
+            AISession, user=self.user, ai_config=self.ai_config, status=AISessionStatusEnum.ACTIVE
+        )
+
+    def tearDown(self):
+        AIChargeAggregator._redis().delete(AIChargeAggregator._key(self.ai_session.pid))
+        super().tearDown()
+
+    def charge(self, count):
+        for i in range(count):
+            with self.captureOnCommitCallbacks(execute=True):
+                info = AITransactionTracker.record_message_charge(self.ai_session, f"message-{i}", 2.0)
+            self.assertTrue(info["success"])
+
+    def get_hold(self):
+        return Transaction.objects.get(reference_id=AIChargeAggregator._hold_reference(self.ai_session.pid))
+
+    def test_first_charge_reserves_a_chunk(self):
+        self.charge(1)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.coin_balance, Decimal(90))
+        self.assertEqual(self.get_hold().coin_amount, Decimal(10))
+        self.assertEqual(AIChargeAggregator.available(self.ai_session), Decimal(8))
+
+    def test_low_balance_holds_only_a_share_of_it(self):
+        Wallet.objects.filter(pk=self.wallet.pk).update(coin_balance=8)
+
+        self.charge(1)
+
+        self.wallet.refresh_from_db()
+        # A quarter of the balance is less than a message, so only the message itself is held
+        self.assertEqual(self.wallet.coin_balance, Decimal(6))
+        self.assertEqual(self.get_hold().coin_amount, Decimal(2))
+        self.assertEqual(AIChargeAggregator.available(self.ai_session), Decimal(0))
+
+    def test_charges_within_budget_do_not_touch_the_wallet(self):
+        self.charge(5)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.coin_balance, Decimal(90))
+        self.assertEqual(Transaction.objects.filter(wallet=self.wallet, type="ai_chat").count(), 1)
+
+    def test_settlement_writes_one_transaction(self):
+        self.charge(3)
+
+        AIChargeAggregator.settle(self.get_hold())
+
+        settlements = Transaction.objects.filter(
+            wallet=self.wallet, reference_id__startswith=AIChargeAggregator.SETTLEMENT_REFERENCE_PREFIX
+        )
+        self.assertEqual(settlements.count(), 1)
+        self.assertEqual(settlements.get().coin_amount, Decimal(6))
+        self.assertEqual(self.get_hold().coin_amount, Decimal(4))
+        self.ai_session.refresh_from_db()
+        self.assertEqual(self.ai_session.total_cost_coins, Decimal(6))
+
+    def test_release_refunds_the_unused_budget(self):
+        self.charge(3)
+        AISession.objects.filter(pk=self.ai_session.pk).update(status=AISessionStatusEnum.COMPLETED)
+
+        result = AIChargeAggregator.settle_all()
+
+        self.assertEqual(result["released"], 1)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.coin_balance, Decimal(94))
+        self.assertEqual(self.get_hold().status, "canceled")
+
+    def test_release_after_lost_redis_state_refunds_the_whole_hold(self):
+        self.charge(1)
+        AIChargeAggregator._redis().delete(AIChargeAggregator._key(self.ai_session.pid))
+
+        AIChargeAggregator.settle_all()
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.coin_balance, Decimal(100))
+
+    def test_interrupted_settlement_is_written_once(self):
+        self.charge(3)
+        key = AIChargeAggregator._key(self.ai_session.pid)
+        # A settlement that died after moving the spend to 'settling'
+        AIChargeAggregator._script("begin_settlement", charge_aggregation.BEGIN_SETTLEMENT_SCRIPT)(keys=[key])
+
+        AIChargeAggregator.settle(self.get_hold())
+        AIChargeAggregator.settle(self.get_hold())
+
+        settlements = Transaction.objects.filter(
+            wallet=self.wallet, reference_id__startswith=AIChargeAggregator.SETTLEMENT_REFERENCE_PREFIX
+        )
+        self.assertEqual(settlements.count(), 1)
+        self.assertEqual(self.get_hold().coin_amount, Decimal(4))
+
+    def test_closing_the_session_releases_its_hold(self):
+        self.charge(3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ai_session.release_charge_hold()
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.coin_balance, Decimal(94))
+        self.assertEqual(self.get_hold().status, "canceled")
+
+    def test_release_keeps_the_budget_of_a_newer_hold(self):
+        self.charge(1)
+        key = AIChargeAggregator._key(self.ai_session.pid)
+        # A new hold was topped up after this one was picked for release
+        AIChargeAggregator._redis().hset(key, "hold", "newer")
+        AIChargeAggregator._redis().hincrby(key, "reserved", 1000)
+
+        AIChargeAggregator.release(self.get_hold())
+
+        self.assertEqual(AIChargeAggregator.available(self.ai_session), Decimal(10))
@@ -0,0 +1,40 @@
+import json
+
+from model_bakery import baker
+
+from apps.ai_chat.models import AIMessage, AISession
+from apps.ai_chat.services.history_snapshot import AIMessageHistorySnapshot
+from base_utils.base_tests import LocMemCacheTestMixin, TainoBaseServiceTestCase
+
+
+class AIMessageHistorySnapshotTest(LocMemCacheTestMixin, TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        AIMessageHistorySnapshot._local.clear()
+        self.ai_session = baker.make(AISession, user=self.user)
+        for i in range(4):
+            self.add_message(f"message {i}")
+
+    def tearDown(self):
+        AIMessageHistorySnapshot._local.clear()
+        super().tearDown()
+
+    def add_message(self, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return baker.make(AIMessage, ai_session=self.ai_session, sender=self.user, content=content)
+
+    def test_snapshot_uses_the_ai_chat_frame_types(self):
+        snapshot = json.loads(AIMessageHistorySnapshot.get_payload(self.ai_session.pk))
+
+        self.assertEqual(snapshot["type"], "ai_chat.history")
+        self.assertEqual(snapshot["messages"][0]["type"], "ai_chat.message")
+        self.assertEqual(snapshot["messages"][0]["sender"], str(self.user.pid))
+
+    def test_new_message_retires_the_snapshot(self):
+        AIMessageHistorySnapshot.get_payload(self.ai_session.pk)
+
+        self.add_message("message 4")
+
+        snapshot = json.loads(AIMessageHistorySnapshot.get_payload(self.ai_session.pk))
+        self.assertEqual(snapshot["messages"][-1]["message"], "message 4")
@@ -0,0 +1,98 @@
+from decimal import Decimal
+from unittest import mock
+
+from model_bakery import baker
+
+from apps.ai_chat.models import ChatAIConfig
+from apps.ai_chat.models.chat_ai_config import AIStrengthEnum, PricingTypeEnum
+from apps.ai_chat.services.ai_pricing_calculator import AIPricingCalculator
+from apps.ai_chat.services.config_cache import ChatAIConfigCache
+from apps.ai_chat.services.pricing_schedule import PricingSchedule
+from base_utils.base_tests import LocMemCacheTestMixin, TainoBaseServiceTestCase
+
+
+class PricingScheduleTest(LocMemCacheTestMixin, TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        ChatAIConfigCache.clear_local()
+        self.hybrid_config = baker.make(
+            ChatAIConfig,
+            is_active=True,
+            strength=AIStrengthEnum.STRONG,
+            pricing_type=PricingTypeEnum.ADVANCED_HYBRID,
+            hybrid_base_cost=Decimal("3.00"),
+            hybrid_char_per_coin=400,
+            hybrid_free_chars=1000,
+            hybrid_tokens_min=1000,
+            hybrid_tokens_max=8000,
+            hybrid_tokens_step=700,
+            hybrid_cost_per_step=Decimal("0.10"),
+        )
+        self.message_config = baker.make(
+            ChatAIConfig,
+            is_active=True,
+            strength=AIStrengthEnum.VERY_STRONG,
+            pricing_type=PricingTypeEnum.MESSAGE_BASED,
+            cost_per_message=Decimal("2.50"),
+        )
+
+    def tearDown(self):
+        ChatAIConfigCache.clear_local()
+        super().tearDown()
+
+    def test_hybrid_prices_match_the_model(self):
+        schedule = PricingSchedule.from_config(self.hybrid_config)
+        keys = ["base_cost", "char_cost", "free_chars_used", "billable_chars", "step_cost", "num_steps", "total_cost"]
+
+        for character_count in (0, 999, 1000, 1001, 1400, 1401, 25000):
+            for max_tokens in (1000, 1001, 1700, 4321, 8000):
+                expected = self.hybrid_config.calculate_advanced_hybrid_cost(character_count, max_tokens)
+                priced = schedule.price(character_count, max_tokens)
+                self.assertEqual({k: priced[k] for k in keys}, {k: expected[k] for k in keys})
+
+    def test_out_of_range_tokens_are_clamped_with_a_warning(self):
+        schedule = PricingSchedule.from_config(self.hybrid_config)
+
+        priced = schedule.price(10, 9000)
+
+        self.assertEqual(priced["max_tokens_requested"], 8000)
+        self.assertIn("warning", priced)
+
+    def test_message_based_price(self):
+        preview = AIPricingCalculator.preview_cost(self.message_config.static_name, 5000)
+
+        self.assertTrue(preview["success"])
+        self.assertEqual(preview["cost"], 2.5)
+        self.assertEqual(preview["pricing_type"], "message_based")
+
+    def test_schedule_is_compiled_once_and_invalidated_with_the_config(self):
+        first = AIPricingCalculator.get_pricing_schedule(self.hybrid_config.static_name)
+        self.assertIs(AIPricingCalculator.get_pricing_schedule(self.hybrid_config.static_name), first)
+
+        self.hybrid_config.hybrid_base_cost = Decimal("5.00")
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.hybrid_config.save()
+            # Nothing is invalidated before the change is committed
+            self.assertIs(AIPricingCalculator.get_pricing_schedule(self.hybrid_config.static_name), first)
+        self.assertTrue(callbacks)
+
+        updated = AIPricingCalculator.get_pricing_schedule(self.hybrid_config.static_name)
+        self.assertEqual(updated.base_cost, 5.0)
+        self.assertNotEqual(updated.version, first.version)
+
+    def test_batch_preview_resolves_bypass_once(self):
+        messages = [{"text": "x" * 1500, "max_tokens": 1700}, {"text": "hi"}, {"text": "y" * 3000}]
+
+        with mock.patch(
+            "apps.ai_chat.services.ai_pricing_calculator.SubscriptionService.has_premium_access", return_value=False
+        ) as has_premium:
+            result = AIPricingCalculator.batch_preview(self.user, self.hybrid_config.static_name, messages)
+
+        has_premium.assert_called_once()
+        self.assertEqual([m["message_index"] for m in result["messages"]], [1, 2, 3])
+        expected = [
+            AIPricingCalculator.preview_cost(self.hybrid_config.static_name, len(m["text"]), m.get("max_tokens"))
+            for m in messages
+        ]
+        self.assertEqual(result["total_cost"], sum(e["total_cost"] for e in expected))
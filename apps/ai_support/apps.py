@@ -6,3 +6,8 @@ class AiSupportConfig(AppConfig):
     name = 'apps.ai_support'
     verbose_name = 'پشتیبانی هوش مصنوعی'
 
+    def ready(self):
+        try:
+            import apps.ai_support.signals
+        except ImportError:
+            pass
@@ -9,6 +9,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 
 from apps.ai_support.models import SupportSession, SupportMessage, SupportAIConfig
+from base_utils.facades.ai_clients import AIClientRegistry
 from base_utils.services import AbstractBaseService
 
 User = get_user_model()
@@ -35,9 +36,11 @@ class OpenRouterAIService(AbstractBaseService):
         if not config.api_key:
             raise Exception("API key is not configured")
         
-        return OpenAI(
+        return AIClientRegistry.get_client(
             api_key=config.api_key,
-            base_url=config.base_url
+            base_url=config.base_url,
+            model=config.model_name,
+            tag=AIClientRegistry.tag_for(config),
         )
     
     @staticmethod
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.ai_support.models import SupportAIConfig
+from base_utils.facades.ai_clients import AIClientRegistry
+
+
+@receiver([post_save, post_delete], sender=SupportAIConfig)
+def invalidate_ai_clients(sender, instance, **kwargs):
+    """Drop pooled AI clients built from this config"""
+    AIClientRegistry.invalidate_tag(AIClientRegistry.tag_for(instance))
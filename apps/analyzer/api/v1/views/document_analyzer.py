@@ -14,6 +14,8 @@ from apps.analyzer.api.v1.serializers.analyzer import (
     AnalyzerLogSerializer,
 )
 from apps.wallet.services.wallet import WalletService
+from base_utils.facades.blob_staging import BlobStaging
+from base_utils.file_processor import FileProcessorService
 from base_utils.permissions import HasTainoMobileUserPermission
 from base_utils.views.mobile import TainoMobileGenericViewSet
 from rest_framework.exceptions import ValidationError
@@ -99,11 +101,12 @@ class DocumentAnalyzerViewSet(TainoMobileGenericViewSet):
                 raise ValidationError(pricing_result.get("error", "خطا در محاسبه قیمت"))
 
             # Check if it's free (bypass)
+            total_cost = pricing_result.get("total_cost", 0)
+            reference_id = f"doc_analyzer_{ai_type}_{validated_data.get('ai_session_id', 'none')}"
             if pricing_result.get("is_free"):
                 print(f"Free document analysis for user {user.pid}: {pricing_result.get('bypass_reason')}", flush=True)
             else:
-                # Check balance and charge
-                total_cost = pricing_result.get("total_cost", 0)
+                # Check balance (charged once the files are staged)
                 coin_balance = WalletService.get_wallet_coin_balance(user)
 
                 description_parts = [f"تحلیل اسناد با {ai_type}"]
@@ -116,53 +119,58 @@ class DocumentAnalyzerViewSet(TainoMobileGenericViewSet):
                 if coin_balance < total_cost:
                     raise ValidationError(f"موجودی ناکافی: {total_cost} سکه نیاز است، {coin_balance} سکه موجود است")
 
-                WalletService.use_coins(
-                    user=user,
-                    coin_amount=total_cost,
-                    description=description,
-                    reference_id=f"doc_analyzer_{ai_type}_{validated_data.get('ai_session_id', 'none')}",
-                )
-
-            # آماده‌سازی فایل‌ها و صدا برای task
-            files_data = []
-            if files:
-                import base64
+            from apps.analyzer.tasks import document_analyzer_task
 
+            # Stage, charge, queue: if anything fails the staged blobs are removed and the charge
+            # refunded, so a user is never charged for a task that does not exist
+            staged, charged = [], False
+            try:
+                # آماده‌سازی فایل‌ها و صدا برای task
+                # Files are staged and only their references go through the broker; the content hash
+                # comes from the inspection the pricing above already did
                 for file in files:
-                    file.seek(0)
-                    files_data.append(
-                        {
-                            "name": file.name,
-                            "content_type": file.content_type,
-                            "content_b64": base64.b64encode(file.read()).decode("utf-8"),
-                        }
+                    staged.append(BlobStaging.stage(file, sha256=FileProcessorService.inspect(file).sha256))
+                files_data = list(staged)
+
+                # ✅ Prepare voice data
+                voice_data = None
+                if voice_file:
+                    voice_data = {
+                        **BlobStaging.stage(voice_file),
+                        "filename": voice_file.name,
+                        "duration": voice_duration,  # ✅ BACKEND-VALIDATED DURATION
+                    }
+                    staged.append(voice_data)
+                    print(f"✅ Voice data prepared with backend duration: {voice_data['duration']}s", flush=True)
+
+                if not pricing_result.get("is_free"):
+                    WalletService.use_coins(
+                        user=user,
+                        coin_amount=total_cost,
+                        description=description,
+                        reference_id=reference_id,
                     )
-
-            # ✅ Prepare voice data
-            voice_data = None
-            if voice_file:
-                import base64
-
-                voice_file.seek(0)
-                voice_data = {
-                    "filename": voice_file.name,
-                    "content_type": voice_file.content_type,
-                    "content_b64": base64.b64encode(voice_file.read()).decode("utf-8"),
-                    "duration": voice_duration,  # ✅ BACKEND-VALIDATED DURATION
-                }
-                print(f"✅ Voice data prepared with backend duration: {voice_data['duration']}s", flush=True)
-
-            # ارسال به task
-            from apps.analyzer.tasks import document_analyzer_task
-
-            task = document_analyzer_task.delay(
-                user_pid=str(user.pid),
-                prompt=prompt,
-                files_data=files_data if files_data else None,
-                voice_data=voice_data,  # ✅ ADD VOICE
-                ai_session_id=validated_data.get("ai_session_id"),
-                ai_type=ai_type,
-            )
+                    charged = True
+
+                # ارسال به task
+                task = document_analyzer_task.delay(
+                    user_pid=str(user.pid),
+                    prompt=prompt,
+                    files_data=files_data if files_data else None,
+                    voice_data=voice_data,  # ✅ ADD VOICE
+                    ai_session_id=validated_data.get("ai_session_id"),
+                    ai_type=ai_type,
+                )
+            except Exception:
+                BlobStaging.discard(staged)
+                if charged:
+                    WalletService.refund_coins(
+                        user=user,
+                        coin_amount=total_cost,
+                        description=f"بازگشت هزینه تحلیل اسناد ارسال نشده با {ai_type}",
+                        reference_id=reference_id,
+                    )
+                raise
 
             return Response(
                 {
@@ -1,17 +1,23 @@
 # apps/analyzer/tasks.py
-import base64
 import logging
 from celery import shared_task
 from django.contrib.auth import get_user_model
-from openai import OpenAI
 
 from apps.analyzer.models import AnalyzerLog
 from apps.ai_chat.models import AISession, ChatAIConfig
+from apps.ai_chat.services.config_cache import ChatAIConfigCache
+from base_utils.facades.ai_clients import AIClientRegistry
+from base_utils.facades.blob_staging import BlobStaging
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
+def _read_b64(data: dict) -> str:
+    # Tasks queued before blob staging still carry the content inline
+    return data.get("content_b64") or BlobStaging.b64encode(data)
+
+
 @shared_task(bind=True)
 def document_analyzer_task(
     self,
@@ -24,14 +30,16 @@ def document_analyzer_task(
 ):
     try:
         user = User.objects.get(pid=user_pid)
-        ai_config = ChatAIConfig.objects.filter(static_name=ai_type, is_active=True).first()
+        ai_config = ChatAIConfigCache.get_by_static_name(ai_type)
 
         if not ai_config:
             return {"status": "error", "message": f"AI configuration '{ai_type}' not found"}
 
-        client = OpenAI(
+        client = AIClientRegistry.get_client(
             base_url=ai_config.base_url or "https://openrouter.ai/api/v1",
             api_key=ai_config.api_key,
+            model=ai_config.model_name,
+            tag=AIClientRegistry.tag_for(ai_config),
         )
 
         # Build messages
@@ -45,7 +53,7 @@ def document_analyzer_task(
             print(f"🎙️ Adding voice: {voice_data['filename']}", flush=True)
 
             content_type = voice_data.get("content_type", "audio/wav")  # ✅ حالا wav است
-            content_b64 = voice_data.get("content_b64", "")
+            content_b64 = _read_b64(voice_data)
 
             # ✅ فرمت اکنون wav است
             audio_format = "wav"
@@ -69,13 +77,12 @@ def document_analyzer_task(
                 try:
                     file_name = file_info.get("name", f"file_{idx}")
                     content_type = file_info.get("content_type", "")
-                    content_b64 = file_info.get("content_b64", "")
-
-                    if not content_b64:
+                    if not file_info.get("size") and not file_info.get("content_b64"):
                         continue
 
                     if content_type.startswith("image/") or content_type == "application/pdf":
                         # برای تصاویر و PDF از data URL استفاده کنید
+                        content_b64 = _read_b64(file_info)
                         data_url = f"data:{content_type};base64,{content_b64}"
 
                         user_content.append({"type": "image_url", "image_url": {"url": data_url, "detail": "high"}})
@@ -141,3 +148,14 @@ def document_analyzer_task(
         print(f"❌ Error: {e}", flush=True)
         logger.error(f"Error in document_analyzer_task: {e}", exc_info=True)
         return {"status": "error", "message": str(e)}
+
+    finally:
+        BlobStaging.discard([*(files_data or []), voice_data])
+
+
+@shared_task
+def purge_staged_blobs():
+    """Remove staged analyzer uploads whose task never cleaned them up"""
+    deleted = BlobStaging.purge_expired()
+    logger.info(f"Purged {deleted} staged blobs")
+    return deleted
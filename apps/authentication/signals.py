@@ -1,13 +1,17 @@
 # apps/authentication/signals.py
 import logging
-from django.db.models.signals import pre_save
+from django.contrib.auth import get_user_model
+from django.db.models.signals import pre_save, post_save
 from django.dispatch import receiver
 from django.db import IntegrityError
 from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
 
 from apps.authentication.models import UserProfile
+from base_utils.middlewares.websocket_token_auth import WebsocketUserResolver
 
 logger = logging.getLogger(__name__)
+User = get_user_model()
 
 
 @receiver(pre_save, sender=UserProfile)
@@ -28,3 +32,21 @@ def prevent_multiple_secretaries(sender, instance, **kwargs):
                 f"who already has secretary {existing_secretary.user.pid}"
             )
             raise IntegrityError(_("This lawyer already has a secretary. Please remove the current secretary first."))
+
+
+@receiver(post_save, sender=User)
+def revoke_websocket_user(sender, instance, created, **kwargs):
+    """
+    Drop the cached websocket user so the next connect sees the change (deactivation, role...)
+    """
+    if not created:
+        WebsocketUserResolver.revoke_user(instance.pid)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def revoke_websocket_user_on_logout(sender, instance, created, **kwargs):
+    """
+    A blacklisted refresh token means the user logged out, websocket reconnects must re-authenticate
+    """
+    if created and instance.token.user:
+        WebsocketUserResolver.revoke_user(instance.token.user.pid)
@@ -67,6 +67,8 @@ class AdminChatMessageSerializer(TainoBaseModelSerializer):
     """
 
     sender = AdminChatUserSerializer(read_only=True)
+    is_read_by_client = serializers.SerializerMethodField()
+    is_read_by_consultant = serializers.SerializerMethodField()
 
     class Meta:
         model = ChatMessage
@@ -81,7 +83,6 @@ class AdminChatMessageSerializer(TainoBaseModelSerializer):
             "is_system",
             "is_read_by_client",
             "is_read_by_consultant",
-            "read_at",
             "is_failed",
             "failure_reason",
             "is_active",
@@ -90,6 +91,12 @@ class AdminChatMessageSerializer(TainoBaseModelSerializer):
             "updated_at",
         ]
 
+    def get_is_read_by_client(self, obj) -> bool:
+        return obj.chat_session.is_read_by_client(obj)
+
+    def get_is_read_by_consultant(self, obj) -> bool:
+        return obj.chat_session.is_read_by_consultant(obj)
+
 
 class AdminChatRequestSerializer(TainoBaseModelSerializer):
     """
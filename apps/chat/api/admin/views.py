@@ -39,7 +39,7 @@ class AdminChatMessageViewSet(TainoAdminListModelMixin, TainoAdminRetrieveModelM
     Admin ViewSet for chat messages
     """
 
-    queryset = ChatMessage.objects.all().order_by("-created_at")
+    queryset = ChatMessage.objects.select_related("chat_session", "sender").order_by("-created_at")
     serializer_class = AdminChatMessageSerializer
 
     @extend_schema(responses={200: AdminChatMessageSerializer(many=True)})
@@ -48,7 +48,11 @@ class AdminChatMessageViewSet(TainoAdminListModelMixin, TainoAdminRetrieveModelM
         """
         Get messages for a specific chat session
         """
-        queryset = ChatMessage.objects.filter(chat_session__pid=session_id).order_by("created_at")
+        queryset = (
+            ChatMessage.objects.filter(chat_session__pid=session_id)
+            .select_related("chat_session", "sender")
+            .order_by("created_at")
+        )
 
         page = self.paginate_queryset(queryset)
         if page is not None:
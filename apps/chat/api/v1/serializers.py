@@ -31,6 +31,8 @@ class ChatMessageSerializer(TainoBaseModelSerializer):
     """
 
     sender = ChatUserSerializer(read_only=True)
+    is_read_by_client = serializers.SerializerMethodField()
+    is_read_by_consultant = serializers.SerializerMethodField()
 
     class Meta:
         model = ChatMessage
@@ -43,11 +45,16 @@ class ChatMessageSerializer(TainoBaseModelSerializer):
             "is_system",
             "is_read_by_client",
             "is_read_by_consultant",
-            "read_at",
             "created_at",
         ]
         read_only_fields = fields
 
+    def get_is_read_by_client(self, obj) -> bool:
+        return obj.chat_session.is_read_by_client(obj)
+
+    def get_is_read_by_consultant(self, obj) -> bool:
+        return obj.chat_session.is_read_by_consultant(obj)
+
 
 class ChatMessageCreateSerializer(TainoBaseModelSerializer):
     """
@@ -90,17 +97,7 @@ class ChatMessageCreateSerializer(TainoBaseModelSerializer):
         user = self.context["request"].user
         chat_session = validated_data["chat_session"]
 
-        # Set read flags based on sender
-        if user == chat_session.client:
-            validated_data["is_read_by_client"] = True
-            chat_session.unread_consultant_messages += 1
-        else:
-            validated_data["is_read_by_consultant"] = True
-            chat_session.unread_client_messages += 1
-
-        chat_session.total_messages += 1
-        chat_session.save(update_fields=["unread_client_messages", "unread_consultant_messages", "total_messages"])
-
+        # Read flags and session counters are set by ChatMessage.save
         validated_data["sender"] = user
 
         message = super().create(validated_data)
@@ -180,7 +177,11 @@ class ChatSessionDetailSerializer(TainoBaseModelSerializer):
         """
         Get the most recent messages
         """
-        messages = ChatMessage.objects.filter(chat_session=obj, is_deleted=False).order_by("-created_at")[:10]
+        messages = (
+            ChatMessage.objects.filter(chat_session=obj, is_deleted=False)
+            .select_related("chat_session")
+            .order_by("-created_at")[:10]
+        )
 
         return ChatMessageSerializer(reversed(messages), many=True).data
 
@@ -31,6 +31,7 @@ from .serializers import (
     LawyerProposalCreateSerializer,
 )
 from apps.chat.services.chat_service import ChatService
+from base_utils.structured_pages.pagination import KeysetPagination
 from base_utils.views.mobile import (
     TainoMobileCreateModelMixin,
     TainoMobileRetrieveModelMixin,
@@ -152,9 +153,10 @@ class ChatMessageViewSet(TainoMobileListModelMixin, TainoMobileCreateModelMixin,
     """
 
     serializer_class = ChatMessageSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        return ChatMessage.objects.all()
+        return ChatMessage.objects.select_related("chat_session")
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -175,7 +177,11 @@ class ChatMessageViewSet(TainoMobileListModelMixin, TainoMobileCreateModelMixin,
                 return Response({"detail": _("You are not a participant in this chat")}, status=status.HTTP_403_FORBIDDEN)
 
             # Get messages
-            queryset = ChatMessage.objects.filter(chat_session=chat_session, is_deleted=False).order_by("created_at")
+            queryset = (
+                ChatMessage.objects.filter(chat_session=chat_session, is_deleted=False)
+                .select_related("chat_session")
+                .order_by("created_at")
+            )
 
             # Pagination
             page = self.paginate_queryset(queryset)
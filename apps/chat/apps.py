@@ -7,8 +7,8 @@ class ChatConfig(AppConfig):
     name = "apps.chat"
     verbose_name = "چت"
 
-    # def ready(self):
-    #     try:
-    #         import apps.chat.signals
-    #     except ImportError:
-    #         pass
+    def ready(self):
+        try:
+            import apps.chat.cache_signals
+        except ImportError:
+            pass
@@ -0,0 +1,18 @@
+# apps/chat/cache_signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.chat.models import ChatMessage
+from apps.chat.services.history_snapshot import ChatMessageHistorySnapshot
+from apps.soft_delete.signals import post_restore
+
+# Cache invalidation receivers. Kept apart from apps.chat.signals, whose MongoDB sync receivers
+# are not connected.
+
+
+@receiver([post_save, post_delete, post_restore], sender=ChatMessage)
+def invalidate_chat_history_snapshot(sender, instance, **kwargs):
+    """Retire the cached history frame of the message's session once the change is committed"""
+    session_pk = instance.chat_session_id
+    transaction.on_commit(lambda: ChatMessageHistorySnapshot.invalidate(session_pk))
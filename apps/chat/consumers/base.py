@@ -1,14 +1,19 @@
 # apps/chat/consumers/base.py
+import asyncio
 import json
 import logging
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
 from apps.chat.models import ChatSession, ChatMessage
+from apps.chat.services.history_snapshot import ChatMessageHistorySnapshot
+from base_utils.facades.ai_response_supervisor import AIResponseSupervisor
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -25,6 +30,13 @@ class BaseTainoAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
         self.session_id = None
         self.chat_session = None
         self.room_group_name = None
+        # Read receipt debouncing: monotonic time of the last write, latest unwritten read mark
+        self._read_written_at = None
+        self._read_pending_at = None
+        self._read_flush_task = None
+        # Consultant subscription, re-checked at most every CHAT_SUBSCRIPTION_CHECK_SECONDS
+        self._subscription = None
+        self._subscription_checked_at = None
 
     async def connect(self):
         """
@@ -62,6 +74,7 @@ class BaseTainoAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
 
         # Mark messages as read for the connected user
         await self.mark_messages_as_read()
+        self._read_written_at = time.monotonic()
 
         # Send recent messages
         await self.send_recent_messages()
@@ -70,6 +83,17 @@ class BaseTainoAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
         """
         Disconnect from WebSocket
         """
+        if getattr(settings, "AI_RESPONSE_CANCEL_ON_DISCONNECT", True):
+            AIResponseSupervisor.get_default().cancel_owner(self.channel_name)
+
+        # Write the read mark still waiting for its debounce window
+        if self._read_flush_task and not self._read_flush_task.done():
+            self._read_flush_task.cancel()
+        try:
+            await self.flush_read_receipt()
+        except Exception as e:
+            logger.error(f"Error flushing read receipt: {e}")
+
         if self.room_group_name:
             await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
 
@@ -147,37 +171,45 @@ class BaseTainoAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
             return None
 
     @database_sync_to_async
-    def mark_messages_as_read(self):
+    def mark_messages_as_read(self, at=None):
         """
-        Mark messages as read for the connected user
+        Mark messages (up to ``at``) as read for the connected user
         """
         if not self.chat_session:
             return
 
         if self.user == self.chat_session.client:
-            self.chat_session.mark_all_read_for_client()
+            self.chat_session.mark_all_read_for_client(at)
         elif self.user == self.chat_session.consultant:
-            self.chat_session.mark_all_read_for_consultant()
+            self.chat_session.mark_all_read_for_consultant(at)
+
+    def get_consultant_subscription(self):
+        """
+        Active subscription of the consultant, cached on the connection for a short while
+        """
+        from apps.chat.models import ChatSubscription
+
+        now = time.monotonic()
+        ttl = getattr(settings, "CHAT_SUBSCRIPTION_CHECK_SECONDS", 30)
+        if self._subscription_checked_at is None or now - self._subscription_checked_at >= ttl:
+            self._subscription = ChatSubscription.objects.filter(
+                user=self.user, is_active=True, end_date__gte=timezone.now()
+            ).first()
+            self._subscription_checked_at = now
+
+        if self._subscription and self._subscription.end_date < timezone.now():
+            return None
+        return self._subscription
 
     @database_sync_to_async
-    def get_recent_messages(self, limit=20) -> list:
+    def get_history_payload(self) -> Optional[str]:
         """
-        Get recent messages for the chat session
+        Encoded history frame with the recent messages of the session
         """
         if not self.chat_session:
-            return []
-        messages = (
-            ChatMessage.objects.filter(chat_session=self.chat_session, is_deleted=False)
-            .select_related("sender")  # ✅ pre-fetch sender to avoid lazy loading
-            .order_by("-created_at")[:limit]
-        )
+            return None
 
-        # messages = ChatMessage.objects.filter(chat_session=self.chat_session, is_deleted=False).order_by("-created_at")[
-        #     :limit
-        # ]
-        print(f"messs::: {messages=}", flush=True)
-        # Ctainoert to list
-        return list(reversed(messages))
+        return ChatMessageHistorySnapshot.get_payload(self.chat_session.pk)
 
     @database_sync_to_async
     def create_message(self, content) -> Optional[ChatMessage]:
@@ -204,11 +236,7 @@ class BaseTainoAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
         try:
             # Check if user can send messages (subscription limits for consultant)
             if self.user == self.chat_session.consultant:
-                from apps.chat.models import ChatSubscription
-
-                subscription = ChatSubscription.objects.filter(
-                    user=self.user, is_active=True, end_date__gte=timezone.now()
-                ).first()
+                subscription = self.get_consultant_subscription()
 
                 if not subscription or subscription.remaining_minutes <= 0:
                     return None
@@ -219,25 +247,14 @@ class BaseTainoAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
             if not message_text:
                 return None
 
-            # Create message
+            # Create message; read flags and session counters are set by ChatMessage.save
             message = ChatMessage.objects.create(
                 chat_session=self.chat_session,
                 sender=self.user,
                 message_type=message_type,
                 content=message_text,
-                is_read_by_client=self.user == self.chat_session.client,
-                is_read_by_consultant=self.user == self.chat_session.consultant,
             )
 
-            # Update unread counts
-            if self.user == self.chat_session.client:
-                self.chat_session.unread_consultant_messages += 1
-            else:
-                self.chat_session.unread_client_messages += 1
-
-            self.chat_session.total_messages += 1
-            self.chat_session.save(update_fields=["unread_client_messages", "unread_consultant_messages", "total_messages"])
-
             # Sync to MongoDB if enabled
             # from apps.chat.services.mongo_sync import MongoSyncService
             #
@@ -262,29 +279,31 @@ class BaseTainoAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
 
     async def send_recent_messages(self):
         """
-        Send recent messages to the client
+        Send recent messages to the client, as one history frame shared by every connecting socket
         """
-        messages = await self.get_recent_messages()
+        payload = await self.get_history_payload()
+        if payload is None:
+            return
 
-        for message in messages:
-            await self.send_json(
-                {
-                    "type": "chat.message",
-                    "id": str(message.pid),
-                    "sender": str(message.sender.pid),
-                    "sender_name": f"{message.sender.first_name} {message.sender.last_name}",
-                    "message": message.content,
-                    "message_type": message.message_type,
-                    "timestamp": message.created_at.isoformat(),
-                    "is_ai": message.is_ai,
-                    "is_system": message.is_system,
-                }
-            )
+        if ChatMessageHistorySnapshot.is_requested(self.scope):
+            await self.send(text_data=payload)
+            return
+
+        # Clients that still expect one frame per message
+        for message in json.loads(payload)["messages"]:
+            await self.send_json(message)
 
     async def handle_chat_message(self, content):
         """
         Handle chat message
         """
+        # Refuse before the message is created if the AI could not answer it
+        if self.chat_session.chat_type == "ai":
+            status = AIResponseSupervisor.get_default().admission_status(self.user.pk, self.session_id)
+            if AIResponseSupervisor.get_default().is_refused(status):
+                await self.send_ai_busy(status, content)
+                return
+
         message = await self.create_message(content)
 
         if not message:
@@ -330,11 +349,40 @@ class BaseTainoAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
     async def handle_read_receipt(self, content):
         """
         Handle read receipt
+
+        Receipts are debounced per connection: the first one in a window is written right away,
+        later ones only move the pending read mark, which is written (and broadcast) once when
+        the window closes.
         """
         if not self.chat_session:
             return
 
-        await self.mark_messages_as_read()
+        self._read_pending_at = timezone.now()
+        window = getattr(settings, "CHAT_READ_RECEIPT_DEBOUNCE_SECONDS", 5)
+        elapsed = window if self._read_written_at is None else time.monotonic() - self._read_written_at
+
+        if elapsed >= window:
+            await self.flush_read_receipt()
+        elif self._read_flush_task is None or self._read_flush_task.done():
+            self._read_flush_task = asyncio.ensure_future(self._flush_read_receipt_later(window - elapsed))
+
+    async def _flush_read_receipt_later(self, delay):
+        await asyncio.sleep(delay)
+        try:
+            await self.flush_read_receipt()
+        except Exception as e:
+            logger.error(f"Error flushing read receipt: {e}")
+
+    async def flush_read_receipt(self):
+        """
+        Write the pending read mark and tell the room
+        """
+        at, self._read_pending_at = self._read_pending_at, None
+        if at is None:
+            return
+
+        self._read_written_at = time.monotonic()
+        await self.mark_messages_as_read(at)
 
         await self.channel_layer.group_send(
             self.room_group_name,
@@ -342,41 +390,62 @@ class BaseTainoAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
                 "type": "message_read",
                 "user": str(self.user.pid),
                 "user_name": f"{self.user.first_name} {self.user.last_name}",
-                "timestamp": timezone.now().isoformat(),
+                "timestamp": at.isoformat(),
             },
         )
 
     async def process_ai_response(self, user_message):
         """
-        Process AI response for AI chat
+        Process AI response for AI chat, as a task of the per-process AI response supervisor
         """
-        import asyncio
-
-        # First send the typing indicator
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                "type": "user_typing",
-                "user": "ai",
-                "user_name": "هوش مصنوعی",
-                "is_typing": True,
-            },
+        _, status = AIResponseSupervisor.get_default().submit(
+            lambda: self._generate_ai_response(user_message),
+            owner=self.channel_name,
+            user=self.user.pk,
+            session=self.session_id,
+            on_timeout=lambda: self.send_ai_busy("timeout"),
         )
 
-        # Create a background task for AI processing (don't await it)
-        asyncio.create_task(self._generate_ai_response(user_message))
-
         # Return immediately so we don't block the WebSocket
-        return None
+        if status != AIResponseSupervisor.STARTED:
+            await self.send_ai_busy(status)
+
+    async def send_ai_busy(self, status, original_content=None):
+        """
+        Tell this client its message is queued, or that the AI can't take it right now
+        """
+        queued = status == AIResponseSupervisor.QUEUED
+        frame = {
+            "type": "chat.busy",
+            "status": status,
+            "queued": queued,
+            "message": (
+                "پیام شما در صف پاسخگویی قرار گرفت."
+                if queued
+                else "هوش مصنوعی در حال حاضر مشغول است. لطفاً چند لحظه دیگر دوباره تلاش کنید."
+            ),
+            "timestamp": timezone.now().isoformat(),
+        }
+        if original_content is not None:
+            frame["original_content"] = original_content
+        await self.send_json(frame)
 
     async def _generate_ai_response(self, user_message):
         """
         Background task to generate AI response
         """
         from apps.chat.services.chat_service import ChatService
-        import logging
 
-        logger = logging.getLogger(__name__)
+        # Send the typing indicator once the response has a slot, not while it is queued
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                "type": "user_typing",
+                "user": "ai",
+                "user_name": "هوش مصنوعی",
+                "is_typing": True,
+            },
+        )
 
         try:
             # Call AI service to generate response - no need to pass AI config directly
@@ -1,8 +1,10 @@
 # apps/chat/models/chat_message.py
 from django.db import models
+from django.db.models import F
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 
+from apps.chat.models.chat_session import ChatSession
 from apps.notification.services.alarm import NotificationService
 from base_utils.base_models import TimeStampModel, ActivableModel, AdminStatusModel
 
@@ -48,7 +50,8 @@ class ChatMessage(TimeStampModel, ActivableModel, AdminStatusModel):
     is_ai = models.BooleanField(default=False, verbose_name=_("پیام هوش مصنوعی"))
     is_system = models.BooleanField(default=False, verbose_name=_("پیام سیستمی"))
 
-    # Read status
+    # Read status: only the sender's own flag is set here, reads are the session's read marks
+    # (``ChatSession.is_read_by_client``/``is_read_by_consultant``). ``read_at`` is no longer written.
     is_read_by_client = models.BooleanField(default=False, verbose_name=_("خوانده شده توسط کاربر"))
     is_read_by_consultant = models.BooleanField(default=False, verbose_name=_("خوانده شده توسط مشاور"))
     read_at = models.DateTimeField(null=True, blank=True, verbose_name=_("زمان خوانده شدن"))
@@ -66,7 +69,8 @@ class ChatMessage(TimeStampModel, ActivableModel, AdminStatusModel):
         verbose_name_plural = _("پیام‌های گفتگو")
         ordering = ["created_at"]
         indexes = [
-            models.Index(fields=["chat_session"]),
+            # Also serves plain chat_session lookups; the keyset pagination of the history walks it
+            models.Index(fields=["chat_session", "created_at", "id"]),
             models.Index(fields=["sender"]),
             models.Index(fields=["message_type"]),
             models.Index(fields=["is_read_by_client"]),
@@ -82,9 +86,10 @@ class ChatMessage(TimeStampModel, ActivableModel, AdminStatusModel):
         # Update read status based on sender
         if is_new:
             session = self.chat_session
+            counters = {"total_messages": F("total_messages") + 1}
             if session.client == self.sender:
                 self.is_read_by_client = True
-                session.unread_consultant_messages += 1
+                counters["unread_consultant_messages"] = F("unread_consultant_messages") + 1
                 # Add notification for consultant
                 if session.consultant:
                     NotificationService.create_notification(
@@ -95,7 +100,7 @@ class ChatMessage(TimeStampModel, ActivableModel, AdminStatusModel):
                     )
             elif session.consultant == self.sender:
                 self.is_read_by_consultant = True
-                session.unread_client_messages += 1
+                counters["unread_client_messages"] = F("unread_client_messages") + 1
                 # Add notification for client
                 NotificationService.create_notification(
                     to_user=session.client,
@@ -103,7 +108,10 @@ class ChatMessage(TimeStampModel, ActivableModel, AdminStatusModel):
                     description=f"پیغام جدید از طرف {self.sender.first_name} {self.sender.last_name}",
                     link=f"/chat/{session.pid}",
                 )
-            session.total_messages += 1
-            session.save(update_fields=["unread_client_messages", "unread_consultant_messages", "total_messages"])
 
         super().save(*args, **kwargs)
+
+        if is_new:
+            # Atomic increments: concurrent senders don't lose counts, and the rest of the session
+            # row is not rewritten
+            ChatSession.objects.filter(pk=session.pk).update(**counters)
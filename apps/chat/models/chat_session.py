@@ -1,5 +1,8 @@
 # apps/chat/models/chat_session.py
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 
@@ -72,6 +75,9 @@ class ChatSession(TimeStampModel, ActivableModel, AdminStatusModel, CreatorModel
     total_messages = models.PositiveIntegerField(default=0, verbose_name=_("تعداد کل پیام‌ها"))
     unread_client_messages = models.PositiveIntegerField(default=0, verbose_name=_("پیام‌های خوانده نشده کاربر"))
     unread_consultant_messages = models.PositiveIntegerField(default=0, verbose_name=_("پیام‌های خوانده نشده مشاور"))
+    # Read receipts are high-water marks: every message created up to them has been read
+    client_last_read_at = models.DateTimeField(null=True, blank=True, verbose_name=_("آخرین بازدید کاربر"))
+    consultant_last_read_at = models.DateTimeField(null=True, blank=True, verbose_name=_("آخرین بازدید مشاور"))
 
     # If this chat is synced to MongoDB (for the WebSocket part)
     is_synced_to_mongo = models.BooleanField(default=False, verbose_name=_("همگام‌سازی با مونگو"))
@@ -91,17 +97,53 @@ class ChatSession(TimeStampModel, ActivableModel, AdminStatusModel, CreatorModel
     def __str__(self):
         return f"{self.get_chat_type_display()} - {self.client} - {self.created_at}"
 
-    def mark_all_read_for_client(self):
-        """Mark all messages as read for the client"""
-        self.unread_client_messages = 0
-        self.save(update_fields=["unread_client_messages"])
-        self.messages.filter(is_read_by_client=False).update(is_read_by_client=True)
-
-    def mark_all_read_for_consultant(self):
-        """Mark all messages as read for the consultant"""
-        self.unread_consultant_messages = 0
-        self.save(update_fields=["unread_consultant_messages"])
-        self.messages.filter(is_read_by_consultant=False).update(is_read_by_consultant=True)
+    def _mark_all_read(self, role: str, at=None) -> bool:
+        # One UPDATE of the session row, none when nothing is unread; the read mark never moves backwards.
+        # ``at`` may be older than the latest message (debounced receipts), so the counter keeps the
+        # messages of the other party sent after it instead of dropping to 0.
+        from apps.chat.models.chat_message import ChatMessage
+
+        at = at or timezone.now()
+        mark_field, counter_field = f"{role}_last_read_at", f"unread_{role}_messages"
+        newer = (
+            ChatMessage.objects.filter(
+                chat_session=OuterRef("pk"),
+                sender=OuterRef("consultant" if role == "client" else "client"),
+                created_at__gt=at,
+            )
+            .order_by()
+            .values("chat_session")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        updated = (
+            ChatSession.objects.filter(pk=self.pk, **{f"{counter_field}__gt": 0})
+            .filter(Q(**{f"{mark_field}__isnull": True}) | Q(**{f"{mark_field}__lt": at}))
+            .update(**{counter_field: Coalesce(Subquery(newer, output_field=IntegerField()), 0), mark_field: at})
+        )
+        if updated:
+            setattr(self, mark_field, at)
+            # Deferred: reloaded on next access rather than read back here
+            self.__dict__.pop(counter_field, None)
+        return bool(updated)
+
+    def mark_all_read_for_client(self, at=None) -> bool:
+        """Mark all messages (up to ``at``) as read for the client"""
+        return self._mark_all_read("client", at)
+
+    def mark_all_read_for_consultant(self, at=None) -> bool:
+        """Mark all messages (up to ``at``) as read for the consultant"""
+        return self._mark_all_read("consultant", at)
+
+    def is_read_by_client(self, message) -> bool:
+        return message.is_read_by_client or bool(
+            self.client_last_read_at and message.created_at <= self.client_last_read_at
+        )
+
+    def is_read_by_consultant(self, message) -> bool:
+        return message.is_read_by_consultant or bool(
+            self.consultant_last_read_at and message.created_at <= self.consultant_last_read_at
+        )
 
     @property
     def remaining_time_seconds(self):
@@ -258,29 +258,18 @@ class ChatService(AbstractBaseService):
     @staticmethod
     def mark_messages_as_read(chat_session: ChatSession, user: User) -> int:
         """
-        Mark all unread messages as read for a user
-        """
-        count = 0
+        Mark all unread messages as read for a user, returns how many were unread
 
+        Moves the user's read mark on the session (one UPDATE) instead of flagging every message.
+        """
         if user == chat_session.client:
-            # Mark messages from consultant as read by client
-            count = chat_session.messages.filter(sender=chat_session.consultant, is_read_by_client=False).update(
-                is_read_by_client=True, read_at=timezone.now()
-            )
-
-            if count > 0:
-                chat_session.unread_client_messages = 0
-                chat_session.save(update_fields=["unread_client_messages"])
-
+            count = chat_session.unread_client_messages
+            chat_session.mark_all_read_for_client()
         elif user == chat_session.consultant:
-            # Mark messages from client as read by consultant
-            count = chat_session.messages.filter(sender=chat_session.client, is_read_by_consultant=False).update(
-                is_read_by_consultant=True, read_at=timezone.now()
-            )
-
-            if count > 0:
-                chat_session.unread_consultant_messages = 0
-                chat_session.save(update_fields=["unread_consultant_messages"])
+            count = chat_session.unread_consultant_messages
+            chat_session.mark_all_read_for_consultant()
+        else:
+            count = 0
 
         return count
 
@@ -0,0 +1,13 @@
+# apps/chat/services/history_snapshot.py
+from apps.chat.models import ChatMessage
+from base_utils.facades.history_snapshot import MessageHistorySnapshot
+
+
+class ChatMessageHistorySnapshot(MessageHistorySnapshot):
+    """History frame sent by the chat consumers on connect"""
+
+    model = ChatMessage
+    SESSION_FIELD = "chat_session"
+    CACHE_PREFIX = "chat:history"
+    HISTORY_TYPE = "chat.history"
+    MESSAGE_TYPE = "chat.message"
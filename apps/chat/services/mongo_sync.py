@@ -143,9 +143,8 @@ class MongoSyncService:
                 "attachment_id": str(message.attachment.pid) if message.attachment else None,
                 "is_ai": message.is_ai,
                 "is_system": message.is_system,
-                "is_read_by_client": message.is_read_by_client,
-                "is_read_by_consultant": message.is_read_by_consultant,
-                "read_at": message.read_at,
+                "is_read_by_client": message.chat_session.is_read_by_client(message),
+                "is_read_by_consultant": message.chat_session.is_read_by_consultant(message),
                 "created_at": message.created_at,
                 "updated_at": message.updated_at,
                 "is_active": message.is_active,
@@ -222,7 +221,6 @@ class MongoSyncService:
                         message.is_read_by_consultant = mongo_message.get(
                             "is_read_by_consultant", message.is_read_by_consultant
                         )
-                        message.read_at = mongo_message.get("read_at", message.read_at)
                         message.is_failed = mongo_message.get("is_failed", message.is_failed)
                         message.failure_reason = mongo_message.get("failure_reason", message.failure_reason)
                         message.is_deleted = mongo_message.get("is_deleted", message.is_deleted)
@@ -0,0 +1,43 @@
+import json
+
+from model_bakery import baker
+
+from apps.chat.models import ChatMessage, ChatSession
+from apps.chat.services.history_snapshot import ChatMessageHistorySnapshot
+from base_utils.base_tests import LocMemCacheTestMixin, TainoBaseServiceTestCase
+
+
+class ChatMessageHistorySnapshotTest(LocMemCacheTestMixin, TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        ChatMessageHistorySnapshot._local.clear()
+        self.chat_session = baker.make(ChatSession, client=self.user)
+        for i in range(3):
+            self.add_message(f"message {i}")
+
+    def tearDown(self):
+        ChatMessageHistorySnapshot._local.clear()
+        super().tearDown()
+
+    def add_message(self, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return baker.make(ChatMessage, chat_session=self.chat_session, sender=self.user, content=content)
+
+    def test_snapshot_uses_the_chat_frame_types(self):
+        snapshot = json.loads(ChatMessageHistorySnapshot.get_payload(self.chat_session.pk))
+
+        self.assertEqual(snapshot["type"], "chat.history")
+        self.assertEqual(snapshot["messages"][0]["type"], "chat.message")
+
+    def test_new_and_deleted_messages_retire_the_snapshot(self):
+        ChatMessageHistorySnapshot.get_payload(self.chat_session.pk)
+
+        message = self.add_message("message 3")
+        snapshot = json.loads(ChatMessageHistorySnapshot.get_payload(self.chat_session.pk))
+        self.assertEqual(snapshot["messages"][-1]["message"], "message 3")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            message.delete()
+        snapshot = json.loads(ChatMessageHistorySnapshot.get_payload(self.chat_session.pk))
+        self.assertEqual(snapshot["messages"][-1]["message"], "message 2")
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from model_bakery import baker
+
+from apps.chat.models import ChatMessage, ChatSession
+from apps.chat.services.chat_service import ChatService
+from base_utils.base_tests import TainoBaseServiceTestCase
+
+
+class ChatReadReceiptsTest(TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.consultant = baker.make(self.user.__class__)
+        self.chat_session = baker.make(ChatSession, client=self.user, consultant=self.consultant)
+
+    def send(self, sender, content="hi"):
+        return baker.make(ChatMessage, chat_session=self.chat_session, sender=sender, content=content)
+
+    def test_counters_are_incremented_once_per_message(self):
+        self.send(self.user)
+        self.send(self.user)
+        self.send(self.consultant)
+
+        self.chat_session.refresh_from_db()
+        self.assertEqual(self.chat_session.total_messages, 3)
+        self.assertEqual(self.chat_session.unread_consultant_messages, 2)
+        self.assertEqual(self.chat_session.unread_client_messages, 1)
+
+    def test_mark_all_read_is_one_update_and_skipped_when_nothing_is_unread(self):
+        message = self.send(self.user)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(self.chat_session.mark_all_read_for_consultant())
+        with self.assertNumQueries(1):
+            self.assertFalse(self.chat_session.mark_all_read_for_consultant())
+
+        self.chat_session.refresh_from_db()
+        self.assertEqual(self.chat_session.unread_consultant_messages, 0)
+        self.assertTrue(self.chat_session.is_read_by_consultant(message))
+        message.refresh_from_db()
+        self.assertFalse(message.is_read_by_consultant)
+
+    def test_read_mark_never_moves_backwards(self):
+        self.send(self.consultant)
+        now = timezone.now()
+        self.chat_session.mark_all_read_for_client(now)
+
+        self.send(self.consultant)
+        self.assertFalse(self.chat_session.mark_all_read_for_client(now - timedelta(minutes=1)))
+
+        self.chat_session.refresh_from_db()
+        self.assertEqual(self.chat_session.client_last_read_at, now)
+        self.assertEqual(self.chat_session.unread_client_messages, 1)
+
+    def test_messages_after_the_read_mark_stay_unread(self):
+        self.send(self.consultant)
+        self.chat_session.mark_all_read_for_client()
+        later = self.send(self.consultant)
+        later.created_at = self.chat_session.client_last_read_at + timedelta(seconds=1)
+
+        self.assertFalse(self.chat_session.is_read_by_client(later))
+
+    def test_message_inside_the_debounce_window_stays_unread(self):
+        self.send(self.consultant)
+        receipt_at = timezone.now()
+        inside_window = self.send(self.consultant)
+        ChatMessage.objects.filter(pk=inside_window.pk).update(created_at=receipt_at + timedelta(seconds=1))
+        inside_window.refresh_from_db()
+
+        # Delayed flush of the receipt taken before that message
+        self.assertTrue(self.chat_session.mark_all_read_for_client(receipt_at))
+
+        self.chat_session.refresh_from_db()
+        self.assertEqual(self.chat_session.unread_client_messages, 1)
+        self.assertFalse(self.chat_session.is_read_by_client(inside_window))
+
+        # The next receipt still moves the mark past it
+        self.assertTrue(self.chat_session.mark_all_read_for_client(receipt_at + timedelta(seconds=2)))
+        self.chat_session.refresh_from_db()
+        self.assertEqual(self.chat_session.unread_client_messages, 0)
+        self.assertTrue(self.chat_session.is_read_by_client(inside_window))
+
+    def test_service_returns_the_number_of_messages_read(self):
+        self.send(self.consultant)
+        self.send(self.consultant)
+        self.chat_session.refresh_from_db()
+
+        self.assertEqual(ChatService.mark_messages_as_read(self.chat_session, self.user), 2)
@@ -0,0 +1,63 @@
+# apps/crm_hub/management/commands/benchmark_campaign_dispatch.py
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.crm_hub.models import CRMCampaign
+from apps.crm_hub.services.dispatcher import CampaignDispatcher
+from apps.crm_hub.services.gateways import StubCampaignGateway
+
+
+class Command(BaseCommand):
+    help = "Dispatch a campaign to existing users through a stub gateway and report throughput (rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("campaign", type=str, help="static_name of the campaign")
+        parser.add_argument("--users", type=int, default=1000, help="number of active users to target")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.05,
+            help="simulated provider round trip per gateway call, in seconds",
+        )
+
+    def handle(self, *args, **options):
+        campaign = CRMCampaign.objects.filter(static_name=options["campaign"]).first()
+        if not campaign:
+            raise CommandError("Campaign not found")
+
+        users = list(
+            get_user_model().objects.filter(is_active=True).select_related("crm_engagement")[: options["users"]]
+        )
+        if not users:
+            raise CommandError("No active users")
+
+        gateway = StubCampaignGateway(latency=options["latency"])
+        dispatcher = CampaignDispatcher(campaign, gateway=gateway)
+        chunk_size = options["chunk_size"]
+
+        # Nothing the run writes (notification logs, in-app notifications) is kept
+        with transaction.atomic():
+            started = time.perf_counter()
+            sent = failed = skipped = 0
+            for i in range(0, len(users), chunk_size):
+                results = dispatcher.dispatch(users[i:i + chunk_size])
+                sent += results["total_sent"]
+                failed += results["total_failed"]
+                skipped += results["total_skipped"]
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+
+        deliveries = sent + failed + skipped
+        self.stdout.write(
+            f"{len(users)} users x {len(campaign.channels)} channels: {deliveries} deliveries in {elapsed:.2f}s "
+            f"({deliveries / elapsed:.0f}/s)"
+        )
+        self.stdout.write(f"sent: {sent}, failed: {failed}, skipped: {skipped}")
+        for channel, calls in gateway.calls.items():
+            if calls:
+                self.stdout.write(f"{channel}: {calls} gateway calls for {gateway.recipients[channel]} recipients")
+        self.stdout.write(self.style.SUCCESS("Benchmark finished, changes rolled back"))
@@ -27,6 +27,7 @@ class CRMNotificationLog(TimeStampModel):
             ("pending", _("در انتظار")),
             ("sent", _("ارسال شده")),
             ("failed", _("ناموفق")),
+            ("skipped", _("رد شده")),
             ("delivered", _("تحویل داده شده")),
             ("opened", _("باز شده")),
             ("clicked", _("کلیک شده")),
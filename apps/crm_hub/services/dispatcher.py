@@ -0,0 +1,218 @@
+"""
+apps/crm_hub/services/dispatcher.py
+Bulk, multi-channel delivery of a campaign to a chunk of users
+"""
+import logging
+from collections import defaultdict
+from typing import List, Optional
+
+from django.conf import settings
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+
+from apps.crm_hub.models import CRMNotificationLog, NotificationChannel
+from apps.crm_hub.services.gateways import CampaignGateway
+from base_utils.base_models import bulk_create_with_pids
+
+logger = logging.getLogger(__name__)
+
+
+class CampaignDispatcher:
+    """
+    Delivers a campaign to a chunk of users through all of its channels at once.
+
+    Per chunk: the notification logs are rendered and inserted with one ``bulk_create``, every
+    channel is sent in provider-sized batches (FCM multicast, SMS.ir bulk / like-to-like, one SMTP
+    connection, one insert for in-app notifications) and the final statuses are written with one
+    ``bulk_update``. Logs with nowhere to deliver to (push to a user without device tokens) are
+    ``skipped`` rather than sent or failed. The gateway is swappable (see ``StubCampaignGateway``)
+    for offline benchmarks.
+    """
+
+    PUSH_BATCH_SIZE = 500  # FCM multicast limit
+
+    UPDATE_FIELDS = ["status", "sent_at", "error_message", "updated_at"]
+
+    def __init__(self, campaign, gateway: Optional[CampaignGateway] = None):
+        self.campaign = campaign
+        self.gateway = gateway or CampaignGateway()
+        self.sms_batch_size = getattr(settings, "CRM_SMS_BATCH_SIZE", 100)
+
+    def dispatch(self, users: list) -> dict:
+        """
+        Send the campaign to ``users`` through every configured channel
+
+        Returns:
+            Dictionary with statistics about sent notifications
+        """
+        from apps.crm_hub.services.notification import CRMNotificationService
+
+        users = list(users)
+        results = {
+            "total_users": len(users),
+            "total_sent": 0,
+            "total_failed": 0,
+            "total_skipped": 0,
+            "by_channel": {channel: {"sent": 0, "failed": 0, "skipped": 0} for channel in self.campaign.channels},
+        }
+        if not users:
+            return results
+
+        # The template context reads the engagement of every user
+        prefetch_related_objects(users, "crm_engagement")
+
+        logs_by_channel = defaultdict(list)
+        for user in users:
+            context = CRMNotificationService._build_context(user, self.campaign)
+            for channel in self.campaign.channels:
+                logs_by_channel[channel].append(self._build_log(user, channel, context))
+
+        all_logs = [log for logs in logs_by_channel.values() for log in logs]
+        bulk_create_with_pids(CRMNotificationLog.objects, all_logs, batch_size=1000)
+
+        senders = {
+            NotificationChannel.IN_APP: self._send_in_app,
+            NotificationChannel.PUSH: self._send_push,
+            NotificationChannel.SMS: self._send_sms,
+            NotificationChannel.EMAIL: self._send_email,
+        }
+        for channel, logs in logs_by_channel.items():
+            pending = [log for log in logs if log.status == "pending"]
+            sender = senders.get(channel)
+            if sender is None:
+                self._mark(pending, False, f"Unsupported channel: {channel}")
+                continue
+            if pending:
+                try:
+                    sender(pending)
+                except Exception as e:
+                    logger.error(f"Error sending {channel} batch of campaign {self.campaign.static_name}: {e}")
+                    self._mark([log for log in pending if log.status == "pending"], False, str(e))
+
+        now = timezone.now()
+        for log in all_logs:
+            log.updated_at = now
+            outcome = log.status if log.status in ("sent", "skipped") else "failed"
+            results[f"total_{outcome}"] += 1
+            results["by_channel"][log.channel][outcome] += 1
+
+        CRMNotificationLog.objects.bulk_update(all_logs, self.UPDATE_FIELDS, batch_size=1000)
+        return results
+
+    def _build_log(self, user, channel: str, context: dict) -> CRMNotificationLog:
+        """Render the channel content; logs that cannot be sent are failed right away"""
+        from apps.crm_hub.services.notification import CRMNotificationService
+
+        render = CRMNotificationService._replace_placeholders
+        campaign = self.campaign
+        log = CRMNotificationLog(
+            user=user,
+            campaign=campaign,
+            channel=channel,
+            status="pending",
+        )
+
+        error = ""
+        if channel == NotificationChannel.EMAIL:
+            if not user.email:
+                error = "User has no email address"
+            elif not campaign.email_template:
+                error = "Campaign has no email template"
+            else:
+                log.subject = render(campaign.email_subject or campaign.name, context)
+                log.content = render(campaign.email_template, context)
+        elif channel == NotificationChannel.SMS:
+            if not user.phone_number:
+                error = "User has no phone number"
+            elif not campaign.sms_template:
+                error = "Campaign has no SMS template"
+            else:
+                log.content = render(campaign.sms_template, context)
+        elif channel == NotificationChannel.PUSH:
+            if not campaign.push_title or not campaign.push_body:
+                error = "Campaign has no push notification template"
+            else:
+                log.subject = render(campaign.push_title, context)
+                log.content = render(campaign.push_body, context)
+        elif channel == NotificationChannel.IN_APP:
+            log.subject = campaign.name
+            log.content = render(campaign.push_body or campaign.description or "", context)
+        elif channel == NotificationChannel.WHATSAPP:
+            error = "WhatsApp integration not yet implemented"
+
+        if error:
+            log.status = "failed"
+            log.error_message = error
+        return log
+
+    @staticmethod
+    def _mark(logs: List[CRMNotificationLog], success: bool, error_message: str = ""):
+        now = timezone.now()
+        for log in logs:
+            if success:
+                log.status = "sent"
+                log.sent_at = now
+            else:
+                log.status = "failed"
+                log.error_message = error_message
+
+    @staticmethod
+    def _skip(logs: List[CRMNotificationLog], reason: str):
+        for log in logs:
+            log.status = "skipped"
+            log.error_message = reason
+
+    def _send_in_app(self, logs: List[CRMNotificationLog]):
+        from apps.notification.models import UserSentNotification
+
+        bulk_create_with_pids(
+            UserSentNotification.objects,
+            [
+                UserSentNotification(
+                    to_user_id=log.user_id,
+                    name=log.subject,
+                    description=log.content,
+                    link=None,
+                )
+                for log in logs
+            ],
+            batch_size=1000,
+        )
+        self._mark(logs, True)
+
+    def _send_push(self, logs: List[CRMNotificationLog]):
+        from apps.notification.models import UserNotificationToken
+
+        tokens_by_user = defaultdict(list)
+        for user_id, token in UserNotificationToken.objects.filter(
+            user_id__in={log.user_id for log in logs}
+        ).values_list("user_id", "token"):
+            tokens_by_user[user_id].append(token)
+
+        self._skip([log for log in logs if log.user_id not in tokens_by_user], "User has no device tokens")
+
+        # Users with the same rendered message share multicast batches
+        groups = defaultdict(lambda: ([], []))
+        for log in logs:
+            if log.status == "skipped":
+                continue
+            group_logs, group_tokens = groups[(log.subject, log.content)]
+            group_logs.append(log)
+            group_tokens.extend(tokens_by_user.get(log.user_id, []))
+
+        for (title, body), (group_logs, tokens) in groups.items():
+            success = True
+            for i in range(0, len(tokens), self.PUSH_BATCH_SIZE):
+                success = self.gateway.send_push_batch(title, body, tokens[i:i + self.PUSH_BATCH_SIZE]) and success
+            self._mark(group_logs, success, "" if success else "Push provider returned failure")
+
+    def _send_sms(self, logs: List[CRMNotificationLog]):
+        for i in range(0, len(logs), self.sms_batch_size):
+            batch = logs[i:i + self.sms_batch_size]
+            success = self.gateway.send_sms_batch([log.user.phone_number for log in batch], [log.content for log in batch])
+            self._mark(batch, success, "" if success else "SMS service returned failure")
+
+    def _send_email(self, logs: List[CRMNotificationLog]):
+        sent = self.gateway.send_email_batch([(log.subject, log.content, log.user.email) for log in logs])
+        for log, success in zip(logs, sent):
+            self._mark([log], success, "" if success else "Email backend did not send it")
@@ -7,11 +7,14 @@ from datetime import timedelta
 from typing import Optional
 
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Q
+from django.core.cache import cache
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from apps.activity_log.models import ActivityLog
 from apps.crm_hub.models import CRMUserEngagement
+from base_utils.base_models import bulk_create_with_pids
 from base_utils.services import AbstractBaseService
 
 User = get_user_model()
@@ -23,81 +26,113 @@ class EngagementTrackingService(AbstractBaseService):
     Service for tracking and updating user engagement metrics
     """
     
+    ENGAGEMENT_FIELDS = [
+        'last_login_date',
+        'last_activity_date',
+        'total_activities',
+        'activities_last_7_days',
+        'activities_last_30_days',
+        'has_active_subscription',
+        'subscription_expire_date',
+        'subscription_days_remaining',
+        'subscription_usage_percent',
+        'engagement_score',
+        'churn_risk_score',
+        'updated_at',
+    ]
+    LAST_RUN_CACHE_KEY = "crm:engagement:last_incremental_run"
+
     @staticmethod
     def update_user_engagement(user: User) -> CRMUserEngagement:
         """
         Update or create engagement metrics for a user
         """
-        engagement, created = CRMUserEngagement.objects.get_or_create(user=user)
-        
-        now = timezone.now()
-        
-        # Get activity data
-        activities = ActivityLog.objects.filter(user=user)
-        
-        # Last login/activity
-        last_login = activities.filter(action='login').order_by('-created_at').first()
-        if last_login:
-            engagement.last_login_date = last_login.created_at
-        
-        last_activity = activities.order_by('-created_at').first()
-        if last_activity:
-            engagement.last_activity_date = last_activity.created_at
-        
-        # Activity counts
-        engagement.total_activities = activities.count()
-        
-        seven_days_ago = now - timedelta(days=7)
-        engagement.activities_last_7_days = activities.filter(
-            created_at__gte=seven_days_ago
-        ).count()
-        
-        thirty_days_ago = now - timedelta(days=30)
-        engagement.activities_last_30_days = activities.filter(
-            created_at__gte=thirty_days_ago
-        ).count()
-        
-        # Subscription data
-        EngagementTrackingService._update_subscription_data(user, engagement)
-        
-        # Calculate scores
-        engagement.engagement_score = EngagementTrackingService._calculate_engagement_score(
-            engagement
-        )
-        engagement.churn_risk_score = EngagementTrackingService._calculate_churn_risk(
-            engagement
+        return EngagementTrackingService.recompute_engagements([user.pk])[0]
+
+    @staticmethod
+    def _get_activity_stats(user_ids: list, now) -> dict:
+        """One grouped pass over the activity log: user id -> counts and last timestamps"""
+        rows = ActivityLog.objects.filter(user_id__in=user_ids).values('user_id').annotate(
+            total=Count('id'),
+            last_7_days=Count('id', filter=Q(created_at__gte=now - timedelta(days=7))),
+            last_30_days=Count('id', filter=Q(created_at__gte=now - timedelta(days=30))),
+            last_activity=Max('created_at'),
+            last_login=Max('created_at', filter=Q(action='login')),
+        ).order_by()
+        return {row['user_id']: row for row in rows}
+
+    @staticmethod
+    def _get_active_subscriptions(user_ids: list, now) -> dict:
+        """
+        User id -> most recent active subscription (start_date, end_date).
+        Secretaries with an assigned lawyer use the lawyer's subscription.
+        """
+        from apps.authentication.models import UserProfile
+        from apps.subscription.models import UserSubscription
+
+        owners = {user_id: user_id for user_id in user_ids}
+        owners.update(
+            UserProfile.objects.filter(user_id__in=user_ids, is_secretary=True, lawyer__isnull=False).values_list(
+                'user_id', 'lawyer_id'
+            )
         )
-        
-        engagement.save()
-        return engagement
-    
+
+        latest = {}
+        for owner_id, start_date, end_date in UserSubscription.objects.filter(
+            user_id__in=set(owners.values()), status='active', start_date__lte=now, end_date__gte=now
+        ).order_by('user_id', '-created_at').values_list('user_id', 'start_date', 'end_date'):
+            latest.setdefault(owner_id, (start_date, end_date))
+
+        return {user_id: latest[owner_id] for user_id, owner_id in owners.items() if owner_id in latest}
+
     @staticmethod
-    def _update_subscription_data(user: User, engagement: CRMUserEngagement):
-        """Update subscription-related metrics"""
-        try:
-            from apps.subscription.services.subscription import SubscriptionService
-            
-            has_subscription = SubscriptionService.has_active_subscription(user)
-            engagement.has_active_subscription = has_subscription
-            
-            if has_subscription:
-                active_sub = SubscriptionService.get_active_subscription(user)
-                if active_sub:
-                    engagement.subscription_expire_date = active_sub.end_date
-                    
-                    # Calculate days remaining
-                    if active_sub.end_date:
-                        delta = active_sub.end_date - timezone.now()
-                        engagement.subscription_days_remaining = max(0, delta.days)
-                        
-                        # Calculate usage percent
-                        total_days = (active_sub.end_date - active_sub.start_date).days
-                        used_days = (timezone.now() - active_sub.start_date).days
-                        if total_days > 0:
-                            engagement.subscription_usage_percent = (used_days / total_days) * 100
-        except Exception as e:
-            logger.error(f"Error updating subscription data: {e}")
-    
+    def recompute_engagements(user_ids: list) -> list:
+        """
+        Recompute the engagement of a batch of users (by primary key) with a fixed number of
+        queries: one activity aggregate, the subscription lookups and a bulk write.
+        Returns the updated CRMUserEngagement rows.
+        """
+        now = timezone.now()
+        activity_stats = EngagementTrackingService._get_activity_stats(user_ids, now)
+        subscriptions = EngagementTrackingService._get_active_subscriptions(user_ids, now)
+
+        engagements = {e.user_id: e for e in CRMUserEngagement.objects.filter(user_id__in=user_ids)}
+        missing = [CRMUserEngagement(user_id=user_id) for user_id in user_ids if user_id not in engagements]
+        if missing:
+            bulk_create_with_pids(CRMUserEngagement.objects, missing, ignore_conflicts=True)
+            engagements.update(
+                (e.user_id, e) for e in CRMUserEngagement.objects.filter(user_id__in=[e.user_id for e in missing])
+            )
+
+        for user_id, engagement in engagements.items():
+            stats = activity_stats.get(user_id)
+            if stats:
+                if stats['last_login']:
+                    engagement.last_login_date = stats['last_login']
+                engagement.last_activity_date = stats['last_activity']
+            engagement.total_activities = stats['total'] if stats else 0
+            engagement.activities_last_7_days = stats['last_7_days'] if stats else 0
+            engagement.activities_last_30_days = stats['last_30_days'] if stats else 0
+
+            subscription = subscriptions.get(user_id)
+            engagement.has_active_subscription = subscription is not None
+            if subscription:
+                start_date, end_date = subscription
+                engagement.subscription_expire_date = end_date
+                engagement.subscription_days_remaining = max(0, (end_date - now).days)
+                total_days = (end_date - start_date).days
+                if total_days > 0:
+                    engagement.subscription_usage_percent = ((now - start_date).days / total_days) * 100
+
+            engagement.engagement_score = EngagementTrackingService._calculate_engagement_score(engagement)
+            engagement.churn_risk_score = EngagementTrackingService._calculate_churn_risk(engagement)
+            engagement.updated_at = now
+
+        CRMUserEngagement.objects.bulk_update(
+            list(engagements.values()), EngagementTrackingService.ENGAGEMENT_FIELDS, batch_size=500
+        )
+        return [engagements[user_id] for user_id in user_ids if user_id in engagements]
+
     @staticmethod
     def _calculate_engagement_score(engagement: CRMUserEngagement) -> float:
         """
@@ -172,24 +207,39 @@ class EngagementTrackingService(AbstractBaseService):
         return min(100.0, risk)
     
     @staticmethod
-    def bulk_update_engagement(user_ids: list = None):
+    def bulk_update_engagement(user_ids: list = None, incremental: bool = False, batch_size: int = 1000):
         """
         Update engagement for multiple users
         If user_ids is None, updates all users
+
+        With ``incremental`` only the users with activity since the previous incremental run
+        are recomputed (all users on the first run).
         """
         if user_ids:
             users = User.objects.filter(pid__in=user_ids, is_active=True)
         else:
             users = User.objects.filter(is_active=True)
-        
+
+        started_at = timezone.now()
+        if incremental:
+            since = cache.get(EngagementTrackingService.LAST_RUN_CACHE_KEY)
+            if since:
+                users = users.filter(
+                    pk__in=ActivityLog.objects.filter(created_at__gte=since).values('user_id')
+                )
+
         updated_count = 0
-        for user in users:
+        pks = list(users.order_by('pk').values_list('pk', flat=True))
+        for i in range(0, len(pks), batch_size):
+            chunk = pks[i:i + batch_size]
             try:
-                EngagementTrackingService.update_user_engagement(user)
-                updated_count += 1
+                updated_count += len(EngagementTrackingService.recompute_engagements(chunk))
             except Exception as e:
-                logger.error(f"Error updating engagement for user {user.pid}: {e}")
-        
+                logger.error(f"Error updating engagement for users {chunk[0]}..{chunk[-1]}: {e}")
+
+        if incremental:
+            cache.set(EngagementTrackingService.LAST_RUN_CACHE_KEY, started_at, None)
+
         return updated_count
 
 
@@ -197,72 +247,77 @@ class CRMTargetingService(AbstractBaseService):
     """
     Service for finding users that match campaign criteria
     """
-    
+
+    @staticmethod
+    def _ensure_engagements(queryset, batch_size: int = 1000):
+        """Create the engagement data of targeted users that have none yet, in batches"""
+        missing = list(queryset.filter(crm_engagement__isnull=True).values_list('pk', flat=True))
+        for i in range(0, len(missing), batch_size):
+            EngagementTrackingService.recompute_engagements(missing[i:i + batch_size])
+
     @staticmethod
-    def get_campaign_targets(campaign) -> list:
+    def get_campaign_targets(campaign):
         """
-        Get list of users who should receive this campaign
+        Get the users who should receive this campaign.
+
+        Every criterion is compiled into one annotated queryset (send counts through a subquery,
+        engagement and subscription flags through the engagement join), so nothing is evaluated
+        per user in Python. Iterate it with ``iter_campaign_targets``.
         """
-        from apps.crm_hub.models import CRMCampaign, CRMNotificationLog
-        
+        from apps.crm_hub.models import CRMNotificationLog
+
+        now = timezone.now()
+        trigger_cutoff = now - timedelta(days=campaign.trigger_days)
+
         # Start with active users
         queryset = User.objects.filter(is_active=True)
-        
+
         # Filter by role if specified
         if campaign.target_user_roles:
             queryset = queryset.filter(role__static_name__in=campaign.target_user_roles)
-        
-        # Get their engagement data
-        queryset = queryset.select_related('crm_engagement')
-        
-        eligible_users = []
-        
-        for user in queryset:
-            # Check if user already received this campaign max times
-            sent_count = CRMNotificationLog.objects.filter(
-                user=user,
-                campaign=campaign
-            ).count()
-            
-            if sent_count >= campaign.max_sends_per_user:
-                continue
-            
-            # Check engagement criteria
-            if not hasattr(user, 'crm_engagement'):
-                # Create engagement data if missing
-                EngagementTrackingService.update_user_engagement(user)
-            
-            engagement = user.crm_engagement
-            
-            # Check trigger days
-            days_since_registration = (timezone.now() - user.created_at).days
-            if days_since_registration < campaign.trigger_days:
-                continue
-            
-            # Check activity requirement
-            if campaign.require_no_activity:
-                if engagement.last_activity_date:
-                    days_since_activity = (
-                        timezone.now() - engagement.last_activity_date
-                    ).days
-                    if days_since_activity < campaign.trigger_days:
-                        continue
-            
-            # Check subscription requirement
-            if campaign.require_no_subscription:
-                if engagement.has_active_subscription:
-                    continue
-            
-            # Check subscription expiration threshold
-            if campaign.subscription_expire_threshold:
-                if not engagement.has_active_subscription:
-                    continue
-                
-                if engagement.subscription_usage_percent:
-                    remaining = 100 - engagement.subscription_usage_percent
-                    if remaining > campaign.subscription_expire_threshold:
-                        continue
-            
-            eligible_users.append(user)
-        
-        return eligible_users
+
+        CRMTargetingService._ensure_engagements(queryset)
+
+        # Users who already received this campaign max times
+        sent_count = CRMNotificationLog.objects.filter(
+            campaign=campaign, user=OuterRef('pk')
+        ).order_by().values('user').annotate(count=Count('pk')).values('count')
+        queryset = queryset.annotate(
+            campaign_sent_count=Coalesce(Subquery(sent_count), 0)
+        ).filter(campaign_sent_count__lt=campaign.max_sends_per_user)
+
+        # Trigger days since registration
+        queryset = queryset.filter(created_at__lte=trigger_cutoff, crm_engagement__isnull=False)
+
+        # Activity requirement
+        if campaign.require_no_activity:
+            queryset = queryset.filter(
+                Q(crm_engagement__last_activity_date__isnull=True)
+                | Q(crm_engagement__last_activity_date__lte=trigger_cutoff)
+            )
+
+        # Subscription requirement
+        if campaign.require_no_subscription:
+            queryset = queryset.filter(crm_engagement__has_active_subscription=False)
+
+        # Subscription expiration threshold
+        if campaign.subscription_expire_threshold:
+            queryset = queryset.filter(crm_engagement__has_active_subscription=True).filter(
+                Q(crm_engagement__subscription_usage_percent__isnull=True)
+                | Q(crm_engagement__subscription_usage_percent=0)
+                | Q(crm_engagement__subscription_usage_percent__gte=100 - campaign.subscription_expire_threshold)
+            )
+
+        return queryset.select_related('crm_engagement').order_by('pk')
+
+    @staticmethod
+    def iter_campaign_targets(campaign, chunk_size: int = 500):
+        """Yield the campaign targets in lists of ``chunk_size``, streamed from the database"""
+        chunk = []
+        for user in CRMTargetingService.get_campaign_targets(campaign).iterator(chunk_size=chunk_size):
+            chunk.append(user)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
@@ -0,0 +1,94 @@
+"""
+apps/crm_hub/services/gateways.py
+Delivery gateways used by the campaign dispatcher
+"""
+import logging
+import threading
+import time
+from typing import List, Tuple
+
+from django.conf import settings
+from django.core import mail as django_mail
+
+logger = logging.getLogger(__name__)
+
+
+class CampaignGateway:
+    """
+    Sends prepared campaign batches through the real providers:
+    SMS.ir (one request per batch), FCM multicast (one Celery task per batch) and SMTP
+    (one connection per batch).
+    """
+
+    def __init__(self):
+        self._sms_manager = None
+
+    def _get_sms_manager(self):
+        # Resolving the panel line number is a request to SMS.ir, so it is done once per gateway
+        if self._sms_manager is None:
+            from apps.messaging.services.sms import IranSmsManager
+
+            self._sms_manager = IranSmsManager()
+        return self._sms_manager
+
+    def send_sms_batch(self, phone_numbers: List[str], messages: List[str]) -> bool:
+        if len(set(messages)) == 1:
+            return self._get_sms_manager().bulk_send(phone_numbers, messages[:1])
+        return self._get_sms_manager().like_to_like_send(phone_numbers, messages)
+
+    def send_push_batch(self, title: str, body: str, tokens: List[str]) -> bool:
+        from apps.notification.tasks import send_firebase_multicast_notifications_task
+
+        send_firebase_multicast_notifications_task.apply_async(
+            kwargs={"title": str(title), "message": str(body), "registration_tokens": tokens}
+        )
+        return True
+
+    def send_email_batch(self, emails: List[Tuple[str, str, str]]) -> List[bool]:
+        """
+        emails: (subject, content, to_email) tuples, sent over one SMTP connection.
+        Returns whether each email was sent, in order.
+        """
+        results = []
+        with django_mail.get_connection(fail_silently=False) as connection:
+            for subject, content, to in emails:
+                message = django_mail.EmailMessage(subject, content, settings.EMAIL_HOST_USER, [to], connection=connection)
+                try:
+                    results.append(bool(connection.send_messages([message])))
+                except Exception as e:
+                    logger.warning(f"Could not send campaign email to {to}: {e}")
+                    results.append(False)
+        return results
+
+
+class StubCampaignGateway(CampaignGateway):
+    """
+    Offline gateway for benchmarks and tests: records every batch and simulates the provider
+    round trip with ``latency`` seconds per call.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls = {"sms": 0, "push": 0, "email": 0}
+        self.recipients = {"sms": 0, "push": 0, "email": 0}
+        self._lock = threading.Lock()
+
+    def _record(self, channel: str, recipients: int):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls[channel] += 1
+            self.recipients[channel] += recipients
+
+    def send_sms_batch(self, phone_numbers: List[str], messages: List[str]) -> bool:
+        self._record("sms", len(phone_numbers))
+        return True
+
+    def send_push_batch(self, title: str, body: str, tokens: List[str]) -> bool:
+        self._record("push", len(tokens))
+        return True
+
+    def send_email_batch(self, emails: List[Tuple[str, str, str]]) -> List[bool]:
+        self._record("email", len(emails))
+        return [True] * len(emails)
@@ -260,37 +260,14 @@ class CRMNotificationService(AbstractBaseService):
         return False
     
     @staticmethod
-    def send_campaign_to_users(campaign, users: list) -> dict:
+    def send_campaign_to_users(campaign, users: list, gateway=None) -> dict:
         """
-        Send campaign to multiple users through all configured channels
+        Send campaign to multiple users through all configured channels,
+        in bulk per channel (see CampaignDispatcher)
         
         Returns:
             Dictionary with statistics about sent notifications
         """
-        results = {
-            'total_users': len(users),
-            'total_sent': 0,
-            'total_failed': 0,
-            'by_channel': {}
-        }
-        
-        for channel in campaign.channels:
-            results['by_channel'][channel] = {
-                'sent': 0,
-                'failed': 0
-            }
-        
-        for user in users:
-            for channel in campaign.channels:
-                success, log = CRMNotificationService.send_campaign_notification(
-                    user, campaign, channel
-                )
-                
-                if success:
-                    results['total_sent'] += 1
-                    results['by_channel'][channel]['sent'] += 1
-                else:
-                    results['total_failed'] += 1
-                    results['by_channel'][channel]['failed'] += 1
-        
-        return results
+        from apps.crm_hub.services.dispatcher import CampaignDispatcher
+
+        return CampaignDispatcher(campaign, gateway=gateway).dispatch(users)
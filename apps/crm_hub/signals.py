@@ -8,6 +8,7 @@ from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 
 from apps.activity_log.models import ActivityLog
+from apps.activity_log.signals import activity_logs_created
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -32,6 +33,20 @@ def update_engagement_on_activity(sender, instance, created, **kwargs):
             logger.error(f"Error triggering engagement update: {e}")
 
 
+@receiver(activity_logs_created, sender=ActivityLog)
+def update_engagement_on_activity_batch(sender, logs, **kwargs):
+    """
+    Update engagement once per user for a batch of buffered activity logs
+    """
+    try:
+        from apps.crm_hub.tasks import update_user_engagement_task
+
+        for user_pid in {log.user.pid for log in logs if log.user_id}:
+            update_user_engagement_task.apply_async(kwargs={'user_pid': user_pid}, countdown=60)
+    except Exception as e:
+        logger.error(f"Error triggering engagement update: {e}")
+
+
 @receiver(post_save, sender=User)
 def create_engagement_on_user_creation(sender, instance, created, **kwargs):
     """
@@ -12,15 +12,15 @@ User = get_user_model()
 
 
 @shared_task(name="apps.crm_hub.tasks.update_all_user_engagement")
-def update_all_user_engagement_task():
+def update_all_user_engagement_task(incremental: bool = False):
     """
     Update engagement metrics for all active users
-    Should run daily
+    Should run daily; the incremental mode (users active since the last incremental run) can run hourly
     """
     try:
         from apps.crm_hub.services.engagement import EngagementTrackingService
 
-        count = EngagementTrackingService.bulk_update_engagement()
+        count = EngagementTrackingService.bulk_update_engagement(incremental=incremental)
 
         logger.info(f"Updated engagement for {count} users")
         return {"success": True, "users_updated": count}
@@ -46,32 +46,43 @@ def process_crm_campaigns_task():
 
         total_sent = 0
         total_failed = 0
+        total_skipped = 0
         campaign_results = []
 
         for campaign in campaigns:
             try:
-                # Find eligible users
-                eligible_users = CRMTargetingService.get_campaign_targets(campaign)
+                # Stream eligible users in chunks to the sender
+                eligible_users, sent, failed, skipped, by_channel = 0, 0, 0, 0, {}
+                for users in CRMTargetingService.iter_campaign_targets(campaign):
+                    results = CRMNotificationService.send_campaign_to_users(campaign, users)
+
+                    eligible_users += results["total_users"]
+                    sent += results["total_sent"]
+                    failed += results["total_failed"]
+                    skipped += results["total_skipped"]
+                    for channel, counts in results["by_channel"].items():
+                        channel_counts = by_channel.setdefault(channel, {"sent": 0, "failed": 0, "skipped": 0})
+                        for outcome, count in counts.items():
+                            channel_counts[outcome] += count
 
                 if not eligible_users:
                     logger.info(f"No eligible users for campaign: {campaign.name}")
                     continue
 
-                logger.info(f"Processing campaign '{campaign.name}' for {len(eligible_users)} users")
+                logger.info(f"Processed campaign '{campaign.name}' for {eligible_users} users")
 
-                # Send notifications
-                results = CRMNotificationService.send_campaign_to_users(campaign, eligible_users)
-
-                total_sent += results["total_sent"]
-                total_failed += results["total_failed"]
+                total_sent += sent
+                total_failed += failed
+                total_skipped += skipped
 
                 campaign_results.append(
                     {
                         "campaign": campaign.name,
-                        "eligible_users": len(eligible_users),
-                        "sent": results["total_sent"],
-                        "failed": results["total_failed"],
-                        "by_channel": results["by_channel"],
+                        "eligible_users": eligible_users,
+                        "sent": sent,
+                        "failed": failed,
+                        "skipped": skipped,
+                        "by_channel": by_channel,
                     }
                 )
 
@@ -79,13 +90,14 @@ def process_crm_campaigns_task():
                 logger.error(f"Error processing campaign {campaign.name}: {e}")
                 campaign_results.append({"campaign": campaign.name, "error": str(e)})
 
-        logger.info(f"CRM campaigns processed. Total sent: {total_sent}, Total failed: {total_failed}")
+        logger.info(f"CRM campaigns processed. Total sent: {total_sent}, Total failed: {total_failed}, Total skipped: {total_skipped}")
 
         return {
             "success": True,
             "campaigns_processed": len(campaigns),
             "total_sent": total_sent,
             "total_failed": total_failed,
+            "total_skipped": total_skipped,
             "campaign_results": campaign_results,
         }
 
@@ -141,6 +153,7 @@ def send_campaign_to_user_task(user_pid: str, campaign_pid: str):
             "campaign": campaign.name,
             "sent": results["total_sent"],
             "failed": results["total_failed"],
+            "skipped": results["total_skipped"],
         }
 
     except User.DoesNotExist:
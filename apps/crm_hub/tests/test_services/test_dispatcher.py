@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from model_bakery import baker
+
+from apps.crm_hub.models import CRMCampaign, CRMNotificationLog
+from apps.crm_hub.services.dispatcher import CampaignDispatcher
+from apps.crm_hub.services.gateways import StubCampaignGateway
+from apps.notification.models import UserNotificationToken, UserSentNotification
+from base_utils.base_tests import TainoBaseServiceTestCase
+
+
+class CampaignDispatcherTest(TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = baker.make(get_user_model(), _quantity=4, email="", phone_number="989120000000")
+        for user in self.users:
+            baker.make(UserNotificationToken, user=user, token=f"token-{user.pk}")
+        self.campaign = baker.make(
+            CRMCampaign,
+            channels=["in_app", "push", "sms", "email"],
+            sms_template="سلام {first_name}",
+            push_title="title",
+            push_body="body",
+            email_template="",
+        )
+        self.gateway = StubCampaignGateway()
+
+    def dispatch(self):
+        return CampaignDispatcher(self.campaign, gateway=self.gateway).dispatch(self.users)
+
+    def test_dispatch_sends_every_channel_in_batches(self):
+        results = self.dispatch()
+
+        self.assertEqual(results["total_users"], 4)
+        self.assertEqual(results["by_channel"]["in_app"], {"sent": 4, "failed": 0, "skipped": 0})
+        self.assertEqual(results["by_channel"]["email"], {"sent": 0, "failed": 4, "skipped": 0})
+        self.assertEqual(self.gateway.calls["push"], 1)
+        self.assertEqual(self.gateway.recipients["push"], 4)
+        self.assertEqual(self.gateway.calls["sms"], 1)
+        self.assertEqual(UserSentNotification.objects.filter(to_user__in=self.users).count(), 4)
+        self.assertEqual(CRMNotificationLog.objects.filter(campaign=self.campaign, status="sent").count(), 12)
+
+    def test_push_without_device_tokens_is_skipped(self):
+        UserNotificationToken.objects.filter(user=self.users[0]).hard_delete()
+
+        results = self.dispatch()
+
+        self.assertEqual(results["by_channel"]["push"], {"sent": 3, "failed": 0, "skipped": 1})
+        self.assertEqual(results["total_skipped"], 1)
+        self.assertEqual(self.gateway.recipients["push"], 3)
+        log = CRMNotificationLog.objects.get(campaign=self.campaign, user=self.users[0], channel="push")
+        self.assertEqual(log.status, "skipped")
+
+    def test_email_results_are_reported_per_recipient(self):
+        class PartialEmailGateway(StubCampaignGateway):
+            def send_email_batch(self, emails):
+                super().send_email_batch(emails)
+                return [i % 2 == 0 for i in range(len(emails))]
+
+        for i, user in enumerate(self.users):
+            user.email = f"user{i}@example.com"
+            user.save(update_fields=["email"])
+        self.campaign.email_template = "سلام {first_name}"
+        self.campaign.save(update_fields=["email_template"])
+        self.gateway = PartialEmailGateway()
+
+        results = self.dispatch()
+
+        self.assertEqual(results["by_channel"]["email"], {"sent": 2, "failed": 2, "skipped": 0})
+        self.assertEqual(self.gateway.calls["email"], 1)
+
+    def test_query_count_does_not_grow_with_users(self):
+        with self.assertNumQueries(5):
+            self.dispatch()
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from model_bakery import baker
+
+from apps.activity_log.models import ActivityLog, ActivityLogAction
+from apps.crm_hub.models import CRMCampaign, CRMNotificationLog, CRMUserEngagement
+from apps.crm_hub.services.engagement import CRMTargetingService, EngagementTrackingService
+from apps.subscription.models import UserSubscription
+from base_utils.base_tests import LocMemCacheTestMixin, TainoBaseServiceTestCase
+
+
+class EngagementRecomputeTest(LocMemCacheTestMixin, TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other_user = baker.make(get_user_model(), phone_number="989120000000", is_active=True)
+        for action in [ActivityLogAction.LOGIN, ActivityLogAction.CREATE, ActivityLogAction.CREATE]:
+            ActivityLog.objects.create(user=self.user, action=action)
+        now = timezone.now()
+        baker.make(
+            UserSubscription,
+            user=self.user,
+            status="active",
+            start_date=now - timedelta(days=10),
+            end_date=now + timedelta(days=20),
+        )
+
+    def test_recompute_fills_activity_and_subscription_metrics(self):
+        engagement = EngagementTrackingService.recompute_engagements([self.user.pk])[0]
+
+        self.assertEqual(engagement.total_activities, 3)
+        self.assertEqual(engagement.activities_last_7_days, 3)
+        self.assertIsNotNone(engagement.last_login_date)
+        self.assertTrue(engagement.has_active_subscription)
+        self.assertIn(engagement.subscription_days_remaining, (19, 20))
+        self.assertGreater(engagement.engagement_score, 0)
+
+    def test_query_count_does_not_grow_with_users(self):
+        users = baker.make(get_user_model(), _quantity=5, is_active=True)
+        EngagementTrackingService.recompute_engagements([u.pk for u in users])
+
+        with self.assertNumQueries(5):
+            EngagementTrackingService.recompute_engagements([u.pk for u in users] + [self.user.pk])
+
+    def test_incremental_run_only_touches_recently_active_users(self):
+        EngagementTrackingService.bulk_update_engagement(incremental=True)
+        ActivityLog.objects.create(user=self.other_user, action=ActivityLogAction.LOGIN)
+
+        updated = EngagementTrackingService.bulk_update_engagement(incremental=True)
+
+        self.assertEqual(updated, 1)
+        self.assertEqual(CRMUserEngagement.objects.get(user=self.other_user).total_activities, 1)
+
+
+class CampaignTargetingTest(TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        get_user_model().objects.filter(pk=self.user.pk).update(created_at=timezone.now() - timedelta(days=5))
+        self.campaign = baker.make(
+            CRMCampaign, trigger_days=3, max_sends_per_user=1, channels=["in_app"], target_user_roles=[]
+        )
+
+    def targets(self):
+        return [user.pk for chunk in CRMTargetingService.iter_campaign_targets(self.campaign) for user in chunk]
+
+    def test_targets_match_criteria(self):
+        self.assertIn(self.user.pk, self.targets())
+
+    def test_users_registered_after_trigger_days_are_skipped(self):
+        self.campaign.trigger_days = 10
+        self.assertNotIn(self.user.pk, self.targets())
+
+    def test_users_who_reached_max_sends_are_skipped(self):
+        baker.make(CRMNotificationLog, user=self.user, campaign=self.campaign, channel="in_app")
+        self.assertNotIn(self.user.pk, self.targets())
+
+    def test_subscription_requirement(self):
+        self.campaign.require_no_subscription = True
+        CRMUserEngagement.objects.filter(user=self.user).update(has_active_subscription=True)
+        self.assertNotIn(self.user.pk, self.targets())
+
+    def test_targeting_is_a_single_query(self):
+        CRMTargetingService._ensure_engagements(get_user_model().objects.all())
+        with self.assertNumQueries(2):
+            self.targets()
@@ -29,6 +29,7 @@ class AbstractSmsManager(ABC):
 class IranSmsManager(AbstractSmsManager):
     BASE_URL = "https://api.sms.ir"
     BULK_SEND_API = f"{BASE_URL}/v1/send/bulk/"
+    LIKE_TO_LIKE_API = f"{BASE_URL}/v1/send/likeToLike"
     LINE_API = f"{BASE_URL}/v1/line/"
     VERIFY_API = f"{BASE_URL}/v1/send/verify"
     DEFAULT_PANEL_NUMBER = "30007732001071"
@@ -57,7 +58,8 @@ class IranSmsManager(AbstractSmsManager):
             return random.choice(line_numbers)
         return self.DEFAULT_PANEL_NUMBER
 
-    def bulk_send(self, phone_numbers: List[str], messages: List[str], **kwargs):
+    def bulk_send(self, phone_numbers: List[str], messages: List[str], **kwargs) -> bool:
+        success = True
         for message in messages:
             data = {
                 "lineNumber": self.line_number,
@@ -66,6 +68,23 @@ class IranSmsManager(AbstractSmsManager):
             }
 
             res = self.http_request_manager.post(self.BULK_SEND_API, data=data)
+            success = success and res is not None and is_success(res.status_code)
+        return success
+
+    def like_to_like_send(self, phone_numbers: List[str], messages: List[str], **kwargs) -> bool:
+        """
+        Send messages[i] to phone_numbers[i], all in one request
+        """
+        data = {
+            "lineNumber": self.line_number,
+            "messageTexts": messages,
+            "mobiles": phone_numbers,
+        }
+        res = self.http_request_manager.post(self.LIKE_TO_LIKE_API, data=data)
+        if res is None or not is_success(res.status_code):
+            log.error(f"SMS.ir like to like error: {res.text if res is not None else 'no response'}")
+            return False
+        return True
 
     def send_verification_code(self, phone_number: str, code: str, **kwargs):
         data = {
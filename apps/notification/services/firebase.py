@@ -2,11 +2,17 @@ from typing import List
 
 import firebase_admin
 from django.conf import settings
-from firebase_admin import credentials, messaging
+from firebase_admin import credentials, exceptions, messaging
 
 cred = credentials.Certificate(settings.BASE_DIR.joinpath("fcm.json"))
 firebase_admin.initialize_app(cred)
 
+# FCM accepts at most this many tokens per multicast message
+FCM_MULTICAST_LIMIT = 500
+
+# Errors meaning the token will never be deliverable again (app uninstalled, token rotated, ...)
+DEAD_TOKEN_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+
 
 def send_firebase_push_notifications(title: str, message: str, registration_tokens: List[str], data: dict = None):
     message = messaging.MulticastMessage(
@@ -15,4 +21,21 @@ def send_firebase_push_notifications(title: str, message: str, registration_toke
         tokens=registration_tokens,
     )
 
-    response = messaging.send_multicast(message)
+    # send_multicast is deprecated (and removed from newer SDKs) in favour of send_each_for_multicast
+    send = getattr(messaging, "send_each_for_multicast", None) or messaging.send_multicast
+    return send(message)
+
+
+def get_dead_tokens(registration_tokens: List[str], response) -> List[str]:
+    """Tokens of a multicast response that failed permanently, in the order they were sent"""
+    dead_tokens = []
+    for token, token_response in zip(registration_tokens, response.responses):
+        if token_response.success:
+            continue
+        error = token_response.exception
+        invalid_token = isinstance(error, exceptions.InvalidArgumentError) and "registration token" in str(
+            error
+        ).lower()
+        if isinstance(error, DEAD_TOKEN_ERRORS) or invalid_token:
+            dead_tokens.append(token)
+    return dead_tokens
@@ -1,7 +1,9 @@
 from django.contrib.auth import get_user_model
 
 from apps.notification.models import UserSentNotification, UserNotificationToken
-from apps.notification.tasks.notifications import send_firebase_notifications_task
+from apps.notification.services.firebase import FCM_MULTICAST_LIMIT
+from apps.notification.tasks.notifications import send_firebase_multicast_notifications_task
+from base_utils.base_models import bulk_create_with_pids
 
 User = get_user_model()
 
@@ -22,7 +24,7 @@ class NotificationPublishManager:
             name=self.name, description=self.description, to_user=to_user, link=self.link
         )
         # Send push notification if enabled
-        self._send_push_notification(to_user)
+        self._send_push_notifications([to_user])
         return notification
 
     def create_bulk_notifications(self, users) -> list:
@@ -32,31 +34,39 @@ class NotificationPublishManager:
         notifications = []
         for user in users:
             notifications.append(
-                UserSentNotification(name=self.name, description=self.description, to_user=user, link=self.link)
+                UserSentNotification(
+                    name=self.name,
+                    description=self.description,
+                    to_user=user,
+                    link=self.link,
+                )
             )
 
         # Bulk create notifications
-        created = UserSentNotification.objects.bulk_create(notifications)
+        created = bulk_create_with_pids(UserSentNotification.objects, notifications, batch_size=1000)
 
         # Send push notifications
-        for user in users:
-            self._send_push_notification(user)
+        self._send_push_notifications(users)
 
         return created
 
-    def _send_push_notification(self, user):
+    def _send_push_notifications(self, users) -> int:
         """
-        Send push notification to user's registered devices
+        Send push notification to the registered devices of ``users``:
+        one token query for the whole set and one multicast task per FCM_MULTICAST_LIMIT tokens.
+        Returns the number of queued tasks.
         """
-        tokens = list(UserNotificationToken.objects.filter(user=user).values_list("token", flat=True))
-        for token in tokens:
-            send_firebase_notifications_task.apply_async(
+        user_ids = [getattr(user, "pk", user) for user in users]
+        tokens = list(UserNotificationToken.objects.filter(user_id__in=user_ids).values_list("token", flat=True))
+        for i in range(0, len(tokens), FCM_MULTICAST_LIMIT):
+            send_firebase_multicast_notifications_task.apply_async(
                 kwargs={
                     "title": str(self.name),
                     "message": str(self.description),
-                    "registration_token": str(token),
+                    "registration_tokens": tokens[i : i + FCM_MULTICAST_LIMIT],
                 }
             )
+        return (len(tokens) + FCM_MULTICAST_LIMIT - 1) // FCM_MULTICAST_LIMIT
 
     def save_notification(self, channel) -> UserSentNotification:
         sent_notification = UserSentNotification.objects.create(
@@ -65,15 +75,7 @@ class NotificationPublishManager:
         return sent_notification
 
     def send_mobile_notification(self):
-        tokens = list(UserNotificationToken.objects.filter(user=self.user).values_list("token", flat=True))
-        for token in tokens:
-            send_firebase_notifications_task.apply_async(
-                kwargs={
-                    "title": str(self.name),
-                    "message": str(self.description),
-                    "registration_token": str(token),
-                }
-            )
+        self._send_push_notifications([self.user])
 
     def send_email_notification(self):
         # sent_notification = self.save_notification(NotificationChannelChoices.EMAIL)
@@ -1,2 +1,7 @@
-from .notifications import send_sms_notification_task, send_email_notifications_task, send_firebase_notifications_task
+from .notifications import (
+    send_sms_notification_task,
+    send_email_notifications_task,
+    send_firebase_notifications_task,
+    send_firebase_multicast_notifications_task,
+)
 from .retention import delete_old_notifications_task
@@ -1,16 +1,35 @@
+import logging
 from typing import List
 
 from celery import shared_task
 from django.contrib.auth import get_user_model
 
-from apps.notification.services.firebase import send_firebase_push_notifications
+from apps.notification.models import UserNotificationToken
+from apps.notification.services.firebase import send_firebase_push_notifications, get_dead_tokens
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 @shared_task
 def send_firebase_notifications_task(title: str, message: str, registration_token: str):
-    send_firebase_push_notifications(title, message, [registration_token])
+    send_firebase_multicast_notifications_task(title, message, [registration_token])
+
+
+@shared_task
+def send_firebase_multicast_notifications_task(title: str, message: str, registration_tokens: List[str]):
+    """
+    Send one FCM multicast message (up to 500 tokens) and prune the tokens FCM reports as dead
+    """
+    response = send_firebase_push_notifications(title, message, registration_tokens)
+
+    dead_tokens = get_dead_tokens(registration_tokens, response)
+    if dead_tokens:
+        # Hard delete: the token column is unique, a soft-deleted row would block re-registration
+        UserNotificationToken.objects.filter(token__in=dead_tokens).hard_delete()
+        logger.info(f"Pruned {len(dead_tokens)} dead notification tokens")
+
+    return {"success": response.success_count, "failure": response.failure_count, "pruned": len(dead_tokens)}
 
 
 @shared_task
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from model_bakery import baker
+
+from apps.notification.models import UserNotificationToken, UserSentNotification
+from apps.notification.services.notifications import NotificationPublishManager
+from apps.notification.tasks.notifications import send_firebase_multicast_notifications_task
+from base_utils.base_tests import TainoBaseServiceTestCase
+
+
+class NotificationPublishManagerPushTest(TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = baker.make(get_user_model(), _quantity=3)
+        for user in self.users:
+            baker.make(UserNotificationToken, user=user, token=f"token-{user.pk}-1")
+            baker.make(UserNotificationToken, user=user, token=f"token-{user.pk}-2")
+        self.manager = NotificationPublishManager(name="title", description="body")
+
+    @mock.patch("apps.notification.services.notifications.FCM_MULTICAST_LIMIT", 4)
+    @mock.patch("apps.notification.services.notifications.send_firebase_multicast_notifications_task")
+    def test_bulk_notifications_send_one_task_per_multicast_batch(self, task):
+        with self.assertNumQueries(2):
+            self.manager.create_bulk_notifications(self.users)
+
+        self.assertEqual(task.apply_async.call_count, 2)
+        sent_tokens = [t for call in task.apply_async.call_args_list for t in call.kwargs["kwargs"]["registration_tokens"]]
+        self.assertEqual(len(sent_tokens), 6)
+        self.assertEqual(UserSentNotification.objects.filter(to_user__in=self.users).count(), 3)
+
+    @mock.patch("apps.notification.tasks.notifications.send_firebase_push_notifications")
+    def test_dead_tokens_are_pruned(self, send):
+        from firebase_admin import messaging
+
+        tokens = list(UserNotificationToken.objects.values_list("token", flat=True))
+        dead = messaging.UnregisteredError("Requested entity was not found.")
+        send.return_value = SimpleNamespace(
+            responses=[SimpleNamespace(success=i != 0, exception=dead if i == 0 else None) for i in range(len(tokens))],
+            success_count=len(tokens) - 1,
+            failure_count=1,
+        )
+
+        result = send_firebase_multicast_notifications_task(title="title", message="body", registration_tokens=tokens)
+
+        self.assertEqual(result["pruned"], 1)
+        self.assertFalse(UserNotificationToken.global_objects.filter(token=tokens[0]).exists())
+        self.assertEqual(UserNotificationToken.objects.count(), len(tokens) - 1)
@@ -5,3 +5,9 @@ class PermissionConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.permissions"
     verbose_name = "سطوح دسترسی"
+
+    def ready(self):
+        try:
+            import apps.permissions.signals
+        except ImportError:
+            pass
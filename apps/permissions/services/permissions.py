@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from django.db.models import Q
 
 from apps.permissions.models import Permission, UserPermission, UserTypePermission
+from apps.permissions.services.resolver import PermissionResolver
 from base_utils.services import AbstractBaseService
 
 User = get_user_model()
@@ -29,17 +30,8 @@ class PermissionService(AbstractBaseService):
             return True
 
         try:
-            # Check for explicit user permission denial first
-            user_permission = UserPermission.objects.filter(user=user, permission__code_name=permission_code).first()
-
-            if user_permission:
-                return user_permission.is_granted
-
-            # Get all permissions the user should have (including secretary-lawyer relationship)
-            all_permissions = PermissionService.get_user_permissions(user)
-
-            # Check if the specific permission is in the user's permissions
-            return all_permissions.filter(code_name=permission_code).exists()
+            # Compiled once per request (and cached in Redis until permissions change)
+            return PermissionResolver.has_permission(user, permission_code)
 
         except Exception:
             return False
@@ -0,0 +1,129 @@
+import logging
+from typing import FrozenSet
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+
+from apps.permissions.models import UserPermission, UserTypePermission
+
+log = logging.getLogger(__name__)
+User = get_user_model()
+
+
+class PermissionResolver:
+    """
+    Compiles a user's effective permission code names into a frozenset.
+
+    The set is resolved once and memoized at two levels:
+        * on the user instance, i.e. for the lifetime of the request that loaded the user,
+        * in Redis, keyed by user, role and a global permissions version stamp.
+
+    Saving or deleting a Permission, UserPermission or UserTypePermission bumps the version stamp
+    (see ``apps.permissions.signals``), so every cached set is retired at once. Checks against a
+    compiled set are a single membership test.
+    """
+
+    VERSION_KEY = "permissions:version"
+    CACHE_PREFIX = "permissions:codes"
+    CACHE_TTL = 60 * 60  # an hour in seconds
+    MEMO_ATTR = "_compiled_permissions"
+
+    # Bumped on every local invalidation, so memos created before a change in this process are ignored
+    _local_generation = 0
+
+    @classmethod
+    def get_version(cls) -> int:
+        try:
+            return cache.get(cls.VERSION_KEY) or 0
+        except Exception as e:
+            log.warning(f"Could not read permissions version: {e}")
+            return 0
+
+    @classmethod
+    def invalidate(cls):
+        """Retire every compiled permission set"""
+        cls._local_generation += 1
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            # Key does not exist yet
+            cache.set(cls.VERSION_KEY, 1, None)
+        except Exception as e:
+            log.warning(f"Could not bump permissions version: {e}")
+
+    @classmethod
+    def invalidate_user(cls, user):
+        """Retire the compiled permission set of a single user"""
+        cls._local_generation += 1
+        try:
+            cache.delete(cls._cache_key(user, cls.get_version()))
+        except Exception as e:
+            log.warning(f"Could not invalidate permissions of user {user.pk}: {e}")
+
+    @classmethod
+    def _cache_key(cls, user, version: int) -> str:
+        return f"{cls.CACHE_PREFIX}:{version}:{user.pk}:{user.role_id or ''}"
+
+    @classmethod
+    def get_permission_codes(cls, user) -> FrozenSet[str]:
+        """Effective permission code names of ``user``"""
+        memo = getattr(user, cls.MEMO_ATTR, None)
+        if memo and memo[0] == cls._local_generation and memo[1] == user.role_id:
+            return memo[2]
+
+        cache_key = cls._cache_key(user, cls.get_version())
+        try:
+            codes = cache.get(cache_key)
+        except Exception as e:
+            log.warning(f"Could not read permissions of user {user.pk} from cache: {e}")
+            codes = None
+
+        if codes is None:
+            codes = cls.compile(user)
+            try:
+                cache.set(cache_key, codes, cls.CACHE_TTL)
+            except Exception as e:
+                log.warning(f"Could not write permissions of user {user.pk} to cache: {e}")
+
+        setattr(user, cls.MEMO_ATTR, (cls._local_generation, user.role_id, codes))
+        return codes
+
+    @staticmethod
+    def compile(user) -> FrozenSet[str]:
+        """
+        Resolve the effective permission set from the database.
+
+        Explicit user permissions win: a grant applies even if the permission is inactive and a
+        denial removes the permission from the role set. Role permissions (and, for secretaries
+        with an assigned lawyer, the lawyer role permissions) only count when active.
+        """
+        granted, denied = set(), set()
+        for code_name, is_granted in UserPermission.objects.filter(user=user).values_list(
+            "permission__code_name", "is_granted"
+        ):
+            (granted if is_granted else denied).add(code_name)
+
+        role_codes = set()
+        user_role = user.role
+        if user_role:
+            role_filter = Q(user_type=user_role)
+
+            # A secretary with an assigned lawyer also gets the lawyer role permissions
+            if user_role.static_name == "secretary":
+                from apps.authentication.models import UserProfile
+
+                if UserProfile.objects.filter(user=user, lawyer__isnull=False).exists():
+                    role_filter |= Q(user_type__static_name="lawyer")
+
+            role_codes.update(
+                UserTypePermission.objects.filter(role_filter, permission__is_active=True).values_list(
+                    "permission__code_name", flat=True
+                )
+            )
+
+        return frozenset(granted | (role_codes - denied))
+
+    @classmethod
+    def has_permission(cls, user, permission_code: str) -> bool:
+        return permission_code in cls.get_permission_codes(user)
@@ -0,0 +1,38 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.authentication.models import UserProfile
+from apps.permissions.models import Permission, UserPermission, UserTypePermission
+from apps.permissions.services.resolver import PermissionResolver
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_save, sender=UserPermission)
+@receiver(post_delete, sender=UserPermission)
+@receiver(post_save, sender=UserTypePermission)
+@receiver(post_delete, sender=UserTypePermission)
+def invalidate_compiled_permissions(sender, instance, **kwargs):
+    """
+    Retire all compiled permission sets when a permission or an assignment changes
+
+    Once now, for reads later in the writing transaction, and again on commit: until then a
+    concurrent request can still compile (and cache) the old set.
+    """
+    PermissionResolver.invalidate()
+    transaction.on_commit(PermissionResolver.invalidate)
+
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_secretary_permissions(sender, instance, **kwargs):
+    """
+    A secretary's permissions depend on having a lawyer assigned in their profile
+    """
+    user = instance.user
+    PermissionResolver.invalidate_user(user)
+    transaction.on_commit(lambda: PermissionResolver.invalidate_user(user))
@@ -1,10 +1,12 @@
 from apps.permissions.services.permissions import PermissionService
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from model_bakery import baker
 
 from apps.permissions.models import Permission, PermissionCategory, UserPermission, UserTypePermission
 from apps.permissions.services.query import PermissionQuery
+from apps.permissions.services.resolver import PermissionResolver
 from base_utils.base_tests import TainoBaseServiceTestCase
 
 
@@ -239,3 +241,65 @@ class PermissionQueryTest(TainoBaseServiceTestCase):
         self.assertEqual(len(category2_permissions), 1)
         self.assertIn(self.permission3, category2_permissions)
         self.assertNotIn(self.permission4, category2_permissions)  # Inactive permission
+
+
+class PermissionResolverTest(TainoBaseServiceTestCase):
+    """
+    Tests for the compiled permission sets behind PermissionService.has_permission
+    """
+
+    def setUp(self):
+        super().setUp()
+        from apps.authentication.models import UserType
+
+        self.category = baker.make(PermissionCategory, name="Test Category")
+        self.permission1 = baker.make(Permission, code_name="test.permission1", category=self.category, is_active=True)
+        self.permission2 = baker.make(Permission, code_name="test.permission2", category=self.category, is_active=True)
+
+        self.user_type = baker.make(UserType, static_name="test_role")
+        self.user.role = self.user_type
+        self.user.save()
+        baker.make(UserTypePermission, user_type=self.user_type, permission=self.permission1)
+
+    def test_repeated_checks_are_memoized(self):
+        self.assertTrue(PermissionService.has_permission(self.user, "test.permission1"))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(PermissionService.has_permission(self.user, "test.permission1"))
+            self.assertFalse(PermissionService.has_permission(self.user, "test.permission2"))
+
+    def test_compiled_set_is_shared_between_user_instances(self):
+        PermissionService.has_permission(self.user, "test.permission1")
+
+        other_instance = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(PermissionResolver.has_permission(other_instance, "test.permission1"))
+
+    def test_assignment_change_invalidates_compiled_set(self):
+        self.assertFalse(PermissionService.has_permission(self.user, "test.permission2"))
+
+        PermissionService.assign_permission_to_user(self.user, "test.permission2", True)
+        self.assertTrue(PermissionService.has_permission(self.user, "test.permission2"))
+
+        PermissionService.assign_permission_to_user(self.user, "test.permission1", False)
+        self.assertFalse(PermissionService.has_permission(self.user, "test.permission1"))
+
+    def test_role_permission_removal_invalidates_compiled_set(self):
+        self.assertTrue(PermissionService.has_permission(self.user, "test.permission1"))
+
+        UserTypePermission.objects.filter(user_type=self.user_type).delete()
+
+        self.assertFalse(PermissionService.has_permission(self.user, "test.permission1"))
+
+    def test_set_cached_by_a_concurrent_request_before_commit_is_retired(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            UserTypePermission.objects.filter(user_type=self.user_type).delete()
+            # A concurrent request, still reading the committed assignment, caches the old set
+            cache.set(
+                PermissionResolver._cache_key(self.user, PermissionResolver.get_version()),
+                frozenset({"test.permission1"}),
+                PermissionResolver.CACHE_TTL,
+            )
+
+        other_instance = User.objects.get(pk=self.user.pk)
+        self.assertFalse(PermissionResolver.has_permission(other_instance, "test.permission1"))
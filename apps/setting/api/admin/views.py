@@ -1,3 +1,4 @@
+from django.db import transaction
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
@@ -49,11 +50,11 @@ class GeneralSettingAdminViewSet(
         for key in request.data:
             GeneralSetting.objects.filter(key=key).update(value=request.data[key])
 
-        # Invalidate cache for updated keys
+        # Invalidate the settings snapshot (queryset updates do not send signals) once committed,
+        # a concurrent read could otherwise cache the old values again
         from apps.setting.services.query import GeneralSettingsQuery
 
-        for key in request.data.keys():
-            GeneralSettingsQuery._invalidate_cache(key)
+        transaction.on_commit(GeneralSettingsQuery.invalidate_all_caches)
 
         return Response(
             GeneralSettingAdminListRetrieveSerializer(
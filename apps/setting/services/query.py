@@ -1,14 +1,27 @@
+import logging
+from typing import Optional
+
+from django.conf import settings
 from django.db.models import QuerySet
 from django.core.cache import cache
 
 from apps.setting.models import GeneralSettingChoices, GeneralSetting
+from base_utils.facades.cache import LocalTTLCache, CacheInvalidationBus
 from base_utils.services import AbstractBaseQuery
 
+log = logging.getLogger(__name__)
+
 
 class GeneralSettingsQuery(AbstractBaseQuery):
-    # Cache settings
+    # Cache settings: the whole table is cached as one snapshot per settings version, with a
+    # short-lived process-local copy in front of it
     CACHE_PREFIX = "general_settings"
     CACHE_TTL = 60 * 60 * 24 * 365  # a year in seconds
+    VERSION_KEY = "general_settings:version"
+    INVALIDATION_CHANNEL = "general_settings:invalidate"
+    SNAPSHOT_KEY = "snapshot"
+
+    _local = LocalTTLCache(max_entries=1, ttl=getattr(settings, "GENERAL_SETTINGS_LOCAL_CACHE_TTL", 60))
 
     # Default values remain the same
     DEFAULT_AI_CHAT_PRICE_V = 1
@@ -33,34 +46,90 @@ class GeneralSettingsQuery(AbstractBaseQuery):
     DEFAULT_COST_PER_SMS = 2
 
     @classmethod
-    def _get_cache_key(cls, key):
-        """Generate a cache key for a setting"""
-        return f"{cls.CACHE_PREFIX}:{key}"
+    def get_version(cls) -> int:
+        """Current settings version, bumped on every GeneralSetting change"""
+        try:
+            return cache.get(cls.VERSION_KEY) or 0
+        except Exception as e:
+            log.warning(f"Could not read general settings version: {e}")
+            return 0
+
+    @classmethod
+    def _bump_version(cls):
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            # Key does not exist yet
+            cache.set(cls.VERSION_KEY, 1, None)
+        except Exception as e:
+            log.warning(f"Could not bump general settings version: {e}")
 
     @classmethod
-    def _get_from_cache(cls, key):
-        """Get a setting value from cache"""
-        cache_key = cls._get_cache_key(key)
-        return cache.get(cache_key)
+    def clear_local(cls, *args):
+        cls._local.clear()
 
     @classmethod
-    def _set_in_cache(cls, key, value):
-        """Set a setting value in cache"""
-        cache_key = cls._get_cache_key(key)
-        cache.set(cache_key, value, cls.CACHE_TTL)
+    def invalidate_all_caches(cls):
+        """Retire the settings snapshot in every process"""
+        cls._bump_version()
+        cls.clear_local()
+        CacheInvalidationBus.publish(cls.INVALIDATION_CHANNEL)
 
     @classmethod
     def _invalidate_cache(cls, key):
-        """Invalidate a specific setting cache"""
-        cache_key = cls._get_cache_key(key)
-        cache.delete(cache_key)
+        """Settings are cached as a single snapshot, so changing any key retires all of them"""
+        cls.invalidate_all_caches()
+
+    @staticmethod
+    def _load_snapshot() -> Optional[dict]:
+        try:
+            return dict(GeneralSetting.objects.values_list("key", "value"))
+        except Exception as e:
+            log.error(f"Could not load general settings: {e}")
+            return None
 
     @classmethod
-    def invalidate_all_caches(cls):
-        """Invalidate all settings caches"""
-        keys = GeneralSetting.objects.values_list("key", flat=True)
-        for key in keys:
-            cls._invalidate_cache(key)
+    def get_snapshot(cls) -> dict:
+        """
+        All settings as {key: value}.
+        Served from the process-local copy; on expiry it is re-read as one cache entry (per
+        settings version) and, on a cache miss, with a single query for the whole table.
+        """
+        CacheInvalidationBus.subscribe(cls.INVALIDATION_CHANNEL, cls.clear_local)
+
+        snapshot = cls._local.get(cls.SNAPSHOT_KEY)
+        if snapshot is not None:
+            return snapshot
+
+        cache_key = f"{cls.CACHE_PREFIX}:snapshot:{cls.get_version()}"
+        try:
+            snapshot = cache.get(cache_key)
+        except Exception as e:
+            log.warning(f"Could not read general settings from cache: {e}")
+
+        if snapshot is None:
+            snapshot = cls._load_snapshot()
+            if snapshot is None:
+                # Defaults apply until the table can be read; nothing is cached
+                return {}
+            try:
+                cache.set(cache_key, snapshot, cls.CACHE_TTL)
+            except Exception as e:
+                log.warning(f"Could not write general settings to cache: {e}")
+
+        cls._local.set(cls.SNAPSHOT_KEY, snapshot)
+        return snapshot
+
+    @classmethod
+    def _get_int(cls, key: str, default: int) -> int:
+        value = cls.get_snapshot().get(key)
+        if value is None:
+            return default
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            log.warning(f"General setting {key} has a non-integer value {value!r}, using {default}")
+            return default
 
     @staticmethod
     def get_visible_mobile_settings() -> QuerySet[GeneralSetting]:
@@ -94,381 +163,123 @@ class GeneralSettingsQuery(AbstractBaseQuery):
     def get_lawyer_register_prize_coin(cls) -> int:
         """Get prize coins for lawyer registration"""
         key = GeneralSettingChoices.LAWYER_REGISTER_PRIZE_COIN.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_LAWYER_REGISTER_PRIZE_COIN
+        return cls._get_int(key, cls.DEFAULT_LAWYER_REGISTER_PRIZE_COIN)
 
     @classmethod
     def get_user_register_prize_coin(cls) -> int:
         """Get prize coins for user registration"""
         key = GeneralSettingChoices.USER_REGISTER_PRIZE_COIN.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_USER_REGISTER_PRIZE_COIN
+        return cls._get_int(key, cls.DEFAULT_USER_REGISTER_PRIZE_COIN)
 
     @classmethod
     def get_ai_chat_price_v(cls) -> int:
         """Get price for V AI chat"""
         key = GeneralSettingChoices.AI_CHAT_PRICE_V.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_AI_CHAT_PRICE_V
+        return cls._get_int(key, cls.DEFAULT_AI_CHAT_PRICE_V)
 
     @classmethod
     def get_ai_chat_price_v_plus(cls) -> int:
         """Get price for V+ AI chat"""
         key = GeneralSettingChoices.AI_CHAT_PRICE_V_PLUS.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_AI_CHAT_PRICE_V_PLUS
+        return cls._get_int(key, cls.DEFAULT_AI_CHAT_PRICE_V_PLUS)
 
     @classmethod
     def get_ai_chat_price_v_x(cls) -> int:
         """Get price for V++ AI chat"""
         key = GeneralSettingChoices.AI_CHAT_PRICE_V_X.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_AI_CHAT_PRICE_V_X
+        return cls._get_int(key, cls.DEFAULT_AI_CHAT_PRICE_V_X)
 
     @classmethod
     def get_ai_chat_price_v_pro(cls) -> int:
         """Get price for V AI chat"""
         key = GeneralSettingChoices.AI_CHAT_PRICE_V_PRO.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_AI_CHAT_PRICE_V_PRO
+        return cls._get_int(key, cls.DEFAULT_AI_CHAT_PRICE_V_PRO)
 
     @classmethod
     def get_ai_chat_price_v_plus_pro(cls) -> int:
         """Get price for V+ AI chat"""
         key = GeneralSettingChoices.AI_CHAT_PRICE_V_PLUS_PRO.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_AI_CHAT_PRICE_V_PLUS_PRO
+        return cls._get_int(key, cls.DEFAULT_AI_CHAT_PRICE_V_PLUS_PRO)
 
     @classmethod
     def get_ai_chat_price_v_manual_request(cls) -> int:
         """Get price for V Manual Request AI chat"""
         key = GeneralSettingChoices.AI_CHAT_PRICE_V_MANUAL_REQUEST.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_AI_CHAT_PRICE_V_MANUAL_REQUEST
+        return cls._get_int(key, cls.DEFAULT_AI_CHAT_PRICE_V_MANUAL_REQUEST)
 
     @classmethod
     def get_ai_chat_price_v_made_477(cls) -> int:
         """Get price for V Made 477 AI chat"""
         key = GeneralSettingChoices.AI_CHAT_PRICE_V_MADE_477.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_AI_CHAT_PRICE_V_MADE_477
+        return cls._get_int(key, cls.DEFAULT_AI_CHAT_PRICE_V_MADE_477)
 
     @classmethod
     def get_ai_chat_price_v_prepare_initial_petition(cls) -> int:
         """Get price for V_PREPARE_INITIAL_PETITION AI chat"""
         key = GeneralSettingChoices.AI_CHAT_PRICE_V_PREPARE_INITIAL_PETITION.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_AI_CHAT_PRICE_V_PREPARE_INITIAL_PETITION
+        return cls._get_int(key, cls.DEFAULT_AI_CHAT_PRICE_V_PREPARE_INITIAL_PETITION)
 
     @classmethod
     def get_ai_chat_price_v_prepare_appeal_petition(cls) -> int:
         """Get price for V_PREPARE_APPEAL_PETITION AI chat"""
         key = GeneralSettingChoices.AI_CHAT_PRICE_V_PREPARE_APPEAL_PETITION.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_AI_CHAT_PRICE_V_PREPARE_APPEAL_PETITION
+        return cls._get_int(key, cls.DEFAULT_AI_CHAT_PRICE_V_PREPARE_APPEAL_PETITION)
 
     @classmethod
     def get_ai_chat_price_v_prepare_defense_brief(cls) -> int:
         """Get price for V_PREPARE_DEFENSE_BRIEF AI chat"""
         key = GeneralSettingChoices.AI_CHAT_PRICE_V_PREPARE_DEFENSE_BRIEF.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_AI_CHAT_PRICE_V_PREPARE_DEFENSE_BRIEF
+        return cls._get_int(key, cls.DEFAULT_AI_CHAT_PRICE_V_PREPARE_DEFENSE_BRIEF)
 
     @classmethod
     def get_ai_chat_price_v_prepare_custom_request(cls) -> int:
         """Get price for V_PREPARE_CUSTOM_REQUEST AI chat"""
         key = GeneralSettingChoices.AI_CHAT_PRICE_V_PREPARE_CUSTOM_REQUEST.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_AI_CHAT_PRICE_V_PREPARE_CUSTOM_REQUEST
+        return cls._get_int(key, cls.DEFAULT_AI_CHAT_PRICE_V_PREPARE_CUSTOM_REQUEST)
 
     @classmethod
     def get_ai_chat_price_v_x_pro(cls) -> int:
         """Get price for VX Pro AI chat"""
         key = GeneralSettingChoices.AI_CHAT_PRICE_V_X_PRO.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_AI_CHAT_PRICE_V_X_PRO
+        return cls._get_int(key, cls.DEFAULT_AI_CHAT_PRICE_V_X_PRO)
 
     @classmethod
     def get_ai_chat_duration(cls) -> int:
         """Get duration in minutes for AI chat"""
         key = GeneralSettingChoices.AI_CHAT_DURATION.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.AI_CHAT_DURATION
+        return cls._get_int(key, cls.AI_CHAT_DURATION)
 
     @classmethod
     def get_notification_retention_days(cls) -> int:
         """Get number of days to retain notifications"""
         key = GeneralSettingChoices.NOTIFICATION_RETENTION_DAYS.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return 5  # Default to 5 days if not specified
+        return cls._get_int(key, 5)  # Default to 5 days if not specified
 
     @classmethod
     def get_message_cost(cls) -> int:
         """Get duration in minutes for AI chat"""
         key = GeneralSettingChoices.COST_PER_SMS.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return cls.DEFAULT_COST_PER_SMS
+        return cls._get_int(key, cls.DEFAULT_COST_PER_SMS)
 
     @classmethod
     def get_bypass_premium_feature_per_roles(cls) -> list:
-        """Get duration in minutes for AI chat"""
+        """Get role static names that bypass premium features"""
         key = GeneralSettingChoices.BYPASS_PREMIUM_FEATURE_FOR_ROLES.value
 
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = GeneralSetting.objects.get(key=key).value
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value.split(",")
-        except:
-            return []
+        value = cls.get_snapshot().get(key)
+        return value.split(",") if value else []
 
     @classmethod
     def get_disable_subscription_for_lawyer(cls) -> int:
         """Get disable_subscription_for_lawyer"""
         key = GeneralSettingChoices.DISABLE_SUBSCRIPTION_FOR_LAWYER.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return 0
+        return cls._get_int(key, 0)
 
     @classmethod
     def get_disable_subscription_for_client(cls) -> int:
         """Get disable_subscription_for_client"""
         key = GeneralSettingChoices.DISABLE_SUBSCRIPTION_FOR_CLIENT.value
-
-        # Try to get from cache first
-        cached_value = cls._get_from_cache(key)
-        if cached_value is not None:
-            return cached_value
-
-        # If not in cache, get from DB
-        try:
-            value = int(GeneralSetting.objects.get(key=key).value)
-            # Cache the result for next time
-            cls._set_in_cache(key, value)
-            return value
-        except:
-            return 0
+        return cls._get_int(key, 0)
 
     @staticmethod
     def get_ai_chat_price_by_type(chat_type: str) -> int:
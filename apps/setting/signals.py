@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
@@ -7,5 +8,7 @@ from apps.setting.services.query import GeneralSettingsQuery
 
 @receiver([post_save, post_delete], sender=GeneralSetting)
 def invalidate_general_setting_cache(sender, instance, **kwargs):
-    """Invalidate cache when a GeneralSetting is changed or deleted"""
-    GeneralSettingsQuery._invalidate_cache(instance.key)
+    """Invalidate the settings snapshot when a GeneralSetting is changed or deleted"""
+    GeneralSettingsQuery.invalidate_all_caches()
+    # Again once committed, in case another process re-read the table before the commit
+    transaction.on_commit(GeneralSettingsQuery.invalidate_all_caches)
@@ -13,3 +13,37 @@ class GeneralSettingsQueryTests(TainoBaseServiceTestCase):
         settings = GeneralSettingsQuery.get_visible_mobile_settings()
 
         self.assertEqual(settings.count(), 2)
+
+
+class GeneralSettingsSnapshotTests(TainoBaseServiceTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        GeneralSetting.objects.update_or_create(
+            key=GeneralSettingChoices.AI_CHAT_PRICE_V.value, defaults={"value": "3"}
+        )
+        GeneralSetting.objects.update_or_create(key=GeneralSettingChoices.COST_PER_SMS.value, defaults={"value": "7"})
+        # The snapshot is loaded lazily, by the first read after the invalidation
+        GeneralSettingsQuery.invalidate_all_caches()
+        GeneralSettingsQuery.get_snapshot()
+
+    def test_reads_are_served_from_the_snapshot(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(GeneralSettingsQuery.get_ai_chat_price_v(), 3)
+            self.assertEqual(GeneralSettingsQuery.get_message_cost(), 7)
+            self.assertEqual(
+                GeneralSettingsQuery.get_ai_chat_price_v_plus(), GeneralSettingsQuery.DEFAULT_AI_CHAT_PRICE_V_PLUS
+            )
+
+    def test_save_refreshes_the_snapshot(self):
+        setting = GeneralSetting.objects.get(key=GeneralSettingChoices.AI_CHAT_PRICE_V.value)
+        setting.value = "4"
+        setting.save()
+
+        self.assertEqual(GeneralSettingsQuery.get_ai_chat_price_v(), 4)
+
+    def test_invalid_value_falls_back_to_default(self):
+        GeneralSetting.objects.filter(key=GeneralSettingChoices.AI_CHAT_PRICE_V.value).update(value="not a number")
+        GeneralSettingsQuery.invalidate_all_caches()
+
+        self.assertEqual(GeneralSettingsQuery.get_ai_chat_price_v(), GeneralSettingsQuery.DEFAULT_AI_CHAT_PRICE_V)
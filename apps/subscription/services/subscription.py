@@ -5,9 +5,12 @@ from datetime import timedelta
 from apps.subscription.models import UserSubscription
 from django.contrib.auth import get_user_model
 
+from base_utils.log.tracing import Tracing
+
 User = get_user_model()
 
 logger = logging.getLogger(__name__)
+trace = Tracing.get_tracer(__name__)
 
 
 class SubscriptionService:
@@ -27,13 +30,10 @@ class SubscriptionService:
         Returns:
             bool: True if user has premium access, False otherwise
         """
-        print(f"Checking premium access for user: {user}", flush=True)
-
         # First check if user has premium access granted directly
         if hasattr(user, "has_premium_account") and user.has_premium_account:
-            print(f"User {user} has direct premium account access", flush=True)
+            trace.event("premium_access", user=lambda: user.pk, source="account")
             return True
-        print(f"User {user} does not have direct premium account access", flush=True)
 
         is_secretary = (
             hasattr(user, "profile")
@@ -41,25 +41,24 @@ class SubscriptionService:
             and getattr(user.profile, "is_secretary", False)
             and user.profile.lawyer is not None
         )
-        print(f"User {user} is_secretary: {is_secretary}", flush=True)
 
         if is_secretary:
             lawyer = user.profile.lawyer
-            print(f"Secretary {user} checking lawyer {lawyer} premium status", flush=True)
 
             # Check if lawyer has premium account or active subscription
             if hasattr(lawyer, "has_premium_account") and lawyer.has_premium_account:
-                print(f"Lawyer {lawyer} has direct premium account, granting access to secretary", flush=True)
+                trace.event("premium_access", user=lambda: user.pk, source="lawyer_account")
                 return True
-            print(f"Lawyer {lawyer} does not have direct premium account, checking subscription", flush=True)
 
             lawyer_has_subscription = SubscriptionService.has_active_subscription(lawyer)
-            print(f"Lawyer {lawyer} has active subscription: {lawyer_has_subscription}", flush=True)
+            trace.event(
+                "premium_access", user=lambda: user.pk, source="lawyer_subscription", granted=lawyer_has_subscription
+            )
             return lawyer_has_subscription
 
         # Then check if user has an active subscription
         user_has_subscription = SubscriptionService.has_active_subscription(user)
-        print(f"User {user} has active subscription: {user_has_subscription}", flush=True)
+        trace.event("premium_access", user=lambda: user.pk, source="subscription", granted=user_has_subscription)
         return user_has_subscription
 
     @staticmethod
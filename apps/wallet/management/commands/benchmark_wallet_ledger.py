@@ -0,0 +1,105 @@
+# apps/wallet/management/commands/benchmark_wallet_ledger.py
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.wallet.models import Transaction, Wallet
+from apps.wallet.services.ledger import WalletLedger, LedgerEntry, InsufficientWalletBalance
+
+BENCHMARK_REFERENCE_ID = "ledger_benchmark"
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer one wallet with concurrent coin debits and report throughput and correctness. "
+        "Runs against a throwaway user and wallet that are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--iterations", type=int, default=200, help="debits per thread")
+        parser.add_argument("--amount", type=int, default=1, help="coins per debit")
+        parser.add_argument(
+            "--overdraw",
+            type=int,
+            default=10,
+            help="percentage of debits that should be rejected for lack of coins",
+        )
+
+    def handle(self, *args, **options):
+        # The debit threads use their own connections, so the wallet has to be committed: it can't
+        # live in a rolled back transaction. A dedicated user keeps real wallets out of the run.
+        user = get_user_model().objects.create(
+            username=f"ledger-benchmark-{uuid.uuid4().hex}", first_name="ledger", last_name="benchmark"
+        )
+        try:
+            self._benchmark(user, options)
+        finally:
+            Transaction.objects.filter(wallet__user=user).hard_delete()
+            Wallet.objects.filter(user=user).hard_delete()
+            user.hard_delete()
+
+    def _benchmark(self, user, options):
+        threads, iterations, amount = options["threads"], options["iterations"], Decimal(options["amount"])
+        attempts = threads * iterations
+        funded = int(attempts * (100 - options["overdraw"]) / 100)
+
+        wallet_id = WalletLedger.get_wallet_id(user)
+        initial = WalletLedger.get_balances(wallet_id)
+
+        # Fund the throwaway wallet
+        WalletLedger.apply(
+            LedgerEntry(
+                wallet_id=wallet_id,
+                coin_delta=amount * funded,
+                transaction=dict(type="coin_reward", coin_amount=amount * funded, reference_id=BENCHMARK_REFERENCE_ID),
+            )
+        )
+        available = initial["coin_balance"] + amount * funded
+
+        def debit_loop(_):
+            succeeded = 0
+            try:
+                for _ in range(iterations):
+                    try:
+                        WalletLedger.apply(
+                            LedgerEntry(
+                                wallet_id=wallet_id,
+                                coin_delta=-amount,
+                                transaction=dict(
+                                    type="coin_usage", coin_amount=amount, reference_id=BENCHMARK_REFERENCE_ID
+                                ),
+                            )
+                        )
+                        succeeded += 1
+                    except InsufficientWalletBalance:
+                        pass
+            finally:
+                close_old_connections()
+            return succeeded
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            succeeded = sum(executor.map(debit_loop, range(threads)))
+        elapsed = time.perf_counter() - started
+
+        final = WalletLedger.get_balances(wallet_id)
+        expected = available - amount * succeeded
+        written = Transaction.objects.filter(
+            wallet_id=wallet_id, reference_id=BENCHMARK_REFERENCE_ID, type="coin_usage"
+        ).count()
+
+        self.stdout.write(f"{attempts} debits from {threads} threads in {elapsed:.2f}s ({attempts / elapsed:.0f}/s)")
+        self.stdout.write(f"succeeded: {succeeded}, rejected: {attempts - succeeded}, transactions written: {written}")
+
+        consistent = final["coin_balance"] == expected and final["coin_balance"] >= 0 and written == succeeded
+
+        if consistent:
+            self.stdout.write(self.style.SUCCESS(f"Balance consistent: {final['coin_balance']} == {expected}"))
+        else:
+            raise CommandError(f"Balance mismatch: {final['coin_balance']} != {expected} (transactions: {written})")
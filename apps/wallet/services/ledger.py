@@ -0,0 +1,115 @@
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import List, Optional
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.wallet.models import Wallet, Transaction
+from base_utils.base_models import bulk_create_with_pids
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientWalletBalance(ValueError):
+    """Raised when a debit would take a wallet balance below zero"""
+
+
+@dataclass
+class LedgerEntry:
+    """
+    One balance change and the Transaction row recording it.
+
+    ``coin_delta`` / ``balance_delta`` are signed: negative values debit the wallet.
+    ``transaction`` holds the Transaction field values (type, amount, coin_amount, ...).
+    """
+
+    wallet_id: int
+    coin_delta: Decimal = Decimal(0)
+    balance_delta: Decimal = Decimal(0)
+    transaction: dict = field(default_factory=dict)
+
+
+class WalletLedger:
+    """
+    Contention-safe balance changes for wallets.
+
+    Balances are never read into Python and written back. Each change is a single conditional
+    ``UPDATE wallet SET coin_balance = coin_balance + delta WHERE coin_balance + delta >= 0``,
+    so concurrent debits against the same wallet cannot overdraw it or lose an update, and the
+    row lock is only held from that statement to the commit. The Transaction rows are inserted
+    before the update (an FK insert does not conflict with the balance update lock) and in a
+    single ``bulk_create``.
+    """
+
+    @staticmethod
+    def get_wallet_id(user) -> int:
+        """Wallet id of ``user`` without loading (or locking) the wallet row"""
+        wallet_id = Wallet.objects.filter(user=user).values_list("pk", flat=True).first()
+        if wallet_id is None:
+            wallet_id = Wallet.objects.get_or_create(user=user)[0].pk
+        return wallet_id
+
+    @staticmethod
+    def _build_transaction(entry: LedgerEntry) -> Transaction:
+        return Transaction(
+            wallet_id=entry.wallet_id,
+            **{"status": "completed", **entry.transaction},
+        )
+
+    @staticmethod
+    def apply_delta(wallet_id: int, coin_delta: Decimal, balance_delta: Decimal = Decimal(0)):
+        """Conditionally change the balances of a wallet, without writing a Transaction"""
+        condition = Q(pk=wallet_id)
+        if coin_delta < 0:
+            condition &= Q(coin_balance__gte=-coin_delta)
+        if balance_delta < 0:
+            condition &= Q(balance__gte=-balance_delta)
+
+        updated = Wallet.objects.filter(condition).update(
+            coin_balance=F("coin_balance") + coin_delta,
+            balance=F("balance") + balance_delta,
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            if coin_delta < 0:
+                raise InsufficientWalletBalance("موجودی سکه کافی نیست")
+            raise InsufficientWalletBalance("Insufficient funds")
+
+    @staticmethod
+    def apply(entry: LedgerEntry) -> Transaction:
+        """Apply a single entry; raises InsufficientWalletBalance if it would overdraw the wallet"""
+        return WalletLedger.apply_many([entry])[0]
+
+    @staticmethod
+    @transaction.atomic
+    def apply_many(entries: List[LedgerEntry]) -> List[Transaction]:
+        """
+        Apply several entries atomically.
+        Deltas are summed per wallet and applied in wallet id order, so two batches touching the
+        same wallets cannot deadlock. Either every entry is applied or none is.
+        """
+        if not entries:
+            return []
+
+        transactions = bulk_create_with_pids(Transaction.objects, [WalletLedger._build_transaction(e) for e in entries])
+
+        deltas = defaultdict(lambda: [Decimal(0), Decimal(0)])
+        for entry in entries:
+            deltas[entry.wallet_id][0] += Decimal(entry.coin_delta)
+            deltas[entry.wallet_id][1] += Decimal(entry.balance_delta)
+
+        for wallet_id in sorted(deltas):
+            coin_delta, balance_delta = deltas[wallet_id]
+            if coin_delta or balance_delta:
+                WalletLedger.apply_delta(wallet_id, coin_delta, balance_delta)
+
+        return transactions
+
+    @staticmethod
+    def get_balances(wallet_id: int) -> Optional[dict]:
+        """Current balances, read without locking"""
+        return Wallet.objects.filter(pk=wallet_id).values("balance", "coin_balance").first()
@@ -1,8 +1,8 @@
 import logging
 from decimal import Decimal
-from django.db import transaction
 from django.contrib.auth import get_user_model
 from apps.wallet.models import Wallet, Transaction, CoinSettings
+from apps.wallet.services.ledger import WalletLedger, LedgerEntry, InsufficientWalletBalance
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -38,7 +38,13 @@ class WalletService:
         return wallet.coin_balance
 
     @staticmethod
-    @transaction.atomic
+    def _coin_pricing(coin_amount):
+        """Exchange rate and rial value of ``coin_amount`` from a single settings lookup"""
+        exchange_rate = CoinSettings.get_exchange_rate()
+        rial_value = int(Decimal(str(coin_amount)) * exchange_rate) if coin_amount else 0
+        return exchange_rate, rial_value
+
+    @staticmethod
     def deposit(user, amount, reference_id=None, description=None):
         """
         Add funds to user's wallet
@@ -46,25 +52,18 @@ class WalletService:
         if amount <= 0:
             raise ValueError("Deposit amount must be positive")
 
-        wallet = WalletService.get_or_create_wallet(user)
-
-        trans = Transaction.objects.create(
-            wallet=wallet,
-            amount=amount,
-            type="deposit",
-            status="completed",
-            reference_id=reference_id,
-            description=description,
+        trans = WalletLedger.apply(
+            LedgerEntry(
+                wallet_id=WalletLedger.get_wallet_id(user),
+                balance_delta=Decimal(amount),
+                transaction=dict(amount=amount, type="deposit", reference_id=reference_id, description=description),
+            )
         )
 
-        wallet.balance += Decimal(amount)
-        wallet.save()
-
-        logger.info(f"Deposited {amount} to {user}'s wallet. New balance: {wallet.balance}")
+        logger.info(f"Deposited {amount} to {user}'s wallet")
         return trans
 
     @staticmethod
-    @transaction.atomic
     def withdraw(user, amount, reference_id=None, description=None):
         """
         Withdraw funds from user's wallet
@@ -72,28 +71,18 @@ class WalletService:
         if amount <= 0:
             raise ValueError("Withdrawal amount must be positive")
 
-        wallet = WalletService.get_or_create_wallet(user)
-
-        if wallet.balance < amount:
-            raise ValueError("Insufficient funds")
-
-        trans = Transaction.objects.create(
-            wallet=wallet,
-            amount=amount,
-            type="withdrawal",
-            status="completed",
-            reference_id=reference_id,
-            description=description,
+        trans = WalletLedger.apply(
+            LedgerEntry(
+                wallet_id=WalletLedger.get_wallet_id(user),
+                balance_delta=-Decimal(amount),
+                transaction=dict(amount=amount, type="withdrawal", reference_id=reference_id, description=description),
+            )
         )
 
-        wallet.balance -= Decimal(amount)
-        wallet.save()
-
-        logger.info(f"Withdrew {amount} from {user}'s wallet. New balance: {wallet.balance}")
+        logger.info(f"Withdrew {amount} from {user}'s wallet")
         return trans
 
     @staticmethod
-    @transaction.atomic
     def purchase_coins(user, rial_amount, reference_id=None, description=None):
         """
         Purchase coins with Rials
@@ -101,37 +90,30 @@ class WalletService:
         if rial_amount <= 0:
             raise ValueError("Purchase amount must be positive")
 
-        wallet = WalletService.get_or_create_wallet(user)
-
-        if wallet.balance < rial_amount:
-            raise ValueError("Insufficient funds")
-
         # Calculate ctainoersion
         exchange_rate = CoinSettings.get_exchange_rate()
         coin_amount = CoinSettings.ctainoert_rial_to_coin(rial_amount)
 
-        tr = Transaction.objects.create(
-            wallet=wallet,
-            amount=rial_amount,
-            coin_amount=coin_amount,
-            type="coin_purchase",
-            status="completed",
-            reference_id=reference_id,
-            description=description or f"تبدیل {rial_amount} ریال به {coin_amount} سکه",
-            exchange_rate=exchange_rate,
+        tr = WalletLedger.apply(
+            LedgerEntry(
+                wallet_id=WalletLedger.get_wallet_id(user),
+                coin_delta=Decimal(coin_amount),
+                balance_delta=-Decimal(rial_amount),
+                transaction=dict(
+                    amount=rial_amount,
+                    coin_amount=coin_amount,
+                    type="coin_purchase",
+                    reference_id=reference_id,
+                    description=description or f"تبدیل {rial_amount} ریال به {coin_amount} سکه",
+                    exchange_rate=exchange_rate,
+                ),
+            )
         )
 
-        wallet.balance -= Decimal(rial_amount)
-        wallet.coin_balance += Decimal(coin_amount)
-        wallet.save()
-
-        logger.info(
-            f"Purchased {coin_amount} coins for {rial_amount} rials for {user}. New coin balance: {wallet.coin_balance}"
-        )
+        logger.info(f"Purchased {coin_amount} coins for {rial_amount} rials for {user}")
         return tr
 
     @staticmethod
-    @transaction.atomic
     def buy_coins_from_payment(user, rial_amount, reference_id=None, description=None):
         """
         Buy coins directly from payment (without deducting from wallet balance)
@@ -139,33 +121,29 @@ class WalletService:
         if rial_amount <= 0:
             raise ValueError("Purchase amount must be positive")
 
-        wallet = WalletService.get_or_create_wallet(user)
-
         # Calculate ctainoersion
         exchange_rate = CoinSettings.get_exchange_rate()
         coin_amount = CoinSettings.ctainoert_rial_to_coin(rial_amount)
 
-        trans = Transaction.objects.create(
-            wallet=wallet,
-            amount=rial_amount,
-            coin_amount=coin_amount,
-            type="coin_purchase",
-            status="completed",
-            reference_id=reference_id,
-            description=description or f"خرید {coin_amount} سکه با {rial_amount} ریال",
-            exchange_rate=exchange_rate,
+        trans = WalletLedger.apply(
+            LedgerEntry(
+                wallet_id=WalletLedger.get_wallet_id(user),
+                coin_delta=Decimal(coin_amount),
+                transaction=dict(
+                    amount=rial_amount,
+                    coin_amount=coin_amount,
+                    type="coin_purchase",
+                    reference_id=reference_id,
+                    description=description or f"خرید {coin_amount} سکه با {rial_amount} ریال",
+                    exchange_rate=exchange_rate,
+                ),
+            )
         )
 
-        wallet.coin_balance += Decimal(coin_amount)
-        wallet.save()
-
-        logger.info(
-            f"Purchased {coin_amount} coins for {rial_amount} rials for {user} directly. New coin balance: {wallet.coin_balance}"
-        )
+        logger.info(f"Purchased {coin_amount} coins for {rial_amount} rials for {user} directly")
         return trans
 
     @staticmethod
-    @transaction.atomic
     def use_coins(user, coin_amount, reference_id=None, description=None):
         """
         Use coins from user's wallet
@@ -173,34 +151,28 @@ class WalletService:
         if coin_amount < 0:
             raise ValueError("Coin amount must be positive")
 
-        wallet = WalletService.get_or_create_wallet(user)
-
-        if wallet.coin_balance < coin_amount:
-            raise ValueError("موجودی سکه کافی نیست")
-
         # Calculate rial value for record-keeping
-        rial_value = CoinSettings.ctainoert_coin_to_rial(coin_amount)
-        exchange_rate = CoinSettings.get_exchange_rate()
-
-        tr = Transaction.objects.create(
-            wallet=wallet,
-            amount=rial_value,  # Rial equivalent for reference
-            coin_amount=coin_amount,
-            type="coin_usage",
-            status="completed",
-            reference_id=reference_id,
-            description=description,
-            exchange_rate=exchange_rate,
+        exchange_rate, rial_value = WalletService._coin_pricing(coin_amount)
+
+        tr = WalletLedger.apply(
+            LedgerEntry(
+                wallet_id=WalletLedger.get_wallet_id(user),
+                coin_delta=-Decimal(coin_amount),
+                transaction=dict(
+                    amount=rial_value,  # Rial equivalent for reference
+                    coin_amount=coin_amount,
+                    type="coin_usage",
+                    reference_id=reference_id,
+                    description=description,
+                    exchange_rate=exchange_rate,
+                ),
+            )
         )
-        print(f"{tr=}", flush=True)
-        wallet.coin_balance -= Decimal(coin_amount)
-        wallet.save()
 
-        logger.info(f"Used {coin_amount} coins from {user}'s wallet. New coin balance: {wallet.coin_balance}")
+        logger.info(f"Used {coin_amount} coins from {user}'s wallet")
         return tr
 
     @staticmethod
-    @transaction.atomic
     def refund_coins(user, coin_amount, reference_id=None, description=None):
         """
         Refund coins to user's wallet
@@ -208,31 +180,28 @@ class WalletService:
         if coin_amount <= 0:
             raise ValueError("Coin amount must be positive")
 
-        wallet = WalletService.get_or_create_wallet(user)
-
         # Calculate rial value for record-keeping
-        rial_value = CoinSettings.ctainoert_coin_to_rial(coin_amount)
-        exchange_rate = CoinSettings.get_exchange_rate()
-
-        trans = Transaction.objects.create(
-            wallet=wallet,
-            amount=rial_value,  # Rial equivalent for reference
-            coin_amount=coin_amount,
-            type="coin_refund",
-            status="completed",
-            reference_id=reference_id,
-            description=description,
-            exchange_rate=exchange_rate,
+        exchange_rate, rial_value = WalletService._coin_pricing(coin_amount)
+
+        trans = WalletLedger.apply(
+            LedgerEntry(
+                wallet_id=WalletLedger.get_wallet_id(user),
+                coin_delta=Decimal(coin_amount),
+                transaction=dict(
+                    amount=rial_value,  # Rial equivalent for reference
+                    coin_amount=coin_amount,
+                    type="coin_refund",
+                    reference_id=reference_id,
+                    description=description,
+                    exchange_rate=exchange_rate,
+                ),
+            )
         )
 
-        wallet.coin_balance += Decimal(coin_amount)
-        wallet.save()
-
-        logger.info(f"Refunded {coin_amount} coins to {user}'s wallet. New coin balance: {wallet.coin_balance}")
+        logger.info(f"Refunded {coin_amount} coins to {user}'s wallet")
         return trans
 
     @staticmethod
-    @transaction.atomic
     def reward_coins(user, coin_amount, reference_id=None, description=None):
         """
         Reward coins to user's wallet (e.g., for promotions, referrals)
@@ -240,31 +209,28 @@ class WalletService:
         if coin_amount <= 0:
             raise ValueError("Coin amount must be positive")
 
-        wallet = WalletService.get_or_create_wallet(user)
-
         # Calculate rial value for record-keeping
-        rial_value = CoinSettings.ctainoert_coin_to_rial(coin_amount)
-        exchange_rate = CoinSettings.get_exchange_rate()
-
-        tr = Transaction.objects.create(
-            wallet=wallet,
-            amount=rial_value,  # Rial equivalent for reference
-            coin_amount=coin_amount,
-            type="coin_reward",
-            status="completed",
-            reference_id=reference_id,
-            description=description,
-            exchange_rate=exchange_rate,
+        exchange_rate, rial_value = WalletService._coin_pricing(coin_amount)
+
+        tr = WalletLedger.apply(
+            LedgerEntry(
+                wallet_id=WalletLedger.get_wallet_id(user),
+                coin_delta=Decimal(coin_amount),
+                transaction=dict(
+                    amount=rial_value,  # Rial equivalent for reference
+                    coin_amount=coin_amount,
+                    type="coin_reward",
+                    reference_id=reference_id,
+                    description=description,
+                    exchange_rate=exchange_rate,
+                ),
+            )
         )
 
-        wallet.coin_balance += Decimal(coin_amount)
-        wallet.save()
-
-        logger.info(f"Rewarded {coin_amount} coins to {user}'s wallet. New coin balance: {wallet.coin_balance}")
+        logger.info(f"Rewarded {coin_amount} coins to {user}'s wallet")
         return tr
 
     @staticmethod
-    @transaction.atomic
     def pay_for_consultation(user, amount, reference_id=None, description=None, use_coins=False):
         """
         Pay for a consultation service
@@ -272,50 +238,41 @@ class WalletService:
         if amount <= 0:
             raise ValueError("Payment amount must be positive")
 
-        wallet = WalletService.get_or_create_wallet(user)
+        wallet_id = WalletLedger.get_wallet_id(user)
 
         if use_coins:
             # Ctainoert amount to coins
             exchange_rate = CoinSettings.get_exchange_rate()
             coin_amount = CoinSettings.ctainoert_rial_to_coin(amount)
 
-            if wallet.coin_balance < coin_amount:
-                raise ValueError("موجودی سکه کافی نیست")
-
-            trans = Transaction.objects.create(
-                wallet=wallet,
-                amount=amount,
-                coin_amount=coin_amount,
-                type="consultation_fee",
-                status="completed",
-                reference_id=reference_id,
-                description=description or "پرداخت هزینه مشاوره با سکه",
-                exchange_rate=exchange_rate,
+            trans = WalletLedger.apply(
+                LedgerEntry(
+                    wallet_id=wallet_id,
+                    coin_delta=-Decimal(coin_amount),
+                    transaction=dict(
+                        amount=amount,
+                        coin_amount=coin_amount,
+                        type="consultation_fee",
+                        reference_id=reference_id,
+                        description=description or "پرداخت هزینه مشاوره با سکه",
+                        exchange_rate=exchange_rate,
+                    ),
+                )
             )
 
-            wallet.coin_balance -= Decimal(coin_amount)
-            wallet.save()
-
-            logger.info(
-                f"Paid {coin_amount} coins for consultation from {user}'s wallet. New coin balance: {wallet.coin_balance}"
-            )
+            logger.info(f"Paid {coin_amount} coins for consultation from {user}'s wallet")
         else:
-            if wallet.balance < amount:
-                raise ValueError("Insufficient funds")
-
-            trans = Transaction.objects.create(
-                wallet=wallet,
-                amount=amount,
-                type="consultation_fee",
-                status="completed",
-                reference_id=reference_id,
-                description=description,
+            trans = WalletLedger.apply(
+                LedgerEntry(
+                    wallet_id=wallet_id,
+                    balance_delta=-Decimal(amount),
+                    transaction=dict(
+                        amount=amount, type="consultation_fee", reference_id=reference_id, description=description
+                    ),
+                )
             )
 
-            wallet.balance -= Decimal(amount)
-            wallet.save()
-
-            logger.info(f"Paid {amount} for consultation from {user}'s wallet. New balance: {wallet.balance}")
+            logger.info(f"Paid {amount} for consultation from {user}'s wallet")
 
         return trans
 
@@ -336,7 +293,6 @@ class WalletService:
         return transactions
 
     @staticmethod
-    @transaction.atomic
     def deduct_balance(
         user, amount, transaction_type="payment", description=None, reference_id=None, metadata=None, use_coins=True
     ):
@@ -361,59 +317,43 @@ class WalletService:
         if amount <= 0:
             raise ValueError("Amount must be positive")
 
-        wallet = WalletService.get_or_create_wallet(user)
+        wallet_id = WalletLedger.get_wallet_id(user)
 
         if use_coins:
             # Ctainoert amount to coins
-            from apps.wallet.models import CoinSettings
-
             coin_amount = CoinSettings.ctainoert_rial_to_coin(amount)
             exchange_rate = CoinSettings.get_exchange_rate()
 
-            # Check if user has enough coins
-            if wallet.coin_balance < coin_amount:
-                return False
-
-            # Create transaction with metadata
-            tr = Transaction.objects.create(
-                wallet=wallet,
-                amount=amount,
-                coin_amount=coin_amount,
-                type=transaction_type,
-                status="completed",
-                reference_id=reference_id,
-                description=description or f"پرداخت با {coin_amount} سکه",
-                exchange_rate=exchange_rate,
-                metadata=metadata,
-            )
-
-            # Update wallet coin balance
-            wallet.coin_balance -= Decimal(coin_amount)
-            wallet.save()
-
-            logger.info(
-                f"Deducted {coin_amount} coins from {user}'s wallet for {transaction_type}. New coin balance: {wallet.coin_balance}"
+            entry = LedgerEntry(
+                wallet_id=wallet_id,
+                coin_delta=-Decimal(coin_amount),
+                transaction=dict(
+                    amount=amount,
+                    coin_amount=coin_amount,
+                    type=transaction_type,
+                    reference_id=reference_id,
+                    description=description or f"پرداخت با {coin_amount} سکه",
+                    exchange_rate=exchange_rate,
+                    metadata=metadata,
+                ),
             )
-            return True
         else:
-            # Check if user has enough rial balance
-            if wallet.balance < amount:
-                return False
-
-            # Create transaction with metadata
-            tr = Transaction.objects.create(
-                wallet=wallet,
-                amount=amount,
-                type=transaction_type,
-                status="completed",
-                reference_id=reference_id,
-                description=description,
-                metadata=metadata,
+            entry = LedgerEntry(
+                wallet_id=wallet_id,
+                balance_delta=-Decimal(amount),
+                transaction=dict(
+                    amount=amount,
+                    type=transaction_type,
+                    reference_id=reference_id,
+                    description=description,
+                    metadata=metadata,
+                ),
             )
 
-            # Update wallet balance
-            wallet.balance -= Decimal(amount)
-            wallet.save()
+        try:
+            WalletLedger.apply(entry)
+        except InsufficientWalletBalance:
+            return False
 
-            logger.info(f"Deducted {amount} from {user}'s wallet for {transaction_type}. New balance: {wallet.balance}")
-            return True
+        logger.info(f"Deducted {amount} from {user}'s wallet for {transaction_type} (coins: {use_coins})")
+        return True
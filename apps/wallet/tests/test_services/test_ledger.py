@@ -0,0 +1,104 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection
+from django.test import TransactionTestCase
+from model_bakery import baker
+
+from apps.wallet.models import Transaction, Wallet
+from apps.wallet.services.ledger import InsufficientWalletBalance, LedgerEntry, WalletLedger
+from apps.wallet.services.wallet import WalletService
+from base_utils.base_tests import TainoBaseServiceTestCase
+
+
+class WalletLedgerTest(TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.wallet = WalletService.get_or_create_wallet(self.user)
+        Wallet.objects.filter(pk=self.wallet.pk).update(coin_balance=100, balance=1000)
+
+    def test_use_coins_debits_wallet(self):
+        tr = WalletService.use_coins(self.user, 30)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.coin_balance, Decimal(70))
+        self.assertEqual(tr.type, "coin_usage")
+        self.assertEqual(tr.status, "completed")
+        self.assertTrue(tr.pid)
+
+    def test_use_coins_insufficient_leaves_no_transaction(self):
+        with self.assertRaises(ValueError):
+            WalletService.use_coins(self.user, 101)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.coin_balance, Decimal(100))
+        self.assertFalse(Transaction.objects.filter(wallet=self.wallet, type="coin_usage").exists())
+
+    def test_deduct_balance_returns_false_when_insufficient(self):
+        self.assertFalse(WalletService.deduct_balance(self.user, 2000, use_coins=False))
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal(1000))
+
+    def test_apply_many_is_all_or_nothing(self):
+        entries = [
+            LedgerEntry(wallet_id=self.wallet.pk, coin_delta=Decimal(-60), transaction=dict(type="coin_usage")),
+            LedgerEntry(wallet_id=self.wallet.pk, coin_delta=Decimal(-60), transaction=dict(type="coin_usage")),
+        ]
+
+        with self.assertRaises(InsufficientWalletBalance):
+            WalletLedger.apply_many(entries)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.coin_balance, Decimal(100))
+        self.assertFalse(Transaction.objects.filter(wallet=self.wallet, type="coin_usage").exists())
+
+    def test_apply_many_writes_one_transaction_per_entry(self):
+        entries = [
+            LedgerEntry(wallet_id=self.wallet.pk, coin_delta=Decimal(-10), transaction=dict(type="coin_usage"))
+            for _ in range(5)
+        ]
+
+        transactions = WalletLedger.apply_many(entries)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.coin_balance, Decimal(50))
+        self.assertEqual(len(transactions), 5)
+        self.assertEqual(len({tr.pid for tr in transactions}), 5)
+
+
+@skipUnless(connection.vendor == "postgresql", "Row-level concurrency needs PostgreSQL")
+class WalletLedgerConcurrencyTest(TransactionTestCase):
+    threads = 8
+    iterations = 20
+
+    def setUp(self):
+        self.user = baker.make(get_user_model())
+        self.wallet = WalletService.get_or_create_wallet(self.user)
+        # Enough for only half of the debits
+        Wallet.objects.filter(pk=self.wallet.pk).update(coin_balance=self.threads * self.iterations // 2)
+
+    def test_parallel_debits_never_overdraw(self):
+        def debit_loop(_):
+            succeeded = 0
+            try:
+                for _ in range(self.iterations):
+                    try:
+                        WalletService.use_coins(self.user, 1)
+                        succeeded += 1
+                    except ValueError:
+                        pass
+            finally:
+                close_old_connections()
+            return succeeded
+
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            succeeded = sum(executor.map(debit_loop, range(self.threads)))
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(succeeded, self.threads * self.iterations // 2)
+        self.assertEqual(self.wallet.coin_balance, Decimal(0))
+        self.assertEqual(Transaction.objects.filter(wallet=self.wallet, type="coin_usage").count(), succeeded)
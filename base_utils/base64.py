@@ -7,6 +7,20 @@ from rest_framework import serializers
 
 from base_utils.files import get_file_format, get_file_extension_by_base64_uri
 
+# A multiple of 3, so base64 chunks can be concatenated without padding in between
+B64_CHUNK_SIZE = 3 * 256 * 1024
+
+
+def b64encode_buffer(buffer) -> str:
+    """Base64 of a bytes-like buffer (e.g. a mmap), encoded chunk by chunk without copying it whole"""
+    view = memoryview(buffer)
+    try:
+        return "".join(
+            base64.b64encode(view[i:i + B64_CHUNK_SIZE]).decode("ascii") for i in range(0, len(view), B64_CHUNK_SIZE)
+        )
+    finally:
+        view.release()
+
 
 class Base64FileField(serializers.FileField):
     """
@@ -24,6 +24,19 @@ class BaseModel(SoftDeleteModel):
         super(BaseModel, self).save(force_insert=False, force_update=False, using=None, update_fields=None)
 
 
+def assign_pids(objs):
+    """Give unsaved BaseModel rows their public id, for inserts that skip ``BaseModel.save``"""
+    for obj in objs:
+        if not obj.pid:
+            obj.pid = generate_unique_public_id()
+    return objs
+
+
+def bulk_create_with_pids(manager, objs, **kwargs):
+    """``bulk_create`` for BaseModel rows: it skips ``BaseModel.save``, so the public ids are assigned here"""
+    return manager.bulk_create(assign_pids(list(objs)), **kwargs)
+
+
 class TimeStampModel(BaseModel):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -1,11 +1,30 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from faker import Faker
 from model_bakery import baker
 from rest_framework.test import APITestCase, APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class LocMemCacheTestMixin:
+    """
+    Runs each test on an empty in-process cache instead of Redis.
+
+    The LocMem cache outlives a test, so it is cleared first: a payload cached by an earlier test
+    is never served to this one.
+    """
+
+    def setUp(self) -> None:
+        cache_override = override_settings(CACHES=LOCMEM_CACHES)
+        cache_override.enable()
+        self.addCleanup(cache_override.disable)
+        cache.clear()
+        super().setUp()
+
 
 class TainoBaseAPITestCase(APITestCase):
     @staticmethod
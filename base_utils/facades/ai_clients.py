@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import threading
+import weakref
+from urllib.parse import urlparse
+
+import httpx
+from django.conf import settings
+from openai import AsyncOpenAI, OpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient
+
+logger = logging.getLogger(__name__)
+
+
+class AIClientRegistry:
+    """
+    Process-wide registry of OpenAI-compatible clients.
+
+    Clients are keyed by (base_url, api_key, model) and reused across messages, so a chat turn
+    no longer pays for a new TLS handshake and connection pool. The underlying httpx pools are
+    shared per provider host, which is where the connection limits are enforced. Async clients
+    are additionally bound to the event loop that created them, since httpx async pools cannot
+    be shared between loops.
+
+    Callers can tag a client with the model instance it was built from (see ``tag_for``);
+    saving or deleting that instance drops every client registered under the tag.
+    """
+
+    DEFAULT_BASE_URL = "https://api.deepseek.com/v1"
+
+    _lock = threading.Lock()
+    _sync_clients = {}
+    _sync_http_clients = {}
+    _async_clients = weakref.WeakKeyDictionary()
+    _async_http_clients = weakref.WeakKeyDictionary()
+    _tags = {}
+    _stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def tag_for(instance) -> str:
+        """Invalidation tag for a config model instance"""
+        return f"{instance._meta.label_lower}:{instance.pk}"
+
+    @classmethod
+    def _make_key(cls, api_key: str, base_url: str = None, model: str = None) -> tuple:
+        return (base_url or cls.DEFAULT_BASE_URL, api_key, model)
+
+    @staticmethod
+    def _provider_of(base_url: str) -> str:
+        return urlparse(base_url).netloc or base_url
+
+    @classmethod
+    def _get_limits(cls, provider: str) -> httpx.Limits:
+        provider_limits = getattr(settings, "AI_CLIENT_PROVIDER_MAX_CONNECTIONS", {})
+        max_connections = provider_limits.get(provider, getattr(settings, "AI_CLIENT_MAX_CONNECTIONS", 100))
+        return httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(max_connections, getattr(settings, "AI_CLIENT_MAX_KEEPALIVE_CONNECTIONS", 20)),
+            keepalive_expiry=getattr(settings, "AI_CLIENT_KEEPALIVE_EXPIRY", 60),
+        )
+
+    @classmethod
+    def _remember_tag(cls, tag: str, key: tuple):
+        if tag:
+            cls._tags.setdefault(tag, set()).add(key)
+
+    @classmethod
+    def get_client(cls, api_key: str, base_url: str = None, model: str = None, tag: str = None) -> OpenAI:
+        """Get (or build) a pooled synchronous client"""
+        key = cls._make_key(api_key, base_url, model)
+
+        with cls._lock:
+            client = cls._sync_clients.get(key)
+            if client is not None:
+                cls._stats["hits"] += 1
+                return client
+
+            cls._stats["misses"] += 1
+            provider = cls._provider_of(key[0])
+            http_client = cls._sync_http_clients.get(provider)
+            if http_client is None:
+                http_client = DefaultHttpxClient(limits=cls._get_limits(provider))
+                cls._sync_http_clients[provider] = http_client
+
+            client = OpenAI(api_key=api_key, base_url=key[0], http_client=http_client)
+            cls._sync_clients[key] = client
+            cls._remember_tag(tag, key)
+            return client
+
+    @classmethod
+    def get_async_client(cls, api_key: str, base_url: str = None, model: str = None, tag: str = None) -> AsyncOpenAI:
+        """Get (or build) a pooled async client bound to the running event loop"""
+        key = cls._make_key(api_key, base_url, model)
+        loop = asyncio.get_running_loop()
+
+        with cls._lock:
+            loop_clients = cls._async_clients.setdefault(loop, {})
+            client = loop_clients.get(key)
+            if client is not None:
+                cls._stats["hits"] += 1
+                return client
+
+            cls._stats["misses"] += 1
+            provider = cls._provider_of(key[0])
+            loop_http_clients = cls._async_http_clients.setdefault(loop, {})
+            http_client = loop_http_clients.get(provider)
+            if http_client is None:
+                http_client = DefaultAsyncHttpxClient(limits=cls._get_limits(provider))
+                loop_http_clients[provider] = http_client
+
+            client = AsyncOpenAI(api_key=api_key, base_url=key[0], http_client=http_client)
+            loop_clients[key] = client
+            cls._remember_tag(tag, key)
+            return client
+
+    @classmethod
+    def invalidate_tag(cls, tag: str):
+        """
+        Drop every client registered under ``tag``.
+        The shared per-provider pools are kept; only the client wrappers holding the stale
+        credentials are released.
+        """
+        with cls._lock:
+            keys = cls._tags.pop(tag, set())
+            for key in keys:
+                cls._sync_clients.pop(key, None)
+                for loop_clients in cls._async_clients.values():
+                    loop_clients.pop(key, None)
+            if keys:
+                cls._stats["invalidations"] += 1
+
+        if keys:
+            logger.info(f"Invalidated {len(keys)} AI client(s) for {tag}")
+
+    @classmethod
+    def clear(cls):
+        """Drop all clients and close the synchronous pools"""
+        with cls._lock:
+            http_clients = list(cls._sync_http_clients.values())
+            cls._sync_clients.clear()
+            cls._sync_http_clients.clear()
+            cls._async_clients.clear()
+            cls._async_http_clients.clear()
+            cls._tags.clear()
+
+        for http_client in http_clients:
+            try:
+                http_client.close()
+            except Exception as e:
+                logger.warning(f"Error closing AI http client: {e}")
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Pool hit/miss counters and current pool sizes"""
+        with cls._lock:
+            return {
+                **cls._stats,
+                "sync_clients": len(cls._sync_clients),
+                "async_clients": sum(len(clients) for clients in cls._async_clients.values()),
+                "providers": sorted(
+                    set(cls._sync_http_clients)
+                    | {provider for pools in cls._async_http_clients.values() for provider in pools}
+                ),
+            }
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+from collections import Counter, deque
+from typing import Awaitable, Callable, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AIResponseSupervisor:
+    """
+    Per-process supervisor of the AI responses generated by websocket consumers.
+
+    Every response runs as a task owned by a consumer (its channel name), bounded by a global
+    concurrency limit and by per-user / per-session caps. Responses over the global limit wait
+    in a bounded FIFO queue for at most ``queue_timeout`` seconds; anything over the caps or the
+    queue size is refused at admission, so a burst of messages cannot turn into an unbounded
+    number of upstream LLM calls. ``cancel_owner`` cancels the tasks of a disconnected consumer.
+    Consumers check ``admission_status`` before creating (and charging for) a message.
+
+    Admission statuses returned by ``submit``: ``STARTED`` and ``QUEUED`` come with a task, the
+    others (``USER_LIMIT``, ``SESSION_LIMIT``, ``BUSY``) without.
+    """
+
+    STARTED = "started"
+    QUEUED = "queued"
+    USER_LIMIT = "user_limit"
+    SESSION_LIMIT = "session_limit"
+    BUSY = "busy"
+
+    _default = None
+
+    def __init__(
+        self,
+        max_concurrency: int = 32,
+        max_per_user: int = 2,
+        max_per_session: int = 1,
+        max_queued: int = 64,
+        queue_timeout: float = 30,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_per_user = max_per_user
+        self.max_per_session = max_per_session
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+
+        self._running = 0
+        self._waiters = deque()
+        # task -> (owner, user, session, queue waiter or None when it started with a slot)
+        self._tasks = {}
+        self._per_user = Counter()
+        self._per_session = Counter()
+        self._stats = Counter()
+
+    @classmethod
+    def get_default(cls) -> "AIResponseSupervisor":
+        """The process-wide supervisor, configured from settings"""
+        if cls._default is None:
+            cls._default = cls(
+                max_concurrency=getattr(settings, "AI_RESPONSE_MAX_CONCURRENCY", 32),
+                max_per_user=getattr(settings, "AI_RESPONSE_MAX_PER_USER", 2),
+                max_per_session=getattr(settings, "AI_RESPONSE_MAX_PER_SESSION", 1),
+                max_queued=getattr(settings, "AI_RESPONSE_MAX_QUEUED", 64),
+                queue_timeout=getattr(settings, "AI_RESPONSE_QUEUE_TIMEOUT_SECONDS", 30),
+            )
+        return cls._default
+
+    def submit(
+        self,
+        factory: Callable[[], Awaitable],
+        owner: str,
+        user,
+        session,
+        on_timeout: Callable[[], Awaitable] = None,
+    ) -> Tuple[Optional[asyncio.Task], str]:
+        """
+        Admit ``factory()`` for execution.
+
+        ``factory`` is only called once a slot is free, so a refused or timed out response never
+        creates its coroutine. ``on_timeout`` is awaited if the response left the queue unstarted.
+
+        Returns:
+            Tuple of (task or None, admission status)
+        """
+        status = self.admission_status(user, session)
+        if self.is_refused(status):
+            self._stats[status] += 1
+            logger.warning(f"AI response refused ({status}) for user={user} session={session}: {self.stats()}")
+            return None, status
+
+        loop = asyncio.get_running_loop()
+        if status == self.STARTED:
+            # The slot is taken now, so admission is decided synchronously and in order
+            self._running += 1
+            waiter = None
+        else:
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+
+        task = loop.create_task(self._run(waiter, factory, on_timeout))
+        self._tasks[task] = (owner, user, session, waiter)
+        self._per_user[user] += 1
+        self._per_session[session] += 1
+        self._stats[status] += 1
+        task.add_done_callback(self._forget)
+        return task, status
+
+    def admission_status(self, user, session) -> str:
+        """What ``submit`` would answer right now, without admitting anything"""
+        if self._per_user[user] >= self.max_per_user:
+            return self.USER_LIMIT
+        if self._per_session[session] >= self.max_per_session:
+            return self.SESSION_LIMIT
+        if self._running < self.max_concurrency and not self._waiters:
+            return self.STARTED
+        if len(self._waiters) < self.max_queued:
+            return self.QUEUED
+        return self.BUSY
+
+    def is_refused(self, status: str) -> bool:
+        return status not in (self.STARTED, self.QUEUED)
+
+    def cancel_owner(self, owner: str) -> int:
+        """Cancel the queued and running responses of a consumer, returns how many were cancelled"""
+        tasks = [task for task, (task_owner, *_) in self._tasks.items() if task_owner == owner and not task.done()]
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running,
+            "waiting": len(self._waiters),
+            "in_flight": len(self._tasks),
+            "users": len(self._per_user),
+            "sessions": len(self._per_session),
+            "max_concurrency": self.max_concurrency,
+            "max_queued": self.max_queued,
+            **{
+                key: self._stats[key]
+                for key in (
+                    self.STARTED,
+                    self.QUEUED,
+                    self.USER_LIMIT,
+                    self.SESSION_LIMIT,
+                    self.BUSY,
+                    "timed_out",
+                    "completed",
+                    "failed",
+                    "cancelled",
+                )
+            },
+        }
+
+    async def _run(self, waiter, factory, on_timeout):
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+            except asyncio.TimeoutError:
+                # Unless the slot was handed over right at the deadline
+                if not waiter.done():
+                    self._drop_waiter(waiter)
+                    self._stats["timed_out"] += 1
+                    if on_timeout:
+                        await on_timeout()
+                    return
+
+        await factory()
+
+    def _holds_slot(self, waiter) -> bool:
+        return waiter is None or (waiter.done() and not waiter.cancelled())
+
+    def _drop_waiter(self, waiter):
+        waiter.cancel()
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+
+    def _release(self):
+        # Hand the slot straight to the oldest waiter, so queued responses keep their order
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self._running -= 1
+
+    def _forget(self, task):
+        # Slots are settled here rather than in ``_run``: a task cancelled before its first step
+        # never executes any of its code
+        _, user, session, waiter = self._tasks.pop(task)
+        if self._holds_slot(waiter):
+            self._release()
+        else:
+            self._drop_waiter(waiter)
+
+        for counter, key in ((self._per_user, user), (self._per_session, session)):
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+
+        if task.cancelled():
+            self._stats["cancelled"] += 1
+        elif task.exception() is not None:
+            self._stats["failed"] += 1
+            logger.error(f"AI response task failed: {task.exception()}", exc_info=task.exception())
+        else:
+            self._stats["completed"] += 1
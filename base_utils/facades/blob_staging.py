@@ -0,0 +1,152 @@
+import hashlib
+import logging
+import mmap
+import tempfile
+import uuid
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, Storage
+from django.utils import timezone
+
+from base_utils.base64 import b64encode_buffer
+
+log = logging.getLogger(__name__)
+
+
+class BlobStaging:
+    """
+    Hands uploaded files to Celery workers by reference instead of by value.
+
+    ``stage`` streams an upload into the staging storage under ``<sha256>-<nonce>`` and returns a
+    small JSON-able reference (key, sha256, size, name, content_type), which is all that goes
+    through the broker and into the result backend. The worker reads the blob back with
+    ``open_buffer`` / ``b64encode`` (memory-mapped, S3 blobs are streamed to a temporary file) and
+    ``discard``s it when done. Blobs of tasks that never ran are removed by ``purge_expired``.
+
+    The staging storage is the private S3 bucket when ``USE_AWS_S3`` is on, otherwise the local
+    ``BLOB_STAGING_DIR`` (outside ``MEDIA_ROOT``, which is served publicly), which must then be
+    shared by the web and worker containers.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    _storage = None
+
+    @classmethod
+    def get_storage(cls) -> Storage:
+        if cls._storage is None:
+            if getattr(settings, "USE_AWS_S3", False):
+                from config.settings.aws import TainoPrivateStorage
+
+                cls._storage = TainoPrivateStorage(location=getattr(settings, "BLOB_STAGING_S3_LOCATION", "staging"))
+            else:
+                cls._storage = FileSystemStorage(
+                    location=getattr(settings, "BLOB_STAGING_DIR", settings.BASE_DIR.joinpath("staging"))
+                )
+        return cls._storage
+
+    @classmethod
+    def stage(cls, file, name: str = None, content_type: str = None, sha256: str = None) -> dict:
+        """
+        Store an uploaded file (or any file object) and return its reference. Pass ``sha256`` if
+        the content was already hashed (e.g. by ``FileProcessorService.inspect``).
+        """
+        if sha256 is None:
+            digest = hashlib.sha256()
+            file.seek(0)
+            for chunk in cls._iter_file(file):
+                digest.update(chunk)
+            sha256 = digest.hexdigest()
+        file.seek(0, 2)
+        size = file.tell()
+        file.seek(0)
+
+        # The nonce keeps blobs of concurrent requests with the same content independent
+        key = cls.get_storage().save(f"{sha256}-{uuid.uuid4().hex[:12]}", file)
+
+        return {
+            "key": key,
+            "sha256": sha256,
+            "size": size,
+            "name": name or getattr(file, "name", key),
+            "content_type": content_type or getattr(file, "content_type", "application/octet-stream"),
+        }
+
+    @classmethod
+    def _iter_file(cls, file) -> Iterator[bytes]:
+        if hasattr(file, "chunks"):
+            yield from file.chunks(cls.CHUNK_SIZE)
+            return
+        while chunk := file.read(cls.CHUNK_SIZE):
+            yield chunk
+
+    @classmethod
+    @contextmanager
+    def open_buffer(cls, ref: dict):
+        """
+        Yield the blob as a read-only mmap. Remote blobs are streamed into a temporary file first,
+        so the content is never held in memory as one bytes object.
+        """
+        storage = cls.get_storage()
+        try:
+            path = storage.path(ref["key"])
+        except NotImplementedError:
+            path = None
+
+        with ExitStack() as stack:
+            if path is None:
+                local = stack.enter_context(tempfile.TemporaryFile())
+                with storage.open(ref["key"], "rb") as remote:
+                    for chunk in cls._iter_file(remote):
+                        local.write(chunk)
+                local.flush()
+            else:
+                local = stack.enter_context(open(path, "rb"))
+
+            if not ref.get("size"):
+                # Empty files cannot be mapped
+                yield b""
+                return
+            yield stack.enter_context(mmap.mmap(local.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def b64encode(cls, ref: dict) -> str:
+        """Base64 of the blob, encoded chunk by chunk from the (mapped) buffer"""
+        with cls.open_buffer(ref) as buffer:
+            return b64encode_buffer(buffer)
+
+    @classmethod
+    def discard(cls, refs: List[Optional[dict]]):
+        storage = cls.get_storage()
+        for ref in refs:
+            if not ref or "key" not in ref:
+                continue
+            try:
+                storage.delete(ref["key"])
+            except Exception as e:
+                log.warning(f"Could not delete staged blob {ref.get('key')}: {e}")
+
+    @classmethod
+    def purge_expired(cls, max_age_hours: int = None) -> int:
+        """Delete blobs older than ``max_age_hours`` (their task failed or never ran)"""
+        max_age_hours = max_age_hours or getattr(settings, "BLOB_STAGING_MAX_AGE_HOURS", 24)
+        cutoff = timezone.now() - timedelta(hours=max_age_hours)
+        storage = cls.get_storage()
+
+        try:
+            _, keys = storage.listdir("")
+        except FileNotFoundError:
+            return 0
+
+        deleted = 0
+        for key in keys:
+            try:
+                if storage.get_modified_time(key) < cutoff:
+                    storage.delete(key)
+                    deleted += 1
+            except Exception as e:
+                log.warning(f"Could not purge staged blob {key}: {e}")
+        return deleted
@@ -1,8 +1,15 @@
+import logging
+import os
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from datetime import datetime
 
 from django.core.cache import cache
 
+log = logging.getLogger(__name__)
+
 
 class AbstractCacheManager(ABC):
     @abstractmethod
@@ -40,3 +47,140 @@ class RedisCacheManager(AbstractCacheManager):
 
     def validity(self, key, value):
         return bool(self.cache.get(key) == value)
+
+
+class LocalTTLCache:
+    """
+    Small thread-safe, per-process LRU cache with a time-to-live per entry.
+
+    Used as the first tier in front of the Redis cache for data that is read on every request
+    but rarely changes. Entries expire on their own; cross-process invalidation is done through
+    ``CacheInvalidationBus``.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, max_entries: int = 256, ttl: float = 30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING:
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheInvalidationBus:
+    """
+    Redis pub/sub fan-out that tells every process to drop its local cache tier.
+
+    Each channel gets one daemon listener thread per process, started lazily on first
+    ``subscribe``. After a reconnect the callbacks run once more, since messages published while
+    disconnected are lost. Non-Redis cache backends (tests, local dev) simply disable the bus,
+    local entries then only expire by TTL.
+    """
+
+    RECONNECT_DELAY_SECONDS = 5
+
+    _lock = threading.Lock()
+    _callbacks = {}
+    _listeners = set()
+
+    @staticmethod
+    def _get_connection():
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+
+    @classmethod
+    def subscribe(cls, channel: str, callback):
+        with cls._lock:
+            callbacks = cls._callbacks.setdefault(channel, [])
+            if callback not in callbacks:
+                callbacks.append(callback)
+
+            if channel in cls._listeners:
+                return
+            cls._listeners.add(channel)
+
+        cls._start_listener(channel)
+
+    @classmethod
+    def _start_listener(cls, channel: str):
+        threading.Thread(target=cls._listen, args=(channel,), daemon=True, name=f"cache-bus:{channel}").start()
+
+    @classmethod
+    def _restart_listeners_after_fork(cls):
+        # Threads do not survive fork (celery prefork, gunicorn --preload): channels subscribed in
+        # the parent, e.g. at import time, would otherwise never be listened to in the child
+        cls._lock = threading.Lock()
+        for channel in cls._listeners:
+            cls._start_listener(channel)
+
+    @classmethod
+    def publish(cls, channel: str, message: str = "invalidate"):
+        try:
+            cls._get_connection().publish(channel, message)
+        except NotImplementedError:
+            pass
+        except Exception as e:
+            log.warning(f"Could not publish cache invalidation on {channel}: {e}")
+
+    @classmethod
+    def _dispatch(cls, channel: str, message):
+        for callback in list(cls._callbacks.get(channel, [])):
+            try:
+                callback(message)
+            except Exception as e:
+                log.error(f"Cache invalidation callback failed on {channel}: {e}", exc_info=True)
+
+    @classmethod
+    def _listen(cls, channel: str):
+        while True:
+            try:
+                pubsub = cls._get_connection().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(channel)
+                # Anything published while we were not listening is lost
+                cls._dispatch(channel, None)
+                for message in pubsub.listen():
+                    data = message.get("data")
+                    cls._dispatch(channel, data.decode() if isinstance(data, bytes) else data)
+            except NotImplementedError:
+                log.info(f"Cache backend has no pub/sub, {channel} invalidation stays process-local")
+                return
+            except Exception as e:
+                log.warning(f"Cache invalidation listener on {channel} disconnected: {e}")
+                time.sleep(cls.RECONNECT_DELAY_SECONDS)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=CacheInvalidationBus._restart_listeners_after_fork)
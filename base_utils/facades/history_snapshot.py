@@ -0,0 +1,134 @@
+import json
+import logging
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.core.cache import cache
+
+from base_utils.facades.cache import LocalTTLCache
+
+log = logging.getLogger(__name__)
+
+
+class MessageHistorySnapshot:
+    """
+    Encoded "<prefix>.history" frame with the latest messages of a chat session.
+
+    Websocket consumers send it as one frame on connect instead of one frame per message. The
+    messages are read with a single ``values()`` projection and the JSON payload is cached per
+    session, in Redis and in a short-lived process-local tier, so a reconnect storm on a session
+    shares one encoded string. A new message bumps the session's version (see ``invalidate``),
+    which retires every cached payload of that session at once. Clients opt in to the frame with
+    ``?history=snapshot`` on the websocket URL (see ``is_requested``), the others keep getting one
+    frame per message.
+
+    Subclasses set the message model, the session foreign key and the frame types.
+    """
+
+    model = None
+    SESSION_FIELD = None
+    CACHE_PREFIX = None
+    HISTORY_TYPE = None
+    MESSAGE_TYPE = None
+
+    # Payloads must expire well before the version key, which starts again from 0 once expired
+    VERSION_TTL = 60 * 60 * 24
+    FIELDS = (
+        "pid",
+        "sender__pid",
+        "sender__first_name",
+        "sender__last_name",
+        "content",
+        "message_type",
+        "created_at",
+        "is_ai",
+        "is_system",
+    )
+
+    _local = LocalTTLCache(
+        max_entries=getattr(settings, "CHAT_HISTORY_SNAPSHOT_LOCAL_MAX_ENTRIES", 512),
+        ttl=getattr(settings, "CHAT_HISTORY_SNAPSHOT_LOCAL_TTL", 30),
+    )
+
+    @staticmethod
+    def is_requested(scope) -> bool:
+        """Whether the connecting client asked for the history frame"""
+        if not getattr(settings, "CHAT_HISTORY_SNAPSHOT_ENABLED", True):
+            return False
+        query = parse_qs(scope.get("query_string", b"").decode())
+        return "snapshot" in query.get("history", [])
+
+    @classmethod
+    def _version_key(cls, session_pk) -> str:
+        return f"{cls.CACHE_PREFIX}:version:{session_pk}"
+
+    @classmethod
+    def get_version(cls, session_pk) -> int:
+        try:
+            return cache.get(cls._version_key(session_pk)) or 0
+        except Exception as e:
+            log.warning(f"Could not read {cls.CACHE_PREFIX} version: {e}")
+            return 0
+
+    @classmethod
+    def invalidate(cls, session_pk):
+        """Retire the cached snapshots of a session in every process"""
+        key = cls._version_key(session_pk)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Key does not exist yet
+            cache.set(key, 1, cls.VERSION_TTL)
+        except Exception as e:
+            log.warning(f"Could not bump {cls.CACHE_PREFIX} version: {e}")
+
+    @classmethod
+    def to_frame(cls, message: dict) -> dict:
+        return {
+            "type": cls.MESSAGE_TYPE,
+            "id": str(message["pid"]),
+            "sender": str(message["sender__pid"]),
+            "sender_name": f"{message['sender__first_name']} {message['sender__last_name']}",
+            "message": message["content"],
+            "message_type": message["message_type"],
+            "timestamp": message["created_at"].isoformat(),
+            "is_ai": message["is_ai"],
+            "is_system": message["is_system"],
+        }
+
+    @classmethod
+    def load_messages(cls, session_pk, limit: int) -> list:
+        """The last ``limit`` messages as message frames, oldest first"""
+        messages = (
+            cls.model.objects.filter(**{cls.SESSION_FIELD: session_pk}, is_deleted=False)
+            .order_by("-created_at", "-id")
+            .values(*cls.FIELDS)[:limit]
+        )
+        return [cls.to_frame(message) for message in reversed(messages)]
+
+    @classmethod
+    def get_payload(cls, session_pk, limit: int = None) -> str:
+        """The encoded history frame of a session, ready for ``send(text_data=...)``"""
+        if limit is None:
+            limit = getattr(settings, "CHAT_HISTORY_SNAPSHOT_SIZE", 20)
+
+        key = f"{cls.CACHE_PREFIX}:{session_pk}:{cls.get_version(session_pk)}:{limit}"
+        payload = cls._local.get(key)
+        if payload is not None:
+            return payload
+
+        try:
+            payload = cache.get(key)
+        except Exception as e:
+            log.warning(f"Could not read {cls.CACHE_PREFIX} from cache: {e}")
+
+        if payload is None:
+            messages = cls.load_messages(session_pk, limit)
+            payload = json.dumps({"type": cls.HISTORY_TYPE, "messages": messages}, ensure_ascii=False)
+            try:
+                cache.set(key, payload, getattr(settings, "CHAT_HISTORY_SNAPSHOT_TTL", 600))
+            except Exception as e:
+                log.warning(f"Could not cache {cls.CACHE_PREFIX}: {e}")
+
+        cls._local.set(key, payload)
+        return payload
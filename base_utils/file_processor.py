@@ -1,13 +1,52 @@
+import hashlib
 import logging
+import mmap
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from io import BytesIO
+
 import fitz  # PyMuPDF
 from PIL import Image
-from io import BytesIO
 from typing import Tuple, Optional
+from django.conf import settings
 from django.core.files.uploadedfile import UploadedFile
 
+from base_utils.base64 import b64encode_buffer
+from base_utils.facades.cache import LocalTTLCache
+
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class FileInspection:
+    """
+    Everything pricing, validation and the AI payload need to know about one upload.
+
+    Built once per upload by ``FileProcessorService.inspect`` and reused by every caller.
+    """
+
+    sha256: str
+    size: int
+    name: str
+    file_type: Optional[str]
+    mime_type: str
+    page_count: int = 0
+    width: int = 0
+    height: int = 0
+    image_format: str = ""
+    error: Optional[str] = None
+
+    @property
+    def size_mb(self) -> float:
+        return self.size / (1024 * 1024)
+
+    @property
+    def pages(self) -> int:
+        """Billable pages: an image is one page"""
+        return 1 if self.file_type == "image" else self.page_count
+
+
 class FileProcessorService:
     """سرویس پردازش فایل‌ها برای ارسال به AI"""
 
@@ -15,6 +54,132 @@ class FileProcessorService:
     ALLOWED_IMAGE_FORMATS = {"jpg", "jpeg", "png", "webp", "gif"}
     ALLOWED_DOCUMENT_FORMATS = {"pdf"}
 
+    CHUNK_SIZE = 1024 * 1024
+
+    # Metadata of recently inspected content, so the same document uploaded again is not parsed again
+    _inspections = LocalTTLCache(
+        max_entries=getattr(settings, "FILE_INSPECTION_CACHE_MAX_ENTRIES", 512),
+        ttl=getattr(settings, "FILE_INSPECTION_CACHE_TTL", 3600),
+    )
+
+    @staticmethod
+    def inspect(file: UploadedFile) -> FileInspection:
+        """
+        Inspect an upload once: content hash, size, type, mime, page count and image dimensions.
+
+        The result is memoized on the upload object (so the serializer, the pricing and the
+        task submission of one request share it) and by content hash per process. The content
+        is hashed in chunks and parsed from the upload's temporary file or a memory map of it;
+        it is never copied into one bytes object.
+        """
+        inspection = getattr(file, "_inspection", None)
+        if inspection is not None:
+            return inspection
+
+        digest = hashlib.sha256()
+        size = 0
+        file.seek(0)
+        for chunk in file.chunks(FileProcessorService.CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+        file.seek(0)
+        sha256 = digest.hexdigest()
+
+        file_type = FileProcessorService.get_file_type(file)
+        cached = FileProcessorService._inspections.get((sha256, file_type))
+        if cached is not None:
+            inspection = FileInspection(**{**cached, "name": file.name})
+        else:
+            inspection = FileInspection(
+                sha256=sha256,
+                size=size,
+                name=file.name,
+                file_type=file_type,
+                mime_type=getattr(file, "content_type", None) or "application/octet-stream",
+            )
+            try:
+                if file_type == "document":
+                    FileProcessorService._inspect_pdf(file, inspection)
+                elif file_type == "image":
+                    FileProcessorService._inspect_image(file, inspection)
+            except Exception as e:
+                logger.error(f"Error inspecting file {file.name}: {e}")
+                inspection.error = str(e)
+            finally:
+                file.seek(0)
+
+            metadata = {k: v for k, v in inspection.__dict__.items() if k != "name"}
+            FileProcessorService._inspections.set((sha256, file_type), metadata)
+
+        file._inspection = inspection
+        return inspection
+
+    @staticmethod
+    def _inspect_pdf(file: UploadedFile, inspection: FileInspection):
+        inspection.mime_type = "application/pdf"
+        with FileProcessorService.open_source(file) as (path, buffer):
+            # Small uploads live in memory anyway; PyMuPDF wants bytes for a stream
+            doc = fitz.open(path) if path else fitz.open(stream=bytes(buffer), filetype="pdf")
+            try:
+                inspection.page_count = doc.page_count
+            finally:
+                doc.close()
+        logger.info(f"PDF page count: {inspection.page_count}")
+
+    @staticmethod
+    def _inspect_image(file: UploadedFile, inspection: FileInspection):
+        # Image.open only reads the header
+        file.seek(0)
+        with Image.open(file) as img:
+            inspection.image_format = img.format.lower() if img.format else ""
+            inspection.width, inspection.height = img.size
+        if inspection.image_format:
+            inspection.mime_type = f"image/{inspection.image_format}"
+
+    @staticmethod
+    @contextmanager
+    def open_source(file: UploadedFile):
+        """
+        Yield ``(path, buffer)`` for the upload content without copying it: the path of the
+        temporary file of large uploads (and a read-only map of it), or the in-memory buffer
+        of small ones. Other file objects are spooled to a temporary file first.
+        """
+        if hasattr(file, "temporary_file_path"):
+            with open(file.temporary_file_path(), "rb") as source:
+                if not file.size:
+                    yield source.name, b""
+                    return
+                with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    yield source.name, buffer
+            return
+
+        inner = getattr(file, "file", file)
+        if isinstance(inner, BytesIO):
+            view = inner.getbuffer()
+            try:
+                yield None, view
+            finally:
+                view.release()
+            return
+
+        with tempfile.NamedTemporaryFile() as spool:
+            file.seek(0)
+            for chunk in file.chunks(FileProcessorService.CHUNK_SIZE):
+                spool.write(chunk)
+            spool.flush()
+            file.seek(0)
+            if not spool.tell():
+                yield spool.name, b""
+                return
+            with mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield spool.name, buffer
+
+    @staticmethod
+    def encode_base64(file: UploadedFile) -> str:
+        """Base64 of the upload, encoded in chunks from the mapped content and not kept afterwards"""
+        with FileProcessorService.open_source(file) as (_, buffer):
+            return b64encode_buffer(buffer)
+
     @staticmethod
     def count_pdf_pages(file: UploadedFile) -> int:
         """
@@ -26,44 +191,27 @@ class FileProcessorService:
         Returns:
             تعداد صفحات
         """
-        try:
-            # خواندن محتوای فایل
-            file.seek(0)
-            file_content = file.read()
-            file.seek(0)  # بازگشت به ابتدای فایل
-
-            # باز کردن PDF با PyMuPDF
-            doc = fitz.open(stream=file_content, filetype="pdf")
-            page_count = doc.page_count
-            doc.close()
-
-            logger.info(f"PDF page count: {page_count}")
-            return page_count
+        inspection = FileProcessorService.inspect(file)
+        if inspection.error:
+            raise ValueError(f"خطا در پردازش فایل PDF: {inspection.error}")
+        return inspection.page_count
 
-        except Exception as e:
-            logger.error(f"Error counting PDF pages: {e}")
-            raise ValueError(f"خطا در پردازش فایل PDF: {str(e)}")
-
-    @staticmethod
     @staticmethod
     def validate_image(file: UploadedFile) -> Tuple[bool, Optional[str]]:
         """اعتبارسنجی فایل تصویر"""
         try:
-            file.seek(0)
-            img = Image.open(file)
+            inspection = FileProcessorService.inspect(file)
+            if inspection.error:
+                raise ValueError(inspection.error)
 
             # بررسی فرمت
-            format_lower = img.format.lower() if img.format else ""
-            if format_lower not in FileProcessorService.ALLOWED_IMAGE_FORMATS:
+            if inspection.image_format not in FileProcessorService.ALLOWED_IMAGE_FORMATS:
                 return False, f"فرمت تصویر باید یکی از {', '.join(FileProcessorService.ALLOWED_IMAGE_FORMATS)} باشد"
 
             # بررسی حجم (حداکثر 100MB) ← INCREASED
-            file.seek(0, 2)
-            size_mb = file.tell() / (1024 * 1024)
-            if size_mb > 100:  # ← Changed from 20
+            if inspection.size_mb > 100:  # ← Changed from 20
                 return False, "حجم تصویر نباید بیشتر از 100 مگابایت باشد"
 
-            file.seek(0)
             return True, None
 
         except Exception as e:
@@ -75,11 +223,7 @@ class FileProcessorService:
         """اعتبارسنجی فایل PDF"""
         try:
             # بررسی حجم (حداکثر 200MB) ← INCREASED
-            file.seek(0, 2)
-            size_mb = file.tell() / (1024 * 1024)
-            file.seek(0)
-
-            if size_mb > 200:  # ← Changed from 50
+            if file.size / (1024 * 1024) > 200:  # ← Changed from 50
                 return False, "حجم PDF نباید بیشتر از 200 مگابایت باشد", 0
 
             # شمارش صفحات
@@ -107,25 +251,18 @@ class FileProcessorService:
             دیکشنری حاوی اطلاعات فایل برای API
         """
         try:
-            file.seek(0)
-
             if file_type == "image":
                 # برای تصاویر، از base64 استفاده می‌کنیم
-                import base64
-
-                image_data = base64.b64encode(file.read()).decode("utf-8")
+                image_data = FileProcessorService.encode_base64(file)
 
                 # تشخیص mime type
-                img = Image.open(BytesIO(base64.b64decode(image_data)))
-                mime_type = f"image/{img.format.lower()}"
+                mime_type = FileProcessorService.inspect(file).mime_type
 
                 return {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{image_data}"}}
 
             elif file_type == "document":
                 # برای PDF نیز از base64 استفاده می‌کنیم
-                import base64
-
-                pdf_data = base64.b64encode(file.read()).decode("utf-8")
+                pdf_data = FileProcessorService.encode_base64(file)
 
                 return {
                     "type": "image_url",  # OpenRouter از همین فرمت برای PDF هم استفاده می‌کند
@@ -0,0 +1,124 @@
+import json
+import logging
+import random
+import threading
+import weakref
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Tracer:
+    """
+    Structured debug tracing for one module, a replacement for ``print(..., flush=True)``.
+
+    Usage::
+
+        trace = Tracing.get_tracer(__name__)
+        trace.event("bypass_checked", user=user.pk, premium=has_premium, scope=lambda: dict(scope))
+
+    Events are emitted through the ``trace.<module>`` logger as ``<event> key=value ...``, with
+    the fields also attached to the log record (``record.trace_fields``) for structured handlers.
+    Nothing is formatted unless the event is emitted: callable field values are only called
+    then. A disabled tracer returns on its first attribute check; call sites building expensive
+    arguments can guard with ``if trace:``.
+    """
+
+    __slots__ = ("module", "enabled", "sample_rate", "_logger", "__weakref__")
+
+    def __init__(self, module: str):
+        self.module = module
+        self.enabled = False
+        self.sample_rate = 1.0
+        self._logger = logging.getLogger(f"trace.{module}")
+
+    def __bool__(self):
+        return self.enabled
+
+    def event(self, name: str, **fields):
+        if not self.enabled:
+            return
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+
+        values = {key: value() if callable(value) else value for key, value in fields.items()}
+        message = " ".join([name, *(f"{key}={value!r}" for key, value in values.items())])
+        self._logger.info(message, extra={"trace_event": name, "trace_fields": values})
+
+
+class Tracing:
+    """
+    Registry of module tracers and their runtime configuration.
+
+    Modules are enabled by dotted prefix with a sample rate, e.g. ``{"apps.ai_chat": 1.0,
+    "base_utils.middlewares": 0.01}`` (``"*"`` matches every module). The initial configuration
+    comes from ``TRACING_MODULES``. ``configure`` changes it at runtime in this process and, with
+    ``broadcast``, in every process through the cache invalidation bus.
+    """
+
+    CHANNEL = "tracing:configure"
+
+    _lock = threading.Lock()
+    _tracers = weakref.WeakValueDictionary()
+    _modules = None
+
+    @classmethod
+    def get_tracer(cls, module: str) -> Tracer:
+        with cls._lock:
+            tracer = cls._tracers.get(module)
+            if tracer is None:
+                tracer = Tracer(module)
+                cls._tracers[module] = tracer
+                cls._apply(tracer, cls.get_modules())
+        return tracer
+
+    @classmethod
+    def get_modules(cls) -> dict:
+        """Current ``{prefix: sample_rate}`` configuration"""
+        if cls._modules is None:
+            cls._modules = dict(getattr(settings, "TRACING_MODULES", {}))
+            # Every process listens, so tracing can be switched on at runtime everywhere
+            cls._subscribe()
+        return cls._modules
+
+    @staticmethod
+    def _apply(tracer: Tracer, modules: dict):
+        # The longest matching prefix wins, so a module can be excluded below an enabled package
+        match, rate = -1, 0.0
+        for prefix, prefix_rate in modules.items():
+            if prefix == "*" or tracer.module == prefix or tracer.module.startswith(f"{prefix}."):
+                length = 0 if prefix == "*" else len(prefix)
+                if length > match:
+                    match, rate = length, float(prefix_rate)
+        tracer.sample_rate = rate
+        tracer.enabled = rate > 0
+
+    @classmethod
+    def configure(cls, modules: dict, broadcast: bool = False):
+        """Replace the enabled modules (``{prefix: sample_rate}``, empty disables everything)"""
+        cls._subscribe()
+        with cls._lock:
+            cls._modules = dict(modules)
+            for tracer in list(cls._tracers.values()):
+                cls._apply(tracer, cls._modules)
+        if broadcast:
+            from base_utils.facades.cache import CacheInvalidationBus
+
+            CacheInvalidationBus.publish(cls.CHANNEL, json.dumps(cls._modules))
+
+    @classmethod
+    def _subscribe(cls):
+        from base_utils.facades.cache import CacheInvalidationBus
+
+        CacheInvalidationBus.subscribe(cls.CHANNEL, cls._on_configure)
+
+    @classmethod
+    def _on_configure(cls, message=None):
+        # Also called without a message after a bus reconnect
+        if not message:
+            return
+        try:
+            cls.configure(json.loads(message))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Ignoring malformed tracing configuration {message!r}: {e}")
@@ -8,9 +8,11 @@ from rest_framework.exceptions import PermissionDenied
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from apps.authentication.models import UserDevice
+from base_utils.log.tracing import Tracing
 from config.renderer import CustomJSONRenderer
 
 logger = logging.getLogger(__name__)
+trace = Tracing.get_tracer(__name__)
 
 
 class SingleDeviceMiddleware(MiddlewareMixin):
@@ -52,7 +54,6 @@ class SingleDeviceMiddleware(MiddlewareMixin):
             "success": False,
             "error_messages": {},
         }
-        print(f"refqqqqpatt === {request.path=}", flush=True)
         if (
             request.path.startswith("/admin/")
             or request.path.startswith("/api/auth/v1/login/")
@@ -74,8 +75,13 @@ class SingleDeviceMiddleware(MiddlewareMixin):
 
                     # Get active device for this user
                     active_device = UserDevice.get_active_device(user)
-                    print(f"here84 {active_device=}")
-                    print(f"here84 {device_id=}")
+                    trace.event(
+                        "device_check",
+                        path=request.path,
+                        user=user.pk,
+                        device_id=device_id,
+                        active_device_id=lambda: active_device and active_device.device_id,
+                    )
                     # If there's an active device and it's not this one
                     if active_device and active_device.device_id != device_id:
                         # Existing active session on another device
@@ -83,7 +89,6 @@ class SingleDeviceMiddleware(MiddlewareMixin):
                             "شما هم اکنون در یک دستگاه دیگر وارد شده اید! برای ورود باید ابتدا از آن دستگاه خارج شوید!"
                         )
                         response_data["error_messages"]["non_field_errors"] = error_message
-                        print(f"resppp ==== {response_data=}", flush=True)
                         return JsonResponse(response_data, status=status.HTTP_403_FORBIDDEN)
                     # If no active device or this is the active device
                     # if not active_device:
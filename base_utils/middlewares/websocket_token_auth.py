@@ -1,22 +1,19 @@
+import copy
 import logging
+import threading
+import time
 from urllib.parse import parse_qs
 
-from channels.auth import AuthMiddleware, AuthMiddlewareStack, UserLazyObject
+from channels.auth import AuthMiddleware
 from channels.db import database_sync_to_async
-from channels.middleware import BaseMiddleware
 from channels.sessions import CookieMiddleware, SessionMiddleware
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
-from django.db import close_old_connections
-from django.conf import settings
-from django.db.models import Q
-from jwt import decode as jwt_decode
-
-# from rest_framework_simplejwt.tokens import AccessToken
-from rest_framework.authtoken.models import Token
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.tokens import UntypedToken
+from rest_framework_simplejwt.settings import api_settings
+
+from base_utils.facades.cache import LocalTTLCache, CacheInvalidationBus
 
 User = get_user_model()
 
@@ -34,86 +31,145 @@ logger = logging.getLogger(__name__)
 
 
 def get_token_from_header(header):
-    pass
+    if not header:
+        return None
+
+    parts = header.decode().split()
+    if len(parts) == 2 and parts[0].lower() == "bearer":
+        return parts[1]
+    elif len(parts) == 1 and parts[0].lower().startswith("ey"):
+        return parts[0]
+    return None
 
 
 def get_token_from_query_string(q):
-    pass
-
-
-@database_sync_to_async
-def get_user(scope):
-    close_old_connections()
-    headers = dict(scope["headers"])
-    query_string = scope["query_string"].decode()
-    query_token = parse_qs(query_string).get("token", None)
-    print(f"qqqqqq::: {query_string}", flush=True)
-    print(f"qqqqttt::: {query_token}", flush=True)
-
-    token = None
-
-    if b"authorization" in headers:
-        auth_header = headers[b"authorization"].decode()
-        parts = auth_header.split()
-        if len(parts) == 2 and parts[0].lower() == "bearer":
-            token = parts[1]
-        elif len(parts) == 1 and parts[0].lower().startswith("ey"):
-            token = parts[0]
-    elif query_token is not None:
-        token = query_token[0]  # ✅ Extract first item from list
-
-    if not token:
-        return AnonymousUser()
-
-    try:
-        # signing_key = settings.__getattr__("JWT_SIGNING_KEY") or settings.__getattr__("SECRET_KEY")
-        # UntypedToken(token)
-        # print(f"tttttt::: {token}", flush=True)
-        # payload = jwt_decode(token, signing_key, algorithms=["HS256"])
-        # user_id = payload.get("user_id") or payload.get("user_pid")
-        # if not user_id:
-        #     return AnonymousUser()
-        #
-        # user = User.objects.get(Q(id=user_id) | Q(pid=user_id))
-
-        jwt_auth = JWTAuthentication()
-        validated_token = jwt_auth.get_validated_token(token)
-        user = jwt_auth.get_user(validated_token)
+    query_token = parse_qs(q.decode()).get("token", None)
+    if query_token is not None:
+        return query_token[0]
+    return None
+
+
+class WebsocketUserResolver:
+    """
+    Resolves the user of a websocket connection from its JWT access token.
+
+    Token signature and expiry are verified in the event loop (no database involved). Resolved
+    users are cached per process by (user pid, token jti) for a short TTL, never beyond the
+    token expiry, so reconnect storms re-use them instead of queueing user lookups on the sync
+    thread pool. Only a cache miss takes a ``database_sync_to_async`` hop.
+
+    ``revoke_user`` drops a user's cached entries in every process (see
+    ``apps.authentication.signals``: user changes and token blacklisting).
+    """
+
+    REVOCATION_CHANNEL = "ws_auth:revoke"
+
+    _jwt_auth = JWTAuthentication()
+    _users = LocalTTLCache(
+        max_entries=getattr(settings, "WEBSOCKET_AUTH_USER_CACHE_MAX_ENTRIES", 10000),
+        ttl=getattr(settings, "WEBSOCKET_AUTH_USER_CACHE_TTL", 60),
+    )
+    _lock = threading.Lock()
+    # user pid -> monotonic time of the last revocation; entries cached before it are ignored
+    _revoked_at = {}
+
+    @staticmethod
+    def get_token(scope):
+        headers = dict(scope["headers"])
+        if b"authorization" in headers:
+            return get_token_from_header(headers[b"authorization"])
+        return get_token_from_query_string(scope["query_string"])
+
+    @classmethod
+    def _on_revocation(cls, message):
+        if not message:
+            # (Re)connected to the bus, revocations may have been missed
+            cls._users.clear()
+            return
+
+        now = time.monotonic()
+        with cls._lock:
+            cls._revoked_at[message] = now
+            # Revocations older than the cache TTL no longer shadow any entry
+            expired_before = now - cls._users.ttl
+            for user_pid in [pid for pid, at in cls._revoked_at.items() if at < expired_before]:
+                del cls._revoked_at[user_pid]
+
+    @classmethod
+    def revoke_user(cls, user_pid):
+        """Forget the cached websocket user in every process"""
+        user_pid = str(user_pid)
+        cls._on_revocation(user_pid)
+        CacheInvalidationBus.publish(cls.REVOCATION_CHANNEL, user_pid)
+
+    @classmethod
+    def _get_cached(cls, key, user_pid):
+        entry = cls._users.get(key)
+        if entry is None:
+            return None
+
+        user, cached_at, expires_at = entry
+        if time.time() >= expires_at or cached_at <= cls._revoked_at.get(user_pid, float("-inf")):
+            cls._users.delete(key)
+            return None
+        return copy.copy(user)
+
+    @staticmethod
+    @database_sync_to_async
+    def _load_user(validated_token):
+        return WebsocketUserResolver._jwt_auth.get_user(validated_token)
+
+    @classmethod
+    async def resolve(cls, scope):
+        CacheInvalidationBus.subscribe(cls.REVOCATION_CHANNEL, cls._on_revocation)
+
+        token = cls.get_token(scope)
+        if not token:
+            return AnonymousUser()
+
+        try:
+            # Pure CPU: signature, expiry and token type checks
+            validated_token = cls._jwt_auth.get_validated_token(token)
+        except Exception as e:
+            logger.info(f"Websocket token validation error: {e}")
+            return AnonymousUser()
+
+        user_pid = str(validated_token.get(api_settings.USER_ID_CLAIM))
+        key = (user_pid, validated_token.get(api_settings.JTI_CLAIM))
+
+        user = cls._get_cached(key, user_pid)
+        if user is not None:
+            return user
+
+        cached_at = time.monotonic()
+        try:
+            user = await cls._load_user(validated_token)
+        except Exception as e:
+            logger.info(f"Websocket user lookup failed: {e}")
+            return AnonymousUser()
 
         if not user.is_active:
             return AnonymousUser()
-        return user
-    except Exception as e:
-        print(f"Token validation error: {e}", flush=True)
-        return AnonymousUser()
+
+        ttl = min(cls._users.ttl, validated_token["exp"] - time.time())
+        if ttl > 0:
+            cls._users.set(key, (user, cached_at, validated_token["exp"]), ttl=ttl)
+        return copy.copy(user)
+
+
+async def get_user(scope):
+    return await WebsocketUserResolver.resolve(scope)
 
 
 class TokenAuthMiddleware(AuthMiddleware):
     async def resolve_scope(self, scope):
         scope["user"]._wrapped = await get_user(scope)
-        print(f"hey scope! {scope=}", flush=True)
 
     async def __call__(self, scope, receive, send):
-        scope = dict(scope)
-        logger.info(f"Processing WebSocket connection: {scope['path']}")
-        logger.info(f"Processing WebSocket connection: {scope=}")
-        # Scope injection/mutation per this middleware's needs.
-        self.populate_scope(scope)
-        # Grab the finalized/resolved scope
-        await self.resolve_scope(scope)
-
+        logger.debug(f"Processing WebSocket connection: {scope['path']}")
+        # AuthMiddleware populates and resolves the scope (once) before calling the inner app
         return await super().__call__(scope, receive, send)
 
 
 def TokenAuthMiddlewareStack(inner):
-    # print(f"infqeifnqeif: {inner.__dict__=}", flush=True)
-    # print(f"infqeifnqeif: {inner.__dict__['routes']=}", flush=True)
-    #
-    # for route in inner.routes:
-    #     if getattr(route, "path", None) == "/ws/health/":
-    #         print(f'aparpatea: {getattr(route, "path", None)=}', flush=True)
-    #         return inner
-    print("hey socket!", flush=True)
-    print(f"hey socket! {inner.__dict__=}", flush=True)
     return CookieMiddleware(SessionMiddleware(TokenAuthMiddleware(inner)))
-    # return TokenAuthMiddleware(inner)
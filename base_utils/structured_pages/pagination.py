@@ -1,6 +1,13 @@
+import base64
+from collections import OrderedDict
+
 from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 from rest_framework.exceptions import NotFound
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import BasePagination, LimitOffsetPagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class SafePageNumberPagination(PageNumberPagination):
@@ -44,3 +51,132 @@ class SafePageNumberPagination(PageNumberPagination):
         if page_number in self.last_page_strings:
             page_number = paginator.num_pages
         return page_number
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination on (created_at, id), for append-only histories such as chat messages.
+
+    A page is one index range scan from the cursor row, so no COUNT(*) is run and deep pages cost
+    the same as the first one (unlike OFFSET). Without a cursor the newest page is returned; the
+    ``previous`` link walks back to older messages (``before`` cursor) and ``next`` forward to
+    newer ones (``after`` cursor). Items of every page are in chronological order.
+
+    An invalid cursor returns an empty list instead of 404, like ``SafePageNumberPagination``.
+
+    Keyset pages are opt-in, so existing clients keep the ``LimitOffsetPagination`` responses: they are
+    only served when ``before``/``after`` is passed (an empty ``before`` asks for the newest page) or
+    ``limit`` without ``offset``. Without any of them the full list is returned, with ``offset`` the
+    limit/offset page.
+    """
+
+    legacy_pagination_class = LimitOffsetPagination
+    page_size = 30
+    max_page_size = 100
+    page_size_query_param = "limit"
+    before_query_param = "before"
+    after_query_param = "after"
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    @staticmethod
+    def encode_cursor(item) -> str:
+        raw = f"{item.created_at.isoformat()}|{item.pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        try:
+            created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+            created_at = parse_datetime(created_at)
+            if created_at is None:
+                return None
+            return created_at, int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            return None
+
+    def uses_cursor(self, request) -> bool:
+        params = request.query_params
+        if self.before_query_param in params or self.after_query_param in params:
+            return True
+        return self.page_size_query_param in params and self.legacy_pagination_class.offset_query_param not in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.legacy = None
+        if not self.uses_cursor(request):
+            self.legacy = self.legacy_pagination_class()
+            return self.legacy.paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        before = request.query_params.get(self.before_query_param)
+        after = request.query_params.get(self.after_query_param)
+
+        if after:
+            position = self.decode_cursor(after)
+            if position is None:
+                return self._empty_page()
+            created_at, pk = position
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+            rows = list(queryset.order_by("created_at", "pk")[: self.page_size + 1])
+            self.has_newer, self.has_older = len(rows) > self.page_size, True
+            page = rows[: self.page_size]
+        else:
+            if before:
+                position = self.decode_cursor(before)
+                if position is None:
+                    return self._empty_page()
+                created_at, pk = position
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+            rows = list(queryset.order_by("-created_at", "-pk")[: self.page_size + 1])
+            self.has_older, self.has_newer = len(rows) > self.page_size, bool(before)
+            page = rows[: self.page_size][::-1]
+
+        self.page = page
+        return page
+
+    def _empty_page(self):
+        self.page, self.has_older, self.has_newer = [], False, False
+        return []
+
+    def get_next_link(self):
+        if not self.has_newer or not self.page:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.before_query_param)
+        return replace_query_param(url, self.after_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_older or not self.page:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.after_query_param)
+        return replace_query_param(url, self.before_query_param, self.encode_cursor(self.page[0]))
+
+    def get_paginated_response(self, data):
+        if self.legacy:
+            return self.legacy.get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
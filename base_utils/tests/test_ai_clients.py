@@ -0,0 +1,37 @@
+from django.test import SimpleTestCase
+
+from base_utils.facades.ai_clients import AIClientRegistry
+
+
+class AIClientRegistryTests(SimpleTestCase):
+
+    def setUp(self):
+        AIClientRegistry.clear()
+        AIClientRegistry._stats.update({"hits": 0, "misses": 0, "invalidations": 0})
+
+    def tearDown(self):
+        AIClientRegistry.clear()
+
+    def test_same_key_reuses_client(self):
+        first = AIClientRegistry.get_client(api_key="key", base_url="https://api.example.com/v1", model="m")
+        second = AIClientRegistry.get_client(api_key="key", base_url="https://api.example.com/v1", model="m")
+
+        self.assertIs(first, second)
+        self.assertEqual(AIClientRegistry.stats()["hits"], 1)
+        self.assertEqual(AIClientRegistry.stats()["misses"], 1)
+
+    def test_clients_of_same_provider_share_http_pool(self):
+        first = AIClientRegistry.get_client(api_key="key", base_url="https://api.example.com/v1", model="a")
+        second = AIClientRegistry.get_client(api_key="other", base_url="https://api.example.com/v1", model="b")
+
+        self.assertIsNot(first, second)
+        self.assertIs(first._client, second._client)
+        self.assertEqual(AIClientRegistry.stats()["providers"], ["api.example.com"])
+
+    def test_invalidate_tag_drops_client(self):
+        first = AIClientRegistry.get_client(api_key="key", model="m", tag="ai_chat.chataiconfig:1")
+        AIClientRegistry.invalidate_tag("ai_chat.chataiconfig:1")
+        second = AIClientRegistry.get_client(api_key="key", model="m", tag="ai_chat.chataiconfig:1")
+
+        self.assertIsNot(first, second)
+        self.assertEqual(AIClientRegistry.stats()["invalidations"], 1)
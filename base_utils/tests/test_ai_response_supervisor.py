@@ -0,0 +1,81 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from base_utils.facades.ai_response_supervisor import AIResponseSupervisor
+
+
+class AIResponseSupervisorTests(SimpleTestCase):
+
+    def setUp(self):
+        self.release = asyncio.Event()
+        self.started = []
+
+    def factory(self, name):
+        async def respond():
+            self.started.append(name)
+            await self.release.wait()
+
+        return respond
+
+    async def test_over_the_global_limit_responses_queue_in_order(self):
+        supervisor = AIResponseSupervisor(max_concurrency=1, max_queued=2)
+
+        statuses = [supervisor.submit(self.factory(i), owner="c", user=i, session=i)[1] for i in range(4)]
+        await asyncio.sleep(0)
+
+        self.assertEqual(statuses, ["started", "queued", "queued", "busy"])
+        self.assertEqual(self.started, [0])
+        self.assertEqual(supervisor.stats()["waiting"], 2)
+
+        self.release.set()
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(self.started, [0, 1, 2])
+        self.assertEqual(supervisor.stats()["running"], 0)
+        self.assertEqual(supervisor.stats()["completed"], 3)
+
+    async def test_per_user_and_per_session_caps(self):
+        supervisor = AIResponseSupervisor(max_per_user=2, max_per_session=1)
+
+        supervisor.submit(self.factory("a"), owner="c", user=1, session="s1")
+
+        self.assertEqual(supervisor.submit(self.factory("b"), owner="c", user=1, session="s1")[1], "session_limit")
+        self.assertEqual(supervisor.submit(self.factory("c"), owner="c", user=1, session="s2")[1], "started")
+        self.assertEqual(supervisor.submit(self.factory("d"), owner="c", user=1, session="s3")[1], "user_limit")
+        self.assertEqual(supervisor.admission_status(2, "s4"), "started")
+        self.release.set()
+
+    async def test_queue_timeout_notifies_and_never_starts(self):
+        supervisor = AIResponseSupervisor(max_concurrency=1, queue_timeout=0.01)
+        timeouts = []
+
+        async def on_timeout():
+            timeouts.append(True)
+
+        supervisor.submit(self.factory("running"), owner="c", user=1, session=1)
+        supervisor.submit(self.factory("queued"), owner="c", user=2, session=2, on_timeout=on_timeout)
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(timeouts, [True])
+        self.assertEqual(self.started, ["running"])
+        self.assertEqual(supervisor.stats()["timed_out"], 1)
+        self.assertEqual(supervisor.stats()["waiting"], 0)
+        self.release.set()
+
+    async def test_cancel_owner_frees_slots(self):
+        supervisor = AIResponseSupervisor(max_concurrency=1)
+
+        supervisor.submit(self.factory("gone"), owner="disconnected", user=1, session=1)
+        supervisor.submit(self.factory("queued"), owner="disconnected", user=1, session=2)
+        supervisor.submit(self.factory("next"), owner="connected", user=2, session=3)
+        await asyncio.sleep(0)
+
+        self.assertEqual(supervisor.cancel_owner("disconnected"), 2)
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(self.started, ["gone", "next"])
+        self.assertEqual(supervisor.stats()["cancelled"], 2)
+        self.assertEqual(supervisor.stats()["running"], 1)
+        self.assertEqual(supervisor.stats()["in_flight"], 1)
+        self.release.set()
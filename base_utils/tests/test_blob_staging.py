@@ -0,0 +1,75 @@
+import base64
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from base_utils.base64 import B64_CHUNK_SIZE
+from base_utils.base_tests import TainoBaseServiceTestCase
+from base_utils.facades.blob_staging import BlobStaging
+
+
+class BlobStagingTest(TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.storage = FileSystemStorage(location=self.directory.name)
+        BlobStaging._storage = self.storage
+        self.addCleanup(setattr, BlobStaging, "_storage", None)
+
+    def test_stage_returns_a_small_reference(self):
+        content = os.urandom(3 * BlobStaging.CHUNK_SIZE + 7)
+        upload = SimpleUploadedFile("contract.pdf", content, content_type="application/pdf")
+
+        ref = BlobStaging.stage(upload)
+
+        self.assertEqual(ref["sha256"], hashlib.sha256(content).hexdigest())
+        self.assertEqual(ref["size"], len(content))
+        self.assertEqual(ref["name"], "contract.pdf")
+        self.assertEqual(ref["content_type"], "application/pdf")
+        self.assertTrue(ref["key"].startswith(ref["sha256"]))
+        self.assertNotIn("content_b64", ref)
+
+    def test_b64encode_matches_the_original_content(self):
+        content = os.urandom(B64_CHUNK_SIZE * 2 + 5)
+        ref = BlobStaging.stage(SimpleUploadedFile("voice.wav", content, content_type="audio/wav"))
+
+        self.assertEqual(BlobStaging.b64encode(ref), base64.b64encode(content).decode())
+
+    def test_empty_file(self):
+        ref = BlobStaging.stage(SimpleUploadedFile("empty.txt", b"", content_type="text/plain"))
+
+        self.assertEqual(BlobStaging.b64encode(ref), "")
+
+    def test_same_content_is_staged_independently(self):
+        first = BlobStaging.stage(SimpleUploadedFile("a.pdf", b"same"))
+        second = BlobStaging.stage(SimpleUploadedFile("b.pdf", b"same"))
+
+        self.assertNotEqual(first["key"], second["key"])
+        BlobStaging.discard([first])
+        self.assertFalse(self.storage.exists(first["key"]))
+        self.assertEqual(BlobStaging.b64encode(second), base64.b64encode(b"same").decode())
+
+    def test_discard_ignores_missing_and_inline_refs(self):
+        ref = BlobStaging.stage(SimpleUploadedFile("a.pdf", b"data"))
+
+        BlobStaging.discard([ref, None, {"content_b64": "ZGF0YQ=="}])
+
+        self.assertFalse(self.storage.exists(ref["key"]))
+
+    def test_purge_expired_only_removes_old_blobs(self):
+        old = BlobStaging.stage(SimpleUploadedFile("old.pdf", b"old"))
+        new = BlobStaging.stage(SimpleUploadedFile("new.pdf", b"new"))
+        two_days_ago = (timezone.now() - timedelta(days=2)).timestamp()
+        os.utime(self.storage.path(old["key"]), (two_days_ago, two_days_ago))
+
+        self.assertEqual(BlobStaging.purge_expired(max_age_hours=24), 1)
+
+        self.assertFalse(self.storage.exists(old["key"]))
+        self.assertTrue(self.storage.exists(new["key"]))
@@ -0,0 +1,37 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from base_utils.facades.cache import LocalTTLCache
+
+
+class LocalTTLCacheTests(SimpleTestCase):
+
+    def test_entry_expires_after_ttl(self):
+        local_cache = LocalTTLCache(ttl=10)
+
+        with mock.patch("base_utils.facades.cache.time.monotonic", return_value=100):
+            local_cache.set("key", "value")
+            self.assertEqual(local_cache.get("key"), "value")
+
+        with mock.patch("base_utils.facades.cache.time.monotonic", return_value=111):
+            self.assertIsNone(local_cache.get("key"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        local_cache = LocalTTLCache(max_entries=2)
+        local_cache.set("a", 1)
+        local_cache.set("b", 2)
+        local_cache.get("a")
+        local_cache.set("c", 3)
+
+        self.assertEqual(local_cache.get("a"), 1)
+        self.assertIsNone(local_cache.get("b"))
+        self.assertEqual(local_cache.get("c"), 3)
+
+    def test_cached_none_is_distinguishable_from_missing(self):
+        local_cache = LocalTTLCache()
+        local_cache.set("negative", None)
+        missing = object()
+
+        self.assertIsNone(local_cache.get("negative", missing))
+        self.assertIs(local_cache.get("unknown", missing), missing)
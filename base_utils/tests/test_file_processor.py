@@ -0,0 +1,91 @@
+import base64
+import hashlib
+from io import BytesIO
+from unittest import mock
+
+import fitz
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from PIL import Image
+
+from base_utils.base_tests import TainoBaseServiceTestCase
+from base_utils.file_processor import FileProcessorService
+
+
+def make_pdf(pages: int) -> bytes:
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"page {i}")
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def make_png(width: int, height: int) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class FileInspectionTest(TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        FileProcessorService._inspections.clear()
+
+    def test_pdf_is_parsed_once_per_upload(self):
+        upload = SimpleUploadedFile("contract.pdf", make_pdf(3), content_type="application/pdf")
+
+        with mock.patch("base_utils.file_processor.fitz.open", wraps=fitz.open) as fitz_open:
+            self.assertEqual(FileProcessorService.count_pdf_pages(upload), 3)
+            self.assertEqual(FileProcessorService.validate_pdf(upload, max_pages=50), (True, None, 3))
+            FileProcessorService.prepare_file_for_api(upload, "document")
+
+        self.assertEqual(fitz_open.call_count, 1)
+
+    def test_same_content_reuses_the_inspection(self):
+        content = make_pdf(2)
+        FileProcessorService.inspect(SimpleUploadedFile("a.pdf", content))
+
+        with mock.patch("base_utils.file_processor.fitz.open") as fitz_open:
+            inspection = FileProcessorService.inspect(SimpleUploadedFile("b.pdf", content))
+
+        fitz_open.assert_not_called()
+        self.assertEqual(inspection.page_count, 2)
+        self.assertEqual(inspection.name, "b.pdf")
+        self.assertEqual(inspection.sha256, hashlib.sha256(content).hexdigest())
+
+    def test_temporary_upload_is_read_from_disk(self):
+        content = make_pdf(4)
+        upload = TemporaryUploadedFile("large.pdf", "application/pdf", len(content), None)
+        upload.write(content)
+        upload.seek(0)
+        self.addCleanup(upload.close)
+
+        inspection = FileProcessorService.inspect(upload)
+
+        self.assertEqual(inspection.page_count, 4)
+        self.assertEqual(inspection.size, len(content))
+        self.assertEqual(FileProcessorService.encode_base64(upload), base64.b64encode(content).decode())
+
+    def test_image_inspection(self):
+        content = make_png(40, 30)
+        upload = SimpleUploadedFile("scan.png", content, content_type="image/png")
+
+        inspection = FileProcessorService.inspect(upload)
+        payload = FileProcessorService.prepare_file_for_api(upload, "image")
+
+        self.assertEqual((inspection.width, inspection.height), (40, 30))
+        self.assertEqual(inspection.mime_type, "image/png")
+        self.assertEqual(inspection.pages, 1)
+        self.assertEqual(FileProcessorService.validate_image(upload), (True, None))
+        self.assertEqual(payload["image_url"]["url"], f"data:image/png;base64,{base64.b64encode(content).decode()}")
+
+    def test_broken_pdf_is_invalid(self):
+        upload = SimpleUploadedFile("broken.pdf", b"not a pdf", content_type="application/pdf")
+
+        is_valid, error, pages = FileProcessorService.validate_pdf(upload)
+
+        self.assertFalse(is_valid)
+        self.assertEqual(pages, 0)
+        with self.assertRaises(ValueError):
+            FileProcessorService.count_pdf_pages(upload)
@@ -0,0 +1,64 @@
+import json
+
+from django.test import SimpleTestCase, override_settings
+from model_bakery import baker
+
+from apps.chat.models import ChatMessage, ChatSession
+from apps.chat.services.history_snapshot import ChatMessageHistorySnapshot
+from base_utils.base_tests import LocMemCacheTestMixin, TainoBaseServiceTestCase
+from base_utils.facades.history_snapshot import MessageHistorySnapshot
+
+
+class MessageHistorySnapshotTest(LocMemCacheTestMixin, TainoBaseServiceTestCase):
+    """Shared snapshot behaviour, exercised through the chat subclass"""
+
+    snapshot = ChatMessageHistorySnapshot
+
+    def setUp(self):
+        super().setUp()
+        self.snapshot._local.clear()
+        self.addCleanup(self.snapshot._local.clear)
+        self.chat_session = baker.make(ChatSession, client=self.user)
+        for i in range(4):
+            baker.make(ChatMessage, chat_session=self.chat_session, sender=self.user, content=f"message {i}")
+
+    def contents(self, payload):
+        return [message["message"] for message in json.loads(payload)["messages"]]
+
+    def test_latest_messages_oldest_first(self):
+        payload = self.snapshot.get_payload(self.chat_session.pk, limit=3)
+
+        self.assertEqual(self.contents(payload), ["message 1", "message 2", "message 3"])
+
+    def test_payload_is_shared_through_the_cache(self):
+        first = self.snapshot.get_payload(self.chat_session.pk)
+
+        # Another process: nothing in its local tier, the payload comes from the shared cache
+        self.snapshot._local.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.snapshot.get_payload(self.chat_session.pk), first)
+
+    def test_invalidate_retires_every_cached_payload(self):
+        self.snapshot.get_payload(self.chat_session.pk)
+        self.snapshot.get_payload(self.chat_session.pk, limit=2)
+        # Not committed, so the message signals did not invalidate yet
+        baker.make(ChatMessage, chat_session=self.chat_session, sender=self.user, content="message 4")
+
+        self.snapshot.invalidate(self.chat_session.pk)
+
+        self.assertEqual(self.contents(self.snapshot.get_payload(self.chat_session.pk))[-1], "message 4")
+        self.assertEqual(
+            self.contents(self.snapshot.get_payload(self.chat_session.pk, limit=2)), ["message 3", "message 4"]
+        )
+
+
+class HistorySnapshotOptInTests(SimpleTestCase):
+
+    def test_snapshot_is_sent_only_to_clients_asking_for_it(self):
+        self.assertTrue(MessageHistorySnapshot.is_requested({"query_string": b"token=t&history=snapshot"}))
+        self.assertFalse(MessageHistorySnapshot.is_requested({"query_string": b"token=t"}))
+        self.assertFalse(MessageHistorySnapshot.is_requested({}))
+
+    @override_settings(CHAT_HISTORY_SNAPSHOT_ENABLED=False)
+    def test_disabled_snapshot_is_never_sent(self):
+        self.assertFalse(MessageHistorySnapshot.is_requested({"query_string": b"history=snapshot"}))
@@ -1,10 +1,17 @@
 import json
 
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
 from django.http import JsonResponse
 from django.test.client import RequestFactory
 from rest_framework import status
 from base_utils.base_tests import TainoBaseServiceTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
 from base_utils.middlewares import XSSProtectionMiddleware
+from base_utils.middlewares.websocket_token_auth import WebsocketUserResolver, get_token_from_header
+
+User = get_user_model()
 
 
 class XSSProtectionMiddlewareTests(TainoBaseServiceTestCase):
@@ -57,3 +64,41 @@ class XSSProtectionMiddlewareTests(TainoBaseServiceTestCase):
         self.assertIsNotNone(response)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.content, b"Malformed Input")
+
+
+class WebsocketUserResolverTests(TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        WebsocketUserResolver._users.clear()
+        self.token = str(AccessToken.for_user(self.user))
+
+    def scope(self, token=None):
+        query_string = f"token={token}".encode() if token else b""
+        return {"headers": [], "query_string": query_string}
+
+    def resolve(self, scope):
+        return async_to_sync(WebsocketUserResolver.resolve)(scope)
+
+    def test_token_from_header(self):
+        self.assertEqual(get_token_from_header(b"Bearer abc"), "abc")
+        self.assertEqual(get_token_from_header(b"eyabc"), "eyabc")
+        self.assertIsNone(get_token_from_header(b"Basic abc"))
+
+    def test_anonymous_without_or_with_invalid_token(self):
+        self.assertFalse(self.resolve(self.scope()).is_authenticated)
+        self.assertFalse(self.resolve(self.scope("invalid")).is_authenticated)
+
+    def test_resolved_user_is_cached(self):
+        self.assertEqual(self.resolve(self.scope(self.token)).pk, self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.resolve(self.scope(self.token)).pk, self.user.pk)
+
+    def test_revoked_user_is_reloaded(self):
+        self.resolve(self.scope(self.token))
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        WebsocketUserResolver.revoke_user(self.user.pid)
+
+        self.assertFalse(self.resolve(self.scope(self.token)).is_authenticated)
@@ -0,0 +1,60 @@
+from unittest import mock
+
+from base_utils.base_tests import TainoBaseServiceTestCase
+from base_utils.log.tracing import Tracing
+
+
+class TracingTest(TainoBaseServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(Tracing.configure, dict(Tracing.get_modules()))
+        Tracing.configure({})
+        self.tracer = Tracing.get_tracer("apps.ai_chat.services.ai_pricing_calculator")
+
+    def test_disabled_tracer_formats_nothing(self):
+        expensive = mock.Mock(return_value="value")
+
+        with mock.patch.object(self.tracer, "_logger") as trace_logger:
+            self.tracer.event("charge", details=expensive)
+
+        self.assertFalse(self.tracer)
+        expensive.assert_not_called()
+        trace_logger.info.assert_not_called()
+
+    def test_enabled_event_is_logged_with_fields(self):
+        Tracing.configure({"apps.ai_chat": 1.0})
+
+        with self.assertLogs("trace.apps.ai_chat.services.ai_pricing_calculator", "INFO") as logs:
+            self.tracer.event("charge", user=7, total_cost=lambda: 3.5)
+
+        self.assertEqual(logs.output[0].split(":", 2)[2], "charge user=7 total_cost=3.5")
+        self.assertEqual(logs.records[0].trace_fields, {"user": 7, "total_cost": 3.5})
+
+    def test_longest_prefix_wins(self):
+        other = Tracing.get_tracer("apps.ai_chat.models.chat_ai_config")
+
+        Tracing.configure({"*": 1.0, "apps.ai_chat.services": 0})
+
+        self.assertFalse(self.tracer)
+        self.assertTrue(other)
+        self.assertTrue(Tracing.get_tracer("apps.ai_chat.servicesx"))
+
+    def test_sampling(self):
+        Tracing.configure({"apps": 0.25})
+
+        with mock.patch.object(self.tracer, "_logger") as trace_logger, mock.patch(
+            "base_utils.log.tracing.random.random", side_effect=[0.1, 0.5, 0.9, 0.2]
+        ):
+            for _ in range(4):
+                self.tracer.event("preview")
+
+        self.assertEqual(trace_logger.info.call_count, 2)
+
+    def test_broadcast_configuration_is_applied(self):
+        Tracing._on_configure('{"apps.ai_chat": 1}')
+        self.assertTrue(self.tracer)
+
+        Tracing._on_configure(None)
+        Tracing._on_configure("not json")
+        self.assertTrue(self.tracer)
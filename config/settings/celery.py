@@ -32,6 +32,10 @@ CELERY_BEAT_SCHEDULE = {
         "task": "apps.ai_chat.tasks.update_expired_ai_sessions",
         "schedule": crontab(minute="*/5"),  # Run every 5 minutes
     },
+    "settle-ai-charges": {
+        "task": "apps.ai_chat.tasks.settle_ai_charges",
+        "schedule": crontab(minute="*"),  # Run every minute
+    },
     # Run notification cleanup daily at 12:00 AM
     # "delete-old-notifications": {
     #     "task": "apps.notification.tasks.retention.delete_old_notifications_task",
@@ -61,10 +65,23 @@ CELERY_BEAT_SCHEDULE = {
         "task": "apps.activity_log.tasks.cleanup_anonymous_logs",
         "schedule": crontab(hour="3", minute="0"),  # Run daily at 3 AM
     },
+    "rollup-activity-stats": {
+        "task": "apps.activity_log.tasks.rollup_activity_stats",
+        "schedule": crontab(minute="*/10"),
+    },
+    "purge-staged-blobs": {
+        "task": "apps.analyzer.tasks.purge_staged_blobs",
+        "schedule": crontab(minute="15"),
+    },
     "update-all-user-engagement": {
         "task": "apps.crm_hub.tasks.update_all_user_engagement",
         "schedule": crontab(hour="1", minute="0"),
     },
+    "update-recent-user-engagement": {
+        "task": "apps.crm_hub.tasks.update_all_user_engagement",
+        "schedule": crontab(minute="30"),
+        "kwargs": {"incremental": True},
+    },
     # Process CRM campaigns twice daily (morning and evening)
     "process-crm-campaigns-morning": {
         "task": "apps.crm_hub.tasks.process_crm_campaigns",
@@ -1,6 +1,6 @@
 import sys
 
-from .base import env
+from .base import BASE_DIR, env
 
 TESTING = sys.argv[1:2] == ["test"]
 
@@ -39,3 +39,93 @@ PAYMENT_FAILURE_FRONT_BASE_URL = env.str(
 PAYMENT_CANCELED_FRONT_BASE_URL = env.str(
     "PAYMENT_CANCELED_FRONT_BASE_URL", default="https://app.taino.ir/dashboard/wallet/canceled"
 )
+
+# AI Chat Constants
+# Streamed answers send "ai_chat.delta" frames before the final message, enable once clients handle them
+AI_CHAT_STREAMING_ENABLED = env.bool("AI_CHAT_STREAMING_ENABLED", default=False)
+# Deltas are coalesced before being fanned out to the channel layer, so a long answer
+# does not turn into one Redis publish per token.
+AI_CHAT_STREAM_FLUSH_CHARS = env.int("AI_CHAT_STREAM_FLUSH_CHARS", default=64)
+AI_CHAT_STREAM_FLUSH_INTERVAL_MS = env.int("AI_CHAT_STREAM_FLUSH_INTERVAL_MS", default=80)
+# Per-process bounds on AI responses of the websocket consumers, see
+# base_utils.facades.ai_response_supervisor. Responses over the global limit wait in the queue.
+AI_RESPONSE_MAX_CONCURRENCY = env.int("AI_RESPONSE_MAX_CONCURRENCY", default=32)
+AI_RESPONSE_MAX_PER_USER = env.int("AI_RESPONSE_MAX_PER_USER", default=2)
+AI_RESPONSE_MAX_PER_SESSION = env.int("AI_RESPONSE_MAX_PER_SESSION", default=1)
+AI_RESPONSE_MAX_QUEUED = env.int("AI_RESPONSE_MAX_QUEUED", default=64)
+AI_RESPONSE_QUEUE_TIMEOUT_SECONDS = env.int("AI_RESPONSE_QUEUE_TIMEOUT_SECONDS", default=30)
+AI_RESPONSE_CANCEL_ON_DISCONNECT = env.bool("AI_RESPONSE_CANCEL_ON_DISCONNECT", default=True)
+# History sent on websocket connect: one cached "<prefix>.history" frame per session for clients
+# connecting with ?history=snapshot, see base_utils.facades.history_snapshot. Disable to send one
+# frame per message to every client.
+CHAT_HISTORY_SNAPSHOT_ENABLED = env.bool("CHAT_HISTORY_SNAPSHOT_ENABLED", default=True)
+CHAT_HISTORY_SNAPSHOT_SIZE = env.int("CHAT_HISTORY_SNAPSHOT_SIZE", default=20)
+CHAT_HISTORY_SNAPSHOT_TTL = env.int("CHAT_HISTORY_SNAPSHOT_TTL", default=600)
+CHAT_HISTORY_SNAPSHOT_LOCAL_TTL = env.int("CHAT_HISTORY_SNAPSHOT_LOCAL_TTL", default=30)
+CHAT_HISTORY_SNAPSHOT_LOCAL_MAX_ENTRIES = env.int("CHAT_HISTORY_SNAPSHOT_LOCAL_MAX_ENTRIES", default=512)
+
+# Chat read receipts are written at most once per window per connection (the latest read mark
+# wins), and a consultant's subscription is re-checked at most every CHAT_SUBSCRIPTION_CHECK_SECONDS
+CHAT_READ_RECEIPT_DEBOUNCE_SECONDS = env.int("CHAT_READ_RECEIPT_DEBOUNCE_SECONDS", default=5)
+CHAT_SUBSCRIPTION_CHECK_SECONDS = env.int("CHAT_SUBSCRIPTION_CHECK_SECONDS", default=30)
+
+# Pooled AI (OpenAI-compatible) clients, see base_utils.facades.ai_clients
+AI_CLIENT_MAX_CONNECTIONS = env.int("AI_CLIENT_MAX_CONNECTIONS", default=100)
+AI_CLIENT_MAX_KEEPALIVE_CONNECTIONS = env.int("AI_CLIENT_MAX_KEEPALIVE_CONNECTIONS", default=20)
+AI_CLIENT_KEEPALIVE_EXPIRY = env.int("AI_CLIENT_KEEPALIVE_EXPIRY", default=60)
+# Per provider host overrides, e.g. AI_CLIENT_PROVIDER_MAX_CONNECTIONS=api.deepseek.com=50,openrouter.ai=30
+AI_CLIENT_PROVIDER_MAX_CONNECTIONS = env.dict("AI_CLIENT_PROVIDER_MAX_CONNECTIONS", cast={"value": int}, default={})
+
+# Per-process tier of the AI config cache (Redis is the second tier)
+AI_CONFIG_LOCAL_CACHE_TTL = env.int("AI_CONFIG_LOCAL_CACHE_TTL", default=30)
+AI_CONFIG_LOCAL_CACHE_MAX_ENTRIES = env.int("AI_CONFIG_LOCAL_CACHE_MAX_ENTRIES", default=256)
+
+# Charge aggregation for message-based AI billing: coins are reserved from the wallet in chunks,
+# debited per message in Redis and settled to Postgres periodically / when the session closes.
+AI_CHARGE_AGGREGATION_ENABLED = env.bool("AI_CHARGE_AGGREGATION_ENABLED", default=False)
+AI_CHARGE_RESERVATION_MESSAGES = env.int("AI_CHARGE_RESERVATION_MESSAGES", default=20)
+# At most this share of the wallet balance is held for a session (at least one message is)
+AI_CHARGE_RESERVATION_BALANCE_SHARE = env.float("AI_CHARGE_RESERVATION_BALANCE_SHARE", default=0.25)
+AI_CHARGE_HOLD_IDLE_SECONDS = env.int("AI_CHARGE_HOLD_IDLE_SECONDS", default=15 * 60)
+
+# Per-process copy of the GeneralSetting snapshot (changes are also pushed via pub/sub)
+GENERAL_SETTINGS_LOCAL_CACHE_TTL = env.int("GENERAL_SETTINGS_LOCAL_CACHE_TTL", default=60)
+
+# Websocket authentication: resolved users are cached per process by (user, token jti)
+WEBSOCKET_AUTH_USER_CACHE_TTL = env.int("WEBSOCKET_AUTH_USER_CACHE_TTL", default=60)
+WEBSOCKET_AUTH_USER_CACHE_MAX_ENTRIES = env.int("WEBSOCKET_AUTH_USER_CACHE_MAX_ENTRIES", default=10000)
+
+# Buffered activity logging: rows are queued per process and written with bulk_create by a
+# background flusher (by size or interval). See apps.activity_log.services.buffer
+ACTIVITY_LOG_BUFFERED = env.bool("ACTIVITY_LOG_BUFFERED", default=False)
+ACTIVITY_LOG_BUFFER_MAX_SIZE = env.int("ACTIVITY_LOG_BUFFER_MAX_SIZE", default=10000)
+ACTIVITY_LOG_BATCH_SIZE = env.int("ACTIVITY_LOG_BATCH_SIZE", default=500)
+ACTIVITY_LOG_FLUSH_INTERVAL = env.float("ACTIVITY_LOG_FLUSH_INTERVAL", default=2.0)
+# Share of rows kept per level, e.g. ACTIVITY_LOG_SAMPLE_RATES=debug=0.1,info=0.5
+ACTIVITY_LOG_SAMPLE_RATES = env.dict("ACTIVITY_LOG_SAMPLE_RATES", cast={"value": float}, default={})
+
+# ActivityLog retention; on a partitioned table (see the activity_log_partitions command)
+# daily partitions are created this many days ahead and whole expired partitions are dropped
+ACTIVITY_LOG_RETENTION_DAYS = env.int("ACTIVITY_LOG_RETENTION_DAYS", default=10)
+ACTIVITY_LOG_PARTITION_PRECREATE_DAYS = env.int("ACTIVITY_LOG_PARTITION_PRECREATE_DAYS", default=14)
+# Hourly activity stats rollups are kept longer than the raw log
+ACTIVITY_LOG_STATS_RETENTION_DAYS = env.int("ACTIVITY_LOG_STATS_RETENTION_DAYS", default=90)
+
+# CRM campaign dispatch: recipients per SMS.ir bulk request
+CRM_SMS_BATCH_SIZE = env.int("CRM_SMS_BATCH_SIZE", default=100)
+
+# Uploads handed to Celery workers (document analysis) are staged by reference, see
+# base_utils.facades.blob_staging. The local directory must be shared by web and worker, and
+# must not be under MEDIA_ROOT (served publicly).
+BLOB_STAGING_DIR = env.str("BLOB_STAGING_DIR", default=str(BASE_DIR.joinpath("staging")))
+BLOB_STAGING_S3_LOCATION = env.str("BLOB_STAGING_S3_LOCATION", default="staging")
+BLOB_STAGING_MAX_AGE_HOURS = env.int("BLOB_STAGING_MAX_AGE_HOURS", default=24)
+
+# Per-process cache of upload inspections (page count, mime, dimensions) keyed by content hash,
+# see base_utils.file_processor.FileProcessorService.inspect
+FILE_INSPECTION_CACHE_TTL = env.int("FILE_INSPECTION_CACHE_TTL", default=3600)
+FILE_INSPECTION_CACHE_MAX_ENTRIES = env.int("FILE_INSPECTION_CACHE_MAX_ENTRIES", default=512)
+
+# Structured debug tracing (base_utils.log.tracing), module prefix -> sample rate,
+# e.g. TRACING_MODULES=apps.ai_chat=1.0,base_utils.middlewares=0.01. Empty disables it.
+TRACING_MODULES = env.dict("TRACING_MODULES", cast={"value": float}, default={})